@@ -0,0 +1,258 @@
+"""
+Backends do cache compartilhado entre processos.
+
+- SQLiteCacheBackend: arquivo SQLite (WAL) no disco local, compartilhado pelos workers
+  de uma mesma máquina/container.
+- RedisCacheBackend: qualquer servidor que fale o protocolo do Redis (RESP), para
+  compartilhar entre réplicas. Cliente mínimo embutido, sem dependências.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import List, Optional, Union
+from urllib.parse import unquote, urlparse
+
+from app.core.config import settings
+from app.core.shared_cache import CacheBackend
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS valores (
+    chave TEXT PRIMARY KEY,
+    valor BLOB NOT NULL,
+    expira_em REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS locks (
+    chave TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expira_em REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Libera o lock apenas se ele ainda pertence ao token informado (atômico no servidor)
+_SCRIPT_LIBERAR_LOCK = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache compartilhado em um arquivo SQLite.
+
+    As operações rodam em threads (asyncio.to_thread), sem bloquear o event loop
+    enquanto outro processo segura o lock de escrita do SQLite.
+
+    Args:
+        path (str): Caminho do arquivo SQLite.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._iniciado = False
+        self._lock_init = threading.Lock()
+        self._gravacoes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._iniciado:
+            with self._lock_init:
+                if not self._iniciado:
+                    diretorio = os.path.dirname(self.path)
+                    if diretorio:
+                        os.makedirs(diretorio, exist_ok=True)
+                    with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.executescript(_SCHEMA)
+                    self._iniciado = True
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT valor FROM valores WHERE chave = ? AND expira_em > ?", (key, time.time())).fetchone()
+        return bytes(row[0]) if row else None
+
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        agora = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("INSERT OR REPLACE INTO valores (chave, valor, expira_em) VALUES (?, ?, ?)", (key, value, agora + ttl_seconds))
+            self._gravacoes += 1
+            if self._gravacoes % 100 == 0:
+                conn.execute("DELETE FROM valores WHERE expira_em <= ?", (agora,))
+
+    def _acquire_lock(self, key: str, token: str, ttl_seconds: float) -> bool:
+        agora = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM locks WHERE chave = ? AND expira_em <= ?", (key, agora))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO locks (chave, token, expira_em) VALUES (?, ?, ?)", (key, token, agora + ttl_seconds)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount > 0
+
+    def _release_lock(self, key: str, token: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM locks WHERE chave = ? AND token = ?", (key, token))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl_seconds)
+
+    async def acquire_lock(self, key: str, token: str, ttl_seconds: float) -> bool:
+        return await asyncio.to_thread(self._acquire_lock, key, token, ttl_seconds)
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await asyncio.to_thread(self._release_lock, key, token)
+
+
+class RedisError(Exception):
+    """Erro devolvido pelo servidor Redis."""
+
+
+RespostaRedis = Union[None, int, bytes, str, List]
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache compartilhado em um servidor compatível com o protocolo do Redis.
+
+    Mantém uma conexão por event loop; os comandos de uma mesma conexão são
+    serializados por um asyncio.Lock.
+
+    Args:
+        url (str): redis://[:senha@]host[:porta][/db].
+        timeout (float): Timeout de conexão e de cada comando (em segundos).
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        partes = urlparse(url)
+        self.host = partes.hostname or "localhost"
+        self.port = partes.port or 6379
+        self.password = unquote(partes.password) if partes.password else None
+        self.db = int(partes.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._conexao = None
+        self._loop = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def _codificar(*args) -> bytes:
+        partes = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            dado = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            partes.append(f"${len(dado)}\r\n".encode() + dado + b"\r\n")
+        return b"".join(partes)
+
+    async def _ler_resposta(self, reader: asyncio.StreamReader) -> RespostaRedis:
+        linha = await reader.readline()
+        if not linha:
+            raise ConnectionError("Conexão com o Redis encerrada")
+        tipo, conteudo = linha[:1], linha[1:-2]
+        if tipo == b"+":
+            return conteudo.decode()
+        if tipo == b"-":
+            raise RedisError(conteudo.decode())
+        if tipo == b":":
+            return int(conteudo)
+        if tipo == b"$":
+            tamanho = int(conteudo)
+            if tamanho < 0:
+                return None
+            return (await reader.readexactly(tamanho + 2))[:-2]
+        if tipo == b"*":
+            tamanho = int(conteudo)
+            if tamanho < 0:
+                return None
+            return [await self._ler_resposta(reader) for _ in range(tamanho)]
+        raise RedisError(f"Resposta inválida do Redis: {linha!r}")
+
+    async def _conectar(self):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        self._conexao = (reader, writer)
+        if self.password:
+            await self._enviar("AUTH", self.password)
+        if self.db:
+            await self._enviar("SELECT", self.db)
+
+    async def _enviar(self, *args) -> RespostaRedis:
+        reader, writer = self._conexao
+        writer.write(self._codificar(*args))
+        await writer.drain()
+        return await asyncio.wait_for(self._ler_resposta(reader), self.timeout)
+
+    async def execute(self, *args) -> RespostaRedis:
+        """
+        Executar um comando Redis.
+
+        Args:
+            *args: Comando e argumentos (ex.: "SET", "chave", b"valor").
+
+        Returns:
+            Resposta decodificada (str, int, bytes, lista ou None).
+
+        Raises:
+            RedisError: Se o servidor devolver um erro.
+            ConnectionError, OSError, asyncio.TimeoutError: Falhas de rede.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._conexao, self._lock = loop, None, asyncio.Lock()
+        async with self._lock:
+            try:
+                if self._conexao is None:
+                    await self._conectar()
+                return await self._enviar(*args)
+            except RedisError:
+                raise
+            except BaseException:
+                # Falha de rede, timeout ou cancelamento no meio do comando: a conexão fica
+                # em estado indefinido, então é descartada e refeita no próximo comando
+                self._descartar()
+                raise
+
+    def _descartar(self) -> None:
+        if self._conexao is not None:
+            writer = self._conexao[1]
+            self._conexao = None
+            writer.close()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await self.execute("SET", key, value, "PX", max(1, int(ttl_seconds * 1000)))
+
+    async def acquire_lock(self, key: str, token: str, ttl_seconds: float) -> bool:
+        return await self.execute("SET", key, token, "NX", "PX", max(1, int(ttl_seconds * 1000))) == "OK"
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self.execute("EVAL", _SCRIPT_LIBERAR_LOCK, 1, key, token)
+
+    async def close(self) -> None:
+        if self._conexao is not None and self._loop is asyncio.get_running_loop():
+            self._descartar()
+
+
+def create_cache_backend() -> Optional[CacheBackend]:
+    """
+    Criar o backend do cache compartilhado conforme CACHE_BACKEND.
+
+    Returns:
+        CacheBackend | None: SQLite ("sqlite"), Redis ("redis") ou None ("memory", apenas cache local).
+
+    Raises:
+        ValueError: Se CACHE_BACKEND for desconhecido.
+    """
+    tipo = settings.cache_backend.lower()
+    if tipo == "memory":
+        return None
+    if tipo == "sqlite":
+        return SQLiteCacheBackend(settings.cache_sqlite_path)
+    if tipo == "redis":
+        return RedisCacheBackend(settings.redis_url)
+    raise ValueError(f"CACHE_BACKEND inválido: {settings.cache_backend}. Opções: memory, sqlite, redis.")
@@ -1,9 +1,12 @@
-import requests
-from bs4 import BeautifulSoup
+import importlib.util
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
+from app.adapters.http_client import fetch
+from app.adapters.numeric import enriquecer_resultado
+from app.core.config import settings
+from app.core.logs import AMOSTRADO
+from app.core.metrics import parse_duration, scrape_failures_total, upstream_request_duration
 
-BASE_URL = "http://vitibrasil.cnpuv.embrapa.br/index.php"
 URLS = {
     "producao": "opt_02",
     "processamento": "opt_03",
@@ -12,7 +15,12 @@ URLS = {
     "exportacao": "opt_06"
 }
 
-def scrape_table(resource: str, ano: str) -> dict:
+def base_url() -> str:
+    """URL da página de dados do site da Embrapa (configurável por EMBRAPA_BASE_URL)."""
+    return settings.embrapa_base_url.rstrip("/") + "/index.php"
+
+
+async def scrape_table(resource: str, ano: str) -> dict:
     """
     Realiza a raspagem dos dados do site da Embrapa para o recurso e ano informados.
     Retorna dict com dados, valor_total (US$) e ano efetivo.
@@ -22,58 +30,141 @@ def scrape_table(resource: str, ano: str) -> dict:
     - Ano padrão conforme endpoint.
     - Retorna lista vazia se não houver dados para o ano.
     - valor_total (US$): string extraída da linha 'Total' da tabela.
+
+    A requisição usa o cliente HTTP assíncrono compartilhado (pool de conexões e
+    limite de concorrência), sem bloquear o event loop.
+
+    O resultado inclui também dados_numericos e total_numerico, convertidos uma única vez aqui.
+
+    As durações da requisição e da extração e as falhas por tipo de exceção são
+    registradas nas métricas (/metrics).
     """
     params = {"ano": ano, "opcao": URLS[resource]}
-    url = BASE_URL + f"?ano={ano}&opcao={URLS[resource]}"
-    logging.info(f"[SCRAPER] URL requisitada: {BASE_URL} | Params: {params}")
+    url = base_url()
+    logging.info("[SCRAPER] URL requisitada: %s | Params: %s", url, params, extra=AMOSTRADO)
     try:
-        response = requests.get(BASE_URL, params=params, timeout=20)
-        logging.info(f"[SCRAPER] Status code: {response.status_code}")
+        with upstream_request_duration.time(resource):
+            response = await fetch(url, params=params)
+        logging.info("[SCRAPER] Status code: %s", response.status_code, extra=AMOSTRADO)
         response.raise_for_status()
-        logging.debug(f"[SCRAPER] HTML início: {response.text[:300]}")
-        soup = BeautifulSoup(response.content, "html.parser")
-        table = soup.find("table", class_="tb_base tb_dados")
-        if not table:
-            logging.error(f"[SCRAPER] Tabela de dados não encontrada na página! URL: {url}")
-            raise Exception("Tabela de dados não encontrada na página.")
-        dados = []
-        quantidade_total_kg = ""
-        valor_total_usd = ""
-        valor_total = ""  # Inicializa para evitar referência antes da atribuição
-        for tr in table.find_all("tr"):
-            tds = tr.find_all("td")
-            if resource in ("importacao", "exportacao"):
-                # 3 colunas: Países, Quantidade (Kg), Valor (US$)
-                if len(tds) == 3:
-                    pais = tds[0].get_text(strip=True)
-                    quantidade = tds[1].get_text(strip=True)
-                    valor = tds[2].get_text(strip=True)
-                    if pais and pais.lower() != "total":
-                        dados.append({
-                            "País": pais,
-                            "Quantidade (Kg)": quantidade,
-                            "Valor (US$)": valor
-                        })
-                    elif pais and pais.lower() == "total":
-                        quantidade_total_kg = quantidade
-                        valor_total_usd = valor
-            else:
-                # 2 colunas: Produto, Quantidade (L.)
-                if len(tds) == 2:
-                    produto = tds[0].get_text(strip=True)
-                    quantidade = tds[1].get_text(strip=True)
-                    if produto and produto.lower() != "total":
-                        dados.append({"Produto": produto, "Quantidade (L.)": quantidade})
-                    elif produto and produto.lower() == "total":
-                        valor_total = quantidade
-        logging.info(f"[SCRAPER] Linhas extraídas: {len(dados)} | Total (Kg): {quantidade_total_kg} | Valor total (US$): {valor_total_usd}")
-        if len(dados) == 0:
-            logging.warning(f"[SCRAPER] Nenhum dado extraído da tabela! URL: {url}")
-        logging.info(f"Scraping do recurso {resource} ano={ano} concluído com sucesso.")
-        if resource in ("importacao", "exportacao"):
-            return {"dados": dados, "valor_total": valor_total_usd, "ano": int(ano)}
-        else:
-            return {"dados": dados, "valor_total": valor_total, "ano": int(ano)}
+        if logging.root.isEnabledFor(logging.DEBUG):
+            # Só decodifica o HTML se o DEBUG estiver ativo
+            logging.debug("[SCRAPER] HTML início: %s", response.text[:300])
+        parser = settings.html_parser if settings.html_parser in PARSERS else "bs4"
+        with parse_duration.time(resource, parser):
+            return enriquecer_resultado(resource, parse_table(resource, ano, response.content))
     except Exception as e:
-        logging.error(f"Erro ao raspar {resource} ano={ano}: {e}")
+        scrape_failures_total.inc(resource, type(e).__name__)
+        logging.error("Erro ao raspar %s ano=%s: %s", resource, ano, e)
         raise
+
+
+def _extrair_celulas_bs4(html: bytes) -> Optional[List[List[str]]]:
+    """Extrair o texto das células de cada linha da tabela de dados com BeautifulSoup (html.parser)."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table", class_="tb_base tb_dados")
+    if not table:
+        return None
+    return [[td.get_text(strip=True) for td in tr.find_all("td")] for tr in table.find_all("tr")]
+
+
+# Tabela com as classes tb_base e tb_dados (mesmo critério do BeautifulSoup)
+_XPATH_TABELA = (
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' tb_base ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' tb_dados ')]"
+)
+
+
+def _extrair_celulas_lxml(html: bytes) -> Optional[List[List[str]]]:
+    """
+    Extrair o texto das células de cada linha da tabela de dados com lxml (XPath).
+
+    O texto de cada célula é montado como no ``get_text(strip=True)`` do BeautifulSoup:
+    cada trecho de texto é aparado e os trechos são concatenados. Corpo vazio resulta em
+    None, como no BeautifulSoup (o lxml lançaria ParserError).
+    """
+    import lxml.etree
+    import lxml.html
+
+    try:
+        doc = lxml.html.fromstring(html)
+    except lxml.etree.ParserError:
+        return None
+    tabelas = doc.xpath(_XPATH_TABELA)
+    if not tabelas:
+        return None
+    return [
+        ["".join(t.strip() for t in td.itertext()) for td in tr.iter("td")]
+        for tr in tabelas[0].iter("tr")
+    ]
+
+
+# bs4 e lxml são importados na primeira raspagem, não na inicialização da API.
+# O lxml é opcional; sem ele usa-se o BeautifulSoup.
+PARSERS = {"bs4": _extrair_celulas_bs4}
+if importlib.util.find_spec("lxml") is not None:
+    PARSERS["lxml"] = _extrair_celulas_lxml
+
+
+def parse_table(resource: str, ano: str, html: bytes, parser: Optional[str] = None) -> dict:
+    """
+    Extrair a tabela de dados de uma página da Embrapa já baixada.
+
+    Args:
+        resource (str): Nome do recurso.
+        ano (str): Ano consultado.
+        html (bytes): Conteúdo HTML da página.
+        parser (str, opcional): Backend de extração ("lxml" ou "bs4"). Padrão: HTML_PARSER,
+            com BeautifulSoup caso o lxml não esteja instalado.
+
+    Returns:
+        dict: Estrutura com dados, valor_total e ano (mesmo formato de scrape_table).
+
+    Raises:
+        Exception: Se a tabela de dados não for encontrada na página.
+    """
+    url = base_url() + f"?ano={ano}&opcao={URLS[resource]}"
+    extrair = PARSERS.get(parser or settings.html_parser, _extrair_celulas_bs4)
+    linhas = extrair(html)
+    if linhas is None:
+        logging.error(f"[SCRAPER] Tabela de dados não encontrada na página! URL: {url}")
+        raise Exception("Tabela de dados não encontrada na página.")
+    dados = []
+    quantidade_total_kg = ""
+    valor_total_usd = ""
+    valor_total = ""  # Inicializa para evitar referência antes da atribuição
+    for tds in linhas:
+        if resource in ("importacao", "exportacao"):
+            # 3 colunas: Países, Quantidade (Kg), Valor (US$)
+            if len(tds) == 3:
+                pais, quantidade, valor = tds
+                if pais and pais.lower() != "total":
+                    dados.append({
+                        "País": pais,
+                        "Quantidade (Kg)": quantidade,
+                        "Valor (US$)": valor
+                    })
+                elif pais and pais.lower() == "total":
+                    quantidade_total_kg = quantidade
+                    valor_total_usd = valor
+        else:
+            # 2 colunas: Produto, Quantidade (L.)
+            if len(tds) == 2:
+                produto, quantidade = tds
+                if produto and produto.lower() != "total":
+                    dados.append({"Produto": produto, "Quantidade (L.)": quantidade})
+                elif produto and produto.lower() == "total":
+                    valor_total = quantidade
+    logging.info(
+        "[SCRAPER] Linhas extraídas: %d | Total (Kg): %s | Valor total (US$): %s",
+        len(dados), quantidade_total_kg, valor_total_usd, extra=AMOSTRADO,
+    )
+    if len(dados) == 0:
+        logging.warning(f"[SCRAPER] Nenhum dado extraído da tabela! URL: {url}")
+    logging.info("Scraping do recurso %s ano=%s concluído com sucesso.", resource, ano, extra=AMOSTRADO)
+    if resource in ("importacao", "exportacao"):
+        return {"dados": dados, "valor_total": valor_total_usd, "ano": int(ano)}
+    else:
+        return {"dados": dados, "valor_total": valor_total, "ano": int(ano)}
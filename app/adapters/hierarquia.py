@@ -0,0 +1,83 @@
+"""
+Hierarquia de produtos/categorias e agregados por ano.
+
+Nas tabelas de produção, processamento e comercialização, cada categoria (nome em
+maiúsculas, ex.: "VINHO DE MESA") é seguida de seus subitens ("Tinto", "Branco", ...).
+Os agregados são calculados uma única vez, na ingestão, a partir dos dados numéricos.
+"""
+from typing import Dict, List
+
+
+def coluna_total(resource: str) -> str:
+    """
+    Coluna que compõe o valor total do recurso.
+
+    Args:
+        resource (str): Nome do recurso.
+
+    Returns:
+        str: "Valor (US$)" para importação/exportação, "Quantidade (L.)" para os demais.
+    """
+    return "Valor (US$)" if resource in ("importacao", "exportacao") else "Quantidade (L.)"
+
+
+def colunas_tabela(resource: str) -> List[str]:
+    """
+    Colunas das linhas de dados do recurso, na ordem da tabela do site.
+
+    Args:
+        resource (str): Nome do recurso.
+
+    Returns:
+        list of str: ["País", "Quantidade (Kg)", "Valor (US$)"] para importação/exportação,
+        ["Produto", "Quantidade (L.)"] para os demais.
+    """
+    if resource in ("importacao", "exportacao"):
+        return ["País", "Quantidade (Kg)", "Valor (US$)"]
+    return ["Produto", "Quantidade (L.)"]
+
+
+def eh_categoria(nome: str) -> bool:
+    """Indicar se o nome de produto representa uma categoria (escrito em maiúsculas)."""
+    return str(nome).isupper()
+
+
+def montar_agregados(resource: str, dados_numericos: List[Dict]) -> Dict:
+    """
+    Montar a hierarquia e o ranking de itens de um (recurso, ano).
+
+    Args:
+        resource (str): Nome do recurso.
+        dados_numericos (list of dict): Linhas com as colunas numéricas convertidas.
+
+    Returns:
+        dict: Estrutura com as chaves:
+            - coluna (str): Coluna usada como métrica ("Quantidade (L.)" ou "Valor (US$)").
+            - categorias (list): [{nome, total, subitens: [{nome, valor}]}]; vazia para importação/exportação.
+            - ranking (list): Itens folha [{nome, categoria, valor}] em ordem decrescente de valor,
+              sem os itens sem valor.
+    """
+    coluna = coluna_total(resource)
+    categorias: List[Dict] = []
+    itens: List[Dict] = []
+    if resource in ("importacao", "exportacao"):
+        itens = [{"nome": row.get("País"), "categoria": None, "valor": row.get(coluna)} for row in dados_numericos]
+    else:
+        atual = None
+        for row in dados_numericos:
+            nome = row.get("Produto", "")
+            valor = row.get(coluna)
+            if atual is None or eh_categoria(nome):
+                atual = {"nome": nome, "total": valor, "subitens": []}
+                categorias.append(atual)
+            else:
+                atual["subitens"].append({"nome": nome, "valor": valor})
+        for categoria in categorias:
+            if categoria["total"] is None:
+                categoria["total"] = sum(s["valor"] or 0 for s in categoria["subitens"])
+            if categoria["subitens"]:
+                itens.extend({"nome": s["nome"], "categoria": categoria["nome"], "valor": s["valor"]} for s in categoria["subitens"])
+            else:
+                itens.append({"nome": categoria["nome"], "categoria": categoria["nome"], "valor": categoria["total"]})
+    ranking = sorted((item for item in itens if item["valor"]), key=lambda item: item["valor"], reverse=True)
+    return {"coluna": coluna, "categorias": categorias, "ranking": ranking}
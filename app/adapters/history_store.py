@@ -0,0 +1,213 @@
+"""
+Armazenamento local do histórico completo (todos os recursos e anos) em SQLite.
+
+Cada (recurso, ano) é gravado como um snapshot com suas linhas, indexadas por
+(recurso, ano, ordem) e por (recurso, ano, chave), em que a chave é o produto ou país.
+
+Cada thread reaproveita a própria conexão (aberta e configurada uma única vez), já que
+o fallback consulta o histórico a cada requisição enquanto o site estiver fora do ar.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    resource TEXT NOT NULL,
+    ano INTEGER NOT NULL,
+    valor_total TEXT,
+    timestamp TEXT,
+    PRIMARY KEY (resource, ano)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS linhas (
+    resource TEXT NOT NULL,
+    ano INTEGER NOT NULL,
+    ordem INTEGER NOT NULL,
+    chave TEXT NOT NULL,
+    dados TEXT NOT NULL,
+    PRIMARY KEY (resource, ano, ordem)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_linhas_chave ON linhas (resource, ano, chave);
+"""
+
+
+def _chave(row: Dict) -> str:
+    """Extrair a chave da linha (Produto ou País)."""
+    return str(row.get("Produto", row.get("País", "")))
+
+
+class HistoryStore:
+    """
+    Repositório SQLite de snapshots por (recurso, ano).
+
+    Args:
+        path (str): Caminho do arquivo SQLite.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._escritas = 0
+
+    def exists(self) -> bool:
+        """Indicar se o arquivo do histórico já foi criado."""
+        return os.path.exists(self.path)
+
+    def versao(self) -> Tuple:
+        """
+        Identificar o conteúdo atual do histórico, para invalidar caches de leituras.
+
+        Muda a cada ``save`` neste processo e quando outro processo grava no arquivo
+        (mtime do banco ou do WAL).
+        """
+        mtimes = []
+        for caminho in (self.path, self.path + "-wal"):
+            try:
+                mtimes.append(os.stat(caminho).st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(None)
+        return (self.path, self._escritas, *mtimes)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão do thread atual, aberta no primeiro uso (e reaberta se o caminho mudar)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.path != self.path:
+            self.close()
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.path = conn, self.path
+        return conn
+
+    def close(self) -> None:
+        """Fechar a conexão do thread atual, se aberta."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def init(self) -> None:
+        """Criar o arquivo e as tabelas, se ainda não existirem."""
+        diretorio = os.path.dirname(self.path)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def save(self, resource: str, ano: int, resultado: Dict) -> None:
+        """
+        Gravar (ou substituir) o snapshot de um (recurso, ano) em uma única transação.
+
+        Args:
+            resource (str): Nome do recurso.
+            ano (int): Ano dos dados.
+            resultado (dict): Resultado do scraping (dados e valor_total).
+        """
+        dados = resultado.get("dados", [])
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM linhas WHERE resource = ? AND ano = ?", (resource, ano))
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (resource, ano, valor_total, timestamp) VALUES (?, ?, ?, ?)",
+                (resource, ano, resultado.get("valor_total", ""), datetime.utcnow().isoformat() + "Z"),
+            )
+            conn.executemany(
+                "INSERT INTO linhas (resource, ano, ordem, chave, dados) VALUES (?, ?, ?, ?, ?)",
+                [(resource, ano, i, _chave(row), json.dumps(row, ensure_ascii=False)) for i, row in enumerate(dados)],
+            )
+        self._escritas += 1
+
+    def load(self, resource: str, ano: int) -> Optional[Dict]:
+        """
+        Carregar o snapshot de um (recurso, ano) pela chave primária.
+
+        Args:
+            resource (str): Nome do recurso.
+            ano (int): Ano desejado.
+
+        Returns:
+            dict | None: Estrutura com fonte, timestamp, ano, valor_total e dados, ou None se ausente.
+        """
+        if not self.exists():
+            return None
+        conn = self._connect()
+        snapshot = conn.execute(
+            "SELECT valor_total, timestamp FROM snapshots WHERE resource = ? AND ano = ?", (resource, ano)
+        ).fetchone()
+        if snapshot is None:
+            return None
+        linhas = conn.execute(
+            "SELECT dados FROM linhas WHERE resource = ? AND ano = ? ORDER BY ordem", (resource, ano)
+        ).fetchall()
+        return {
+            "fonte": "local",
+            "timestamp": snapshot[1],
+            "ano": ano,
+            "valor_total": snapshot[0],
+            "dados": [json.loads(linha[0]) for linha in linhas],
+        }
+
+    def find(self, resource: str, ano: int, chave: str) -> Optional[Dict]:
+        """
+        Buscar uma linha pelo produto/país usando o índice (recurso, ano, chave).
+
+        Returns:
+            dict | None: Primeira linha com a chave informada, ou None.
+        """
+        if not self.exists():
+            return None
+        linha = self._connect().execute(
+            "SELECT dados FROM linhas WHERE resource = ? AND ano = ? AND chave = ? ORDER BY ordem LIMIT 1",
+            (resource, ano, chave),
+        ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def available_years(self, resource: str) -> Set[int]:
+        """
+        Listar os anos já gravados de um recurso.
+
+        Returns:
+            set of int: Anos presentes no histórico.
+        """
+        if not self.exists():
+            return set()
+        return {row[0] for row in self._connect().execute("SELECT ano FROM snapshots WHERE resource = ?", (resource,))}
+
+
+history_store = HistoryStore(settings.history_db_path)
+# Dados gravados pela atualização periódica, em diretório próprio (não versionado)
+refresh_store = HistoryStore(os.path.join(settings.refresh_data_path, "historico.sqlite3"))
+
+
+def versao_historico() -> Tuple:
+    """Versão conjunta dos históricos consultados por load_history (ver HistoryStore.versao)."""
+    return (refresh_store.versao(), history_store.versao())
+
+
+def load_history(resource: str, ano: str) -> Optional[Dict]:
+    """
+    Carregar um (recurso, ano) do histórico local, se disponível.
+
+    Os dados da atualização periódica (mais recentes) têm precedência sobre o histórico
+    gerado por ``python -m app.services.snapshot``.
+
+    Args:
+        resource (str): Nome do recurso.
+        ano (str): Ano desejado.
+
+    Returns:
+        dict | None: Snapshot encontrado ou None.
+    """
+    for store in (refresh_store, history_store):
+        try:
+            snapshot = store.load(resource, int(ano))
+        except (sqlite3.Error, ValueError) as e:
+            logging.warning(f"Falha ao ler histórico local {store.path} para {resource} ano={ano}: {e}")
+            continue
+        if snapshot is not None:
+            return snapshot
+    return None
@@ -0,0 +1,124 @@
+"""
+Cliente HTTP assíncrono compartilhado para acesso ao site da Embrapa.
+
+Mantém um único httpx.AsyncClient por event loop, com pool de conexões
+keep-alive, e limita a quantidade de requisições simultâneas ao site externo.
+Acompanha a fila de requisições aguardando vaga, para descartar raspagens quando o
+site não dá conta (ver upstream_sobrecarregado).
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+_semaforo: Optional[asyncio.Semaphore] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_fila = {"aguardando": 0, "espera_media": 0.0}
+
+
+class UpstreamOverloadedError(Exception):
+    """Fila de requisições ao site externo acima do limite: a raspagem foi descartada."""
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Obter o cliente HTTP compartilhado, criando-o no primeiro uso.
+
+    O cliente é recriado se o event loop atual for diferente daquele em que
+    foi criado (ex.: testes que executam vários ``asyncio.run``).
+
+    Returns:
+        httpx.AsyncClient: Cliente com pool de conexões configurado.
+    """
+    global _client, _semaforo, _loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.upstream_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.upstream_max_connections,
+                max_keepalive_connections=settings.upstream_max_keepalive,
+            ),
+            headers={"User-Agent": "vitibrasil-api"},
+            # Como o requests.get usado antes: o site da Embrapa pode redirecionar
+            follow_redirects=True,
+        )
+        _semaforo = asyncio.Semaphore(settings.upstream_max_concurrency)
+        _loop = loop
+        logging.info("[HTTP] Cliente HTTP compartilhado criado")
+    return _client
+
+
+async def fetch(url: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> httpx.Response:
+    """
+    Executar uma requisição GET respeitando o limite de concorrência ao site externo.
+
+    Args:
+        url (str): URL requisitada.
+        params (dict, opcional): Parâmetros de query string.
+        timeout (float, opcional): Timeout da requisição em segundos. Padrão: UPSTREAM_TIMEOUT_SECONDS.
+
+    Returns:
+        httpx.Response: Resposta recebida.
+
+    Raises:
+        httpx.HTTPError: Em caso de falha de rede ou timeout.
+    """
+    client = get_client()
+    semaforo = _semaforo
+    inicio = time.perf_counter()
+    _fila["aguardando"] += 1
+    try:
+        await semaforo.acquire()
+    finally:
+        _fila["aguardando"] -= 1
+    # Média móvel exponencial da espera por uma vaga
+    _fila["espera_media"] += 0.2 * (time.perf_counter() - inicio - _fila["espera_media"])
+    try:
+        if timeout is None:
+            return await client.get(url, params=params)
+        return await client.get(url, params=params, timeout=timeout)
+    finally:
+        semaforo.release()
+
+
+def upstream_sobrecarregado() -> bool:
+    """
+    Indicar se a fila de requisições ao site passou dos limites.
+
+    Returns:
+        bool: True se há UPSTREAM_MAX_QUEUE requisições aguardando vaga, ou se há fila e a
+        espera média passou de UPSTREAM_MAX_QUEUE_WAIT_SECONDS (sem fila, a média antiga não
+        mantém o descarte).
+    """
+    aguardando = _fila["aguardando"]
+    return aguardando >= settings.upstream_max_queue or (
+        aguardando > 0 and _fila["espera_media"] > settings.upstream_max_queue_wait_seconds
+    )
+
+
+def get_upstream_queue_stats() -> Dict:
+    """
+    Retornar o estado da fila de requisições ao site externo.
+
+    Returns:
+        dict: aguardando (requisições sem vaga) e espera_media_ms.
+    """
+    return {"aguardando": _fila["aguardando"], "espera_media_ms": round(_fila["espera_media"] * 1000, 1)}
+
+
+async def close_client() -> None:
+    """Fechar o cliente HTTP compartilhado, liberando as conexões do pool."""
+    global _client, _semaforo, _loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _semaforo = None
+    _loop = None
+    _fila["aguardando"] = 0
+    _fila["espera_media"] = 0.0
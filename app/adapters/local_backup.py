@@ -1,14 +1,151 @@
 import os
 import json
-import pandas as pd
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
 from app.core.config import settings
+from app.core.logs import AMOSTRADO
+from app.adapters.history_store import load_history, versao_historico
+from app.adapters.numeric import converter_linhas, enriquecer_resultado, somar_total
 import logging
 
+# Índices dos arquivos de backup já lidos: caminho -> (mtime, índice por ano)
+_indices: Dict[str, Tuple[int, Dict]] = {}
+# Leituras do histórico SQLite já convertidas: (recurso, ano) -> (versão dos históricos, resultado ou None)
+_historicos: Dict[Tuple[str, str], Tuple[Tuple, Optional[Dict]]] = {}
+
+
+def _anos_da_linha(row: Dict) -> List[str]:
+    """Valores das colunas 'ano' (qualquer capitalização) de uma linha do formato antigo."""
+    return [str(row.get(k, "")).strip() for k in row.keys() if k.lower() == "ano"]
+
+
+def _indexar_json(path: str, resource: str) -> Dict:
+    """
+    Ler um backup JSON e indexá-lo por ano, com os valores numéricos já convertidos.
+
+    Returns:
+        dict: {"formato": "registro" | "lista", "anos": {ano: resultado}}.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # Novo formato: dicionário com campos fonte, timestamp, ano, valor_total (US$), dados
+    if isinstance(data, dict) and "dados" in data:
+        total = data.get("valor_total", data.get("valor_total (US$)", data.get("quantidade_total (L.)", data.get("quantidade_total (Kg)", "-"))))
+        registro = {
+            "fonte": data.get("fonte", "local"),
+            "timestamp": data.get("timestamp"),
+            "ano": data.get("ano"),
+            "valor_total": total,
+            "dados": data["dados"],
+        }
+        return {"formato": "registro", "anos": {str(data.get("ano")): enriquecer_resultado(resource, registro)}}
+    # Formato antigo: lista direta, com coluna de ano em cada linha
+    elif isinstance(data, list):
+        linhas_por_ano: Dict[str, List[Dict]] = {}
+        for row in data:
+            for valor in dict.fromkeys(_anos_da_linha(row)):
+                linhas_por_ano.setdefault(valor, []).append(row)
+        anos = {
+            ano: enriquecer_resultado(resource, {"fonte": "local", "timestamp": None, "valor_total": "-", "dados": linhas})
+            for ano, linhas in linhas_por_ano.items()
+        }
+        return {"formato": "lista", "anos": anos}
+    raise ValueError(f"Formato de backup local inválido: {path}")
+
+
+def _formatar_total_csv(total: float) -> str:
+    """Formatar o total calculado do CSV no padrão brasileiro com duas casas ("1.234,00")."""
+    return f"{total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _indexar_csv(path: str, resource: str) -> Dict:
+    """
+    Ler um backup CSV e indexá-lo por ano, com comparação vetorizada das colunas de ano.
+
+    O valor total de cada ano é calculado uma única vez, na indexação. O pandas só é
+    importado aqui: o formato CSV é raro e a importação pesa na inicialização da API.
+
+    Returns:
+        dict: {"formato": "csv", "anos": {ano: resultado}}.
+    """
+    import pandas as pd
+
+    # Tudo como texto: "1.234" (padrão brasileiro) não pode virar o float 1.234 antes
+    # de converter_linhas, para que CSV e JSON produzam os mesmos números
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    colunas_ano = [c for c in df.columns if str(c).lower() == "ano"]
+    anos: Dict[str, Dict] = {}
+    if colunas_ano:
+        valores = df[colunas_ano].astype(str).apply(lambda col: col.str.strip())
+        for ano in pd.unique(valores.values.ravel()):
+            mascara = (valores == ano).any(axis=1)
+            dados = df[mascara].to_dict(orient="records")
+            dados_numericos = converter_linhas(dados)
+            total = somar_total(resource, dados_numericos)
+            anos[str(ano)] = {
+                "dados": dados,
+                "valor_total": _formatar_total_csv(total),
+                "dados_numericos": dados_numericos,
+                "total_numerico": total,
+            }
+    return {"formato": "csv", "anos": anos}
+
+
+def _obter_indice(path: str, indexar: Callable[[str], Dict]) -> Optional[Dict]:
+    """
+    Obter o índice de um arquivo de backup, relendo-o apenas se o mtime mudou.
+
+    Returns:
+        dict | None: Índice do arquivo, ou None se o arquivo não existir.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        _indices.pop(path, None)
+        return None
+    em_memoria = _indices.get(path)
+    if em_memoria is not None and em_memoria[0] == mtime:
+        return em_memoria[1]
+    indice = indexar(path)
+    _indices[path] = (mtime, indice)
+    logging.info(f"Backup local indexado em memória: {path} ({len(indice['anos'])} ano(s))")
+    return indice
+
+
+def clear_backup_index() -> None:
+    """Descartar os índices em memória (os arquivos serão relidos no próximo uso)."""
+    _indices.clear()
+    _historicos.clear()
+
+
+def _obter_historico(resource: str, ano: str) -> Optional[Dict]:
+    """
+    Obter um (recurso, ano) do histórico SQLite, com os valores numéricos já convertidos.
+
+    O resultado (inclusive a ausência do ano) fica em memória até o histórico mudar
+    (ver versao_historico): fallbacks repetidos não consultam o SQLite nem reconvertem as linhas.
+    """
+    versao = versao_historico()
+    em_memoria = _historicos.get((resource, ano))
+    if em_memoria is not None and em_memoria[0] == versao:
+        return em_memoria[1]
+    historico = load_history(resource, ano)
+    resultado = enriquecer_resultado(resource, historico) if historico is not None else None
+    _historicos[(resource, ano)] = (versao, resultado)
+    return resultado
+
+
 def load_backup(resource: str, ano: str) -> dict:
     """
     Carrega backup local (CSV ou JSON) do recurso e ano, para fallback em caso de falha no scraping online.
 
+    Se o histórico (SQLite da atualização periódica ou gerado por ``python -m app.services.snapshot``)
+    possuir o recurso/ano solicitado, ele é usado diretamente, via consulta pela chave primária,
+    e mantido em memória até o histórico mudar.
+
+    Cada arquivo é lido uma única vez e mantido em memória indexado por ano; só é relido
+    quando sua data de modificação (mtime) muda. Os valores numéricos e o total de cada
+    ano são calculados nessa leitura.
+
     O arquivo local deve conter dados equivalentes aos do scraping online, garantindo consistência na estrutura e tipos de dados.
     O ano default é definido conforme o recurso (2024 para importacao/exportacao, 2023 para demais).
 
@@ -21,6 +158,8 @@ def load_backup(resource: str, ano: str) -> dict:
             - dados (list): Lista de registros do recurso.
             - valor_total (str): Valor total do recurso.
             - ano (int): Ano efetivo dos dados.
+            - dados_numericos (list): Registros com as colunas numéricas convertidas.
+            - total_numerico (int | float): Valor total numérico.
 
     Raises:
         Exception: Se não encontrar backup válido ou dados para o ano solicitado.
@@ -28,91 +167,49 @@ def load_backup(resource: str, ano: str) -> dict:
     backup_dir = settings.backup_path
     csv_path = os.path.join(backup_dir, f"{resource}.csv")
     json_path = os.path.join(backup_dir, f"{resource}.json")
-    logging.info(f"Tentando carregar backup local para {resource} ano={ano}")
+    logging.info("Tentando carregar backup local para %s ano=%s", resource, ano, extra=AMOSTRADO)
+    historico = _obter_historico(resource, str(ano))
+    if historico is not None:
+        logging.info("Histórico local carregado para %s ano=%s", resource, ano, extra=AMOSTRADO)
+        return {**historico}
     # Definir ano default conforme recurso
     if resource in ("importacao", "exportacao"):
         ano_default = "2024"
     else:
         ano_default = "2023"
 
-    dados = []
-    ano_efetivo = ano
-    if os.path.exists(json_path):
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Novo formato: dicionário com campos fonte, timestamp, ano, valor_total (US$), dados
-            if isinstance(data, dict) and "dados" in data:
-                # Se ano não bater, tenta ano default
-                if str(data.get("ano")) != str(ano):
-                    if str(data.get("ano")) == str(ano_default):
-                        ano_efetivo = ano_default
-                    else:
-                        raise Exception(f"Backup local não possui dados para o ano solicitado nem para o default: {ano}/{ano_default}")
-                dados = data["dados"]
-                total = data.get("valor_total", data.get("valor_total (US$)", data.get("quantidade_total (L.)", data.get("quantidade_total (Kg)", "-"))))
-                fonte = data.get("fonte", "local")
-                timestamp = data.get("timestamp")
-                return {
-                    "fonte": fonte,
-                    "timestamp": timestamp,
-                    "ano": int(ano_efetivo),
-                    "valor_total": total,
-                    "dados": dados
-                }
-            # Formato antigo: lista direta
-            elif isinstance(data, list):
-                dados = [row for row in data if any(str(row.get(k, "")).strip() == str(ano) for k in row.keys() if k.lower() == "ano")]
-                if not dados and ano != ano_default:
-                    # Tenta ano default
-                    dados = [row for row in data if any(str(row.get(k, "")).strip() == str(ano_default) for k in row.keys() if k.lower() == "ano")]
-                    if dados:
-                        ano_efetivo = ano_default
-                logging.info(f"Backup JSON carregado para {resource} ano={ano_efetivo}")
-                return {
-                    "fonte": "local",
-                    "timestamp": None,
-                    "ano": int(ano_efetivo),
-                    "valor_total": "-",
-                    "dados": dados
-                }
-            else:
-                raise Exception(f"Formato de backup local inválido para {resource}")
-    elif os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-        filtrado = df[df.apply(lambda row: any(str(row[k]).strip() == str(ano) for k in row.index if k.lower() == "ano"), axis=1)]
-        dados = filtrado.to_dict(orient="records")
-        if not dados and ano != ano_default:
-            filtrado_default = df[df.apply(lambda row: any(str(row[k]).strip() == str(ano_default) for k in row.index if k.lower() == "ano"), axis=1)]
-            dados = filtrado_default.to_dict(orient="records")
-            if dados:
-                ano_efetivo = ano_default
-        logging.info(f"Backup CSV carregado para {resource} ano={ano_efetivo}")
-    else:
+    ano_efetivo = str(ano)
+    indice = _obter_indice(json_path, lambda p: _indexar_json(p, resource))
+    if indice is None:
+        indice = _obter_indice(csv_path, lambda p: _indexar_csv(p, resource))
+    if indice is None:
         raise Exception(f"Backup local não encontrado para {resource} ano={ano}")
+    anos = indice["anos"]
 
-    if not dados:
-        raise Exception(f"Backup local não contém dados para {resource} ano={ano} nem para o ano default {ano_default}")
+    if indice["formato"] == "registro":
+        # Se ano não bater, tenta ano default
+        registro = anos.get(str(ano))
+        if registro is None:
+            registro = anos.get(ano_default)
+            if registro is None:
+                raise Exception(f"Backup local não possui dados para o ano solicitado nem para o default: {ano}/{ano_default}")
+            ano_efetivo = ano_default
+        return {**registro, "ano": int(ano_efetivo)}
 
-    # Extrair valor_total
-    valor_total = ""
-    if resource in ("importacao", "exportacao"):
-        # Somar 'Valor (US$)' ignorando linhas sem o campo
-        try:
-            valores = [float(str(row.get("Valor (US$)", "0")).replace(".", "").replace(",", ".")) for row in dados if "Valor (US$)" in row and str(row["Valor (US$)"]).strip()]
-            total = sum(valores)
-            valor_total = f"{total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        except Exception as e:
-            logging.warning(f"Erro ao somar valor total para {resource}: {e}")
-            valor_total = ""
-    else:
-        # Somar 'Quantidade (L.)' ignorando linhas sem o campo
-        try:
-            quantidades = [float(str(row.get("Quantidade (L.)", "0")).replace(".", "").replace(",", ".")) for row in dados if "Quantidade (L.)" in row and str(row["Quantidade (L.)"]).strip()]
-            total = sum(quantidades)
-            valor_total = f"{total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        except Exception as e:
-            logging.warning(f"Erro ao somar quantidade total para {resource}: {e}")
-            valor_total = ""
+    resultado = anos.get(str(ano))
+    if resultado is None and str(ano) != ano_default:
+        # Tenta ano default
+        resultado = anos.get(ano_default)
+        if resultado is not None:
+            ano_efetivo = ano_default
 
-    return {"dados": dados, "valor_total": valor_total, "ano": int(ano_efetivo)}
+    if indice["formato"] == "lista":
+        logging.info("Backup JSON carregado para %s ano=%s", resource, ano_efetivo, extra=AMOSTRADO)
+        if resultado is None:
+            resultado = enriquecer_resultado(resource, {"fonte": "local", "timestamp": None, "valor_total": "-", "dados": []})
+        return {**resultado, "ano": int(ano_efetivo)}
 
+    logging.info("Backup CSV carregado para %s ano=%s", resource, ano_efetivo, extra=AMOSTRADO)
+    if resultado is None or not resultado["dados"]:
+        raise Exception(f"Backup local não contém dados para {resource} ano={ano} nem para o ano default {ano_default}")
+    return {**resultado, "ano": int(ano_efetivo)}
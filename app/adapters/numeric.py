@@ -0,0 +1,122 @@
+"""
+Conversão dos valores numéricos no formato brasileiro ("1.234.567", "1.234,56", "-").
+
+A conversão é feita uma única vez, na ingestão (scraping ou backup), e o resultado
+acompanha os dados originais em texto.
+"""
+from typing import Dict, List, Optional, Union
+
+from app.adapters.hierarquia import coluna_total, eh_categoria, montar_agregados
+
+Numero = Union[int, float]
+
+# Colunas numéricas por tipo de tabela
+COLUNAS_NUMERICAS = ("Quantidade (L.)", "Quantidade (Kg)", "Valor (US$)")
+
+
+def parse_numero(valor) -> Optional[Numero]:
+    """
+    Converter um valor no formato brasileiro para número.
+
+    Args:
+        valor: Texto ("1.234.567", "1.234,56", "-", "") ou número já convertido.
+
+    Returns:
+        int | float | None: Número correspondente; None para valores ausentes ("-", vazio ou inválido).
+    """
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, float):
+        if valor != valor:  # NaN
+            return None
+        return int(valor) if valor.is_integer() else valor
+    texto = str(valor).strip().replace(".", "")
+    if not texto or texto == "-":
+        return None
+    try:
+        if "," in texto:
+            numero = float(texto.replace(",", "."))
+            return int(numero) if numero.is_integer() else numero
+        return int(texto)
+    except ValueError:
+        return None
+
+
+def formatar_numero(valor: Optional[Numero]) -> str:
+    """
+    Formatar um número no padrão brasileiro usado pelo site ("1.234.567").
+
+    Args:
+        valor (int | float | None): Número a formatar.
+
+    Returns:
+        str: Texto formatado; "-" para None.
+    """
+    if valor is None:
+        return "-"
+    if isinstance(valor, float) and not valor.is_integer():
+        return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"{int(valor):,}".replace(",", ".")
+
+
+def converter_linhas(dados: List[Dict]) -> List[Dict]:
+    """
+    Converter as colunas numéricas de cada linha, mantendo as demais.
+
+    Args:
+        dados (list of dict): Linhas com valores em texto.
+
+    Returns:
+        list of dict: Novas linhas com as colunas numéricas convertidas.
+    """
+    return [
+        {k: (parse_numero(v) if k in COLUNAS_NUMERICAS else v) for k, v in row.items()}
+        for row in dados
+    ]
+
+
+def somar_total(resource: str, dados_numericos: List[Dict]) -> Numero:
+    """
+    Somar a coluna de total do recurso.
+
+    Para tabelas hierárquicas (produção, processamento, comercialização), apenas as
+    categorias (nomes em maiúsculas) são somadas, pois os subitens já estão contidos nelas.
+
+    Args:
+        resource (str): Nome do recurso.
+        dados_numericos (list of dict): Linhas já convertidas.
+
+    Returns:
+        int | float: Soma da coluna de total.
+    """
+    coluna = coluna_total(resource)
+    linhas = dados_numericos
+    if resource not in ("importacao", "exportacao"):
+        categorias = [row for row in dados_numericos if eh_categoria(row.get("Produto", ""))]
+        if categorias:
+            linhas = categorias
+    return sum(row.get(coluna) or 0 for row in linhas)
+
+
+def enriquecer_resultado(resource: str, resultado: Dict) -> Dict:
+    """
+    Acrescentar ao resultado de um adapter as versões numéricas dos dados e do total,
+    além dos agregados por categoria (ver montar_agregados).
+
+    Args:
+        resource (str): Nome do recurso.
+        resultado (dict): Resultado com "dados" e "valor_total" em texto.
+
+    Returns:
+        dict: O mesmo resultado com as chaves "dados_numericos", "total_numerico" e "agregados".
+    """
+    dados_numericos = converter_linhas(resultado.get("dados", []))
+    total = parse_numero(resultado.get("valor_total"))
+    if total is None:
+        total = somar_total(resource, dados_numericos)
+    resultado["dados_numericos"] = dados_numericos
+    resultado["total_numerico"] = total
+    resultado["agregados"] = montar_agregados(resource, dados_numericos)
+    return resultado
@@ -0,0 +1,150 @@
+"""
+Repositório de usuários.
+
+Substitui a leitura e regravação integral de ``users.json`` por um armazenamento
+indexado (SQLite em modo WAL), com busca pela chave primária e inserção atômica.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class UserRepository(ABC):
+    """Interface do repositório de usuários."""
+
+    @abstractmethod
+    def get(self, username: str) -> Optional[Dict]:
+        """Buscar um usuário pelo nome. Retorna None se não existir."""
+
+    @abstractmethod
+    def add(self, username: str, password: str) -> None:
+        """Inserir um usuário. Lança ValueError se o nome já existir."""
+
+    @abstractmethod
+    def update_password(self, username: str, password: str) -> None:
+        """Substituir a senha (ou hash) armazenada de um usuário."""
+
+    @abstractmethod
+    def list(self) -> List[Dict]:
+        """Listar todos os usuários."""
+
+
+class SQLiteUserRepository(UserRepository):
+    """
+    Repositório de usuários em SQLite (WAL), indexado pelo nome de usuário.
+
+    A unicidade é garantida pela chave primária, e as escritas são serializadas por
+    um lock no processo e pelo lock de escrita do próprio SQLite entre processos.
+    Cada thread reaproveita a sua conexão (como o HistoryStore), em vez de abrir uma
+    por chamada.
+
+    Args:
+        path (str): Caminho do arquivo SQLite.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._iniciado = False
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão do thread atual, aberta no primeiro uso (e reaberta se o caminho mudar)."""
+        if not self._iniciado:
+            self.init()
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.path != self.path:
+            self.close()
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn, self._local.path = conn, self.path
+        return conn
+
+    def close(self) -> None:
+        """Fechar a conexão do thread atual, se aberta."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def init(self) -> None:
+        """Criar o arquivo e a tabela, se ainda não existirem."""
+        diretorio = os.path.dirname(self.path)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        self._iniciado = True
+
+    def get(self, username: str) -> Optional[Dict]:
+        conn = self._connect()
+        row = conn.execute("SELECT username, password FROM users WHERE username = ?", (username,)).fetchone()
+        return {"username": row[0], "password": row[1]} if row else None
+
+    def add(self, username: str, password: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
+            except sqlite3.IntegrityError:
+                raise ValueError("Usuário já existe.")
+
+    def update_password(self, username: str, password: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE users SET password = ? WHERE username = ?", (password, username))
+
+    def list(self) -> List[Dict]:
+        conn = self._connect()
+        return [{"username": u, "password": p} for u, p in conn.execute("SELECT username, password FROM users")]
+
+    def ensure_user(self, username: str, password: str) -> bool:
+        """
+        Inserir o usuário apenas se ainda não existir.
+
+        Returns:
+            bool: True se o usuário foi inserido.
+        """
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)", (username, password))
+            return cursor.rowcount > 0
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """
+        Importar os usuários de um ``users.json`` legado (lista de {username, password}).
+
+        A importação é idempotente: usuários já existentes são mantidos.
+
+        Args:
+            json_path (str): Caminho do arquivo JSON.
+
+        Returns:
+            int: Quantidade de usuários importados.
+        """
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                users = json.load(f)
+        except Exception as e:
+            logging.warning(f"[USUARIOS] Não foi possível ler {json_path} para migração: {e}")
+            return 0
+        importados = sum(
+            self.ensure_user(u["username"], u["password"])
+            for u in users if isinstance(u, dict) and "username" in u and "password" in u
+        )
+        if importados:
+            logging.info(f"[USUARIOS] {importados} usuário(s) migrado(s) de {json_path}")
+        return importados
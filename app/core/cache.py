@@ -0,0 +1,123 @@
+"""
+Cache em memória com expiração por tempo (TTL) e limite de tamanho (LRU).
+Utilizado para evitar requisições repetidas ao site da Embrapa.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+
+
+@dataclass
+class CacheEntry:
+    """
+    Entrada armazenada no cache.
+
+    Attributes:
+        value (Any): Valor armazenado.
+        stored_at (float): Instante (time.monotonic) em que o valor foi gravado.
+        fresh (bool): True se a entrada ainda está dentro do TTL.
+    """
+    value: Any
+    stored_at: float
+    fresh: bool = True
+
+
+class TTLCache:
+    """
+    Cache thread-safe com TTL e despejo LRU.
+
+    Entradas expiradas não são removidas na leitura: são devolvidas marcadas como
+    não frescas (``fresh=False``), permitindo ao chamador servir o valor antigo
+    enquanto revalida em segundo plano (stale-while-revalidate).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Buscar uma entrada no cache, atualizando sua posição LRU.
+
+        Args:
+            key (Hashable): Chave da entrada.
+
+        Returns:
+            CacheEntry | None: Entrada encontrada (fresca ou expirada) ou None.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            fresh = (time.monotonic() - entry.stored_at) < self.ttl_seconds
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return CacheEntry(value=entry.value, stored_at=entry.stored_at, fresh=fresh)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """
+        Ler o valor de uma entrada (fresca ou expirada) sem alterar contadores nem a posição LRU.
+
+        Args:
+            key (Hashable): Chave da entrada.
+
+        Returns:
+            Any | None: Valor armazenado ou None.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            return entry.value if entry is not None else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Gravar um valor no cache, despejando a entrada menos usada se necessário.
+
+        Args:
+            key (Hashable): Chave da entrada.
+            value (Any): Valor a armazenar.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = CacheEntry(value=value, stored_at=time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remover todas as entradas e zerar os contadores."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.stale_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retornar os contadores de uso do cache.
+
+        Returns:
+            dict: hits, stale_hits, misses, evictions e quantidade de entradas.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._data),
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,110 @@
+"""
+Circuit breaker para chamadas ao site da Embrapa.
+Após falhas consecutivas, interrompe as chamadas por um período de espera,
+permitindo o fallback imediato para o backup local.
+"""
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Exceção lançada quando o circuito está aberto e a chamada não é permitida."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com os estados fechado, aberto e semiaberto.
+
+    - closed: chamadas liberadas; falhas consecutivas são contadas.
+    - open: após ``failure_threshold`` falhas consecutivas, as chamadas são recusadas
+      durante ``cooldown_seconds``.
+    - half_open: terminada a espera, uma única chamada de teste é liberada. Sucesso
+      fecha o circuito; falha o reabre por mais um período de espera.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._state = CLOSED
+        self._falhas_consecutivas = 0
+        self._aberto_em: Optional[float] = None
+        self._teste_em_andamento = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Estado atual do circuito, considerando o fim do período de espera."""
+        if self._state == OPEN and self._aberto_em is not None:
+            if time.monotonic() - self._aberto_em >= self.cooldown_seconds:
+                self._state = HALF_OPEN
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Verificar se uma chamada ao site externo pode ser feita.
+
+        Returns:
+            bool: True se a chamada está liberada (incluindo a chamada de teste no estado semiaberto).
+        """
+        estado = self.state
+        if estado == CLOSED:
+            return True
+        if estado == HALF_OPEN and not self._teste_em_andamento:
+            self._teste_em_andamento = True
+            return True
+        self.rejected += 1
+        return False
+
+    def raise_if_open(self) -> None:
+        """
+        Recusar imediatamente se o circuito estiver aberto, sem consumir a chamada de teste
+        do estado semiaberto (que continua sendo obtida por ``allow_request``).
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto.
+        """
+        if self.state == OPEN:
+            self.rejected += 1
+            raise CircuitOpenError("Circuito aberto: site da Embrapa indisponível, raspagem não executada.")
+
+    def record_success(self) -> None:
+        """Registrar sucesso: fecha o circuito e zera as falhas consecutivas."""
+        self._state = CLOSED
+        self._falhas_consecutivas = 0
+        self._aberto_em = None
+        self._teste_em_andamento = False
+
+    def record_failure(self) -> None:
+        """Registrar falha: abre o circuito ao atingir o limite ou se a chamada de teste falhar."""
+        self._falhas_consecutivas += 1
+        if self._teste_em_andamento or self._falhas_consecutivas >= self.failure_threshold:
+            self._state = OPEN
+            self._aberto_em = time.monotonic()
+        self._teste_em_andamento = False
+
+    def reset(self) -> None:
+        """Voltar ao estado inicial (fechado, sem falhas)."""
+        self.record_success()
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retornar o estado do circuito para monitoramento.
+
+        Returns:
+            dict: state, consecutive_failures, rejected e retry_in_seconds (quando aberto).
+        """
+        estado = self.state
+        retry_in = None
+        if estado == OPEN and self._aberto_em is not None:
+            retry_in = round(max(0.0, self.cooldown_seconds - (time.monotonic() - self._aberto_em)), 1)
+        return {
+            "state": estado,
+            "consecutive_failures": self._falhas_consecutivas,
+            "rejected": self.rejected,
+            "retry_in_seconds": retry_in,
+        }
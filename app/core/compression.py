@@ -0,0 +1,179 @@
+"""
+Compressão negociada das respostas (brotli ou gzip), com tamanho mínimo.
+
+Brotli é usado quando o pacote ``brotli`` está instalado e o cliente o aceita; caso
+contrário, gzip. Respostas pequenas, já codificadas ou de tipos não compressíveis
+passam intactas. Respostas em streaming (ex.: NDJSON do /v1/lote) são comprimidas
+por bloco, com flush a cada bloco para o cliente continuar recebendo as linhas.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli é opcional
+    brotli = None
+
+TIPOS_COMPRESSIVEIS = ("text/", "application/json", "application/x-ndjson", "application/vnd.vitibrasil.")
+
+
+class _Gzip:
+    def __init__(self, nivel: int):
+        self._obj = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, dados: bytes, fim: bool) -> bytes:
+        return self._obj.compress(dados) + self._obj.flush(zlib.Z_FINISH if fim else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    def __init__(self, qualidade: int):
+        self._obj = brotli.Compressor(quality=qualidade)
+
+    def comprimir(self, dados: bytes, fim: bool) -> bytes:
+        saida = self._obj.process(dados)
+        return saida + (self._obj.finish() if fim else self._obj.flush())
+
+
+def escolher_codificacao(accept_encoding: str) -> Optional[str]:
+    """
+    Escolher a codificação pelo cabeçalho Accept-Encoding.
+
+    Args:
+        accept_encoding (str): Valor do cabeçalho.
+
+    Returns:
+        str | None: "br", "gzip" ou None se nenhuma for aceita.
+    """
+    aceitas = {}
+    for item in accept_encoding.split(","):
+        partes = [p.strip() for p in item.split(";")]
+        q = 1.0
+        for parametro in partes[1:]:
+            if parametro.startswith("q="):
+                try:
+                    q = float(parametro[2:])
+                except ValueError:
+                    q = 0.0
+        aceitas[partes[0].lower()] = q
+    coringa = aceitas.get("*", 0.0)
+    if brotli is not None and aceitas.get("br", coringa) > 0:
+        return "br"
+    if aceitas.get("gzip", coringa) > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compressão negociada.
+
+    Args:
+        app (ASGIApp): Aplicação.
+        minimum_size (int): Tamanho mínimo (bytes) do corpo para comprimir.
+        gzip_level (int): Nível do gzip (1-9).
+        brotli_quality (int): Qualidade do brotli (0-11).
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requisicao = Headers(scope=scope)
+        codificacao = escolher_codificacao(requisicao.get("accept-encoding", ""))
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+        await _Compressor(self, codificacao, send, requisicao.get("if-none-match", "")).executar(scope, receive)
+
+
+class _Compressor:
+    """Estado da compressão de uma resposta."""
+
+    def __init__(self, config: CompressionMiddleware, codificacao: str, send: Send, if_none_match: str = ""):
+        self.config = config
+        self.codificacao = codificacao
+        self.send = send
+        self.if_none_match = if_none_match
+        self.inicio: Optional[Message] = None
+        self.compressor = None
+        self.repassar = False
+
+    async def executar(self, scope: Scope, receive: Receive) -> None:
+        await self.config.app(scope, receive, self.enviar)
+
+    def _novo_compressor(self):
+        if self.codificacao == "br":
+            return _Brotli(self.config.brotli_quality)
+        return _Gzip(self.config.gzip_level)
+
+    def _ajustar_cabecalhos(self, tamanho: Optional[int]) -> None:
+        headers = MutableHeaders(raw=self.inicio["headers"])
+        headers["Content-Encoding"] = self.codificacao
+        headers.add_vary_header("Accept-Encoding")
+        if tamanho is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(tamanho)
+        # O corpo comprimido não é idêntico byte a byte: o ETag forte passa a fraco
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    def _ajustar_304(self, message: Message) -> None:
+        """
+        Alinhar o 304 à resposta comprimida que o cliente guardou.
+
+        O 304 não tem corpo para comprimir, mas a representação validada pode ter sido a
+        comprimida: nesse caso (If-None-Match com o ETag fraco) o ETag também passa a fraco.
+        """
+        headers = MutableHeaders(raw=message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        candidatos = [c.strip() for c in self.if_none_match.split(",")]
+        if etag and not etag.startswith("W/") and f"W/{etag}" in candidatos:
+            headers["ETag"] = f"W/{etag}"
+
+    async def enviar(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if message["status"] == 304 and "content-encoding" not in headers:
+                self._ajustar_304(message)
+            tipo = headers.get("content-type", "")
+            self.repassar = (
+                "content-encoding" in headers
+                or message["status"] < 200
+                or message["status"] in (204, 304)
+                or not tipo.startswith(TIPOS_COMPRESSIVEIS)
+            )
+            self.inicio = message
+            if self.repassar:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.repassar:
+            await self.send(message)
+            return
+
+        corpo = message.get("body", b"")
+        mais = message.get("more_body", False)
+        if self.compressor is None:
+            if not mais and len(corpo) < self.config.minimum_size:
+                self.repassar = True
+                await self.send(self.inicio)
+                await self.send(message)
+                return
+            self.compressor = self._novo_compressor()
+            comprimido = self.compressor.comprimir(corpo, fim=not mais)
+            self._ajustar_cabecalhos(None if mais else len(comprimido))
+            await self.send(self.inicio)
+        else:
+            comprimido = self.compressor.comprimir(corpo, fim=not mais)
+        await self.send({"type": "http.response.body", "body": comprimido, "more_body": mais})
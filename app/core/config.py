@@ -5,7 +5,7 @@ Carrega variáveis de ambiente e define settings globais.
 import os
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
-import logging
+from app.core.logs import iniciar_logging
 
 load_dotenv()
 
@@ -13,19 +13,77 @@ class Settings(BaseSettings):
     jwt_secret_key: str = os.getenv("JWT_SECRET_KEY", "supersecretkey")
     jwt_algorithm: str = os.getenv("JWT_ALGORITHM", "HS256")
     jwt_expire_minutes: int = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+    jwt_private_key_path: str = os.getenv("JWT_PRIVATE_KEY_PATH", "")
+    jwt_public_key_path: str = os.getenv("JWT_PUBLIC_KEY_PATH", "")
+    jwt_cache_max_entries: int = int(os.getenv("JWT_CACHE_MAX_ENTRIES", 4096))
     backup_path: str = os.getenv("BACKUP_PATH", "./data")
+    users_db_path: str = os.getenv("USERS_DB_PATH", "./data/users.sqlite3")
+    password_hash_cost: int = int(os.getenv("PASSWORD_HASH_COST", 14))
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    password_cache_ttl_seconds: int = int(os.getenv("PASSWORD_CACHE_TTL_SECONDS", 300))
+    history_db_path: str = os.getenv("HISTORY_DB_PATH", "./data/historico.sqlite3")
     log_path: str = os.getenv("LOG_PATH", "./logs/app.log")
+    log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_format: str = os.getenv("LOG_FORMAT", "json")
+    log_max_bytes: int = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    log_backup_count: int = int(os.getenv("LOG_BACKUP_COUNT", 5))
+    log_sample_rate: float = float(os.getenv("LOG_SAMPLE_RATE", 0.1))
+    embrapa_base_url: str = os.getenv("EMBRAPA_BASE_URL", "http://vitibrasil.cnpuv.embrapa.br")
+    upstream_timeout_seconds: float = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", 20))
+    upstream_max_connections: int = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 20))
+    upstream_max_keepalive: int = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", 10))
+    upstream_max_concurrency: int = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", 10))
+    upstream_max_queue: int = int(os.getenv("UPSTREAM_MAX_QUEUE", 50))
+    upstream_max_queue_wait_seconds: float = float(os.getenv("UPSTREAM_MAX_QUEUE_WAIT_SECONDS", 5))
+    rate_limit_enabled: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    rate_limit_per_minute: float = float(os.getenv("RATE_LIMIT_PER_MINUTE", 120))
+    rate_limit_burst: float = float(os.getenv("RATE_LIMIT_BURST", 30))
+    rate_limit_routes: str = os.getenv("RATE_LIMIT_ROUTES", "/v1/lote=6:2")
+    load_shedding_enabled: bool = os.getenv("LOAD_SHEDDING_ENABLED", "true").lower() == "true"
+    concurrency_limit_initial: int = int(os.getenv("CONCURRENCY_LIMIT_INITIAL", 64))
+    concurrency_limit_min: int = int(os.getenv("CONCURRENCY_LIMIT_MIN", 8))
+    concurrency_limit_max: int = int(os.getenv("CONCURRENCY_LIMIT_MAX", 256))
+    concurrency_latency_target_seconds: float = float(os.getenv("CONCURRENCY_LATENCY_TARGET_SECONDS", 2))
+    html_parser: str = os.getenv("HTML_PARSER", "lxml")
+    breaker_failure_threshold: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    breaker_cooldown_seconds: float = float(os.getenv("BREAKER_COOLDOWN_SECONDS", 30))
+    cache_control_closed_year_seconds: int = int(os.getenv("CACHE_CONTROL_CLOSED_YEAR_SECONDS", 86400))
+    cache_control_current_year_seconds: int = int(os.getenv("CACHE_CONTROL_CURRENT_YEAR_SECONDS", 300))
+    compression_min_size: int = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    compression_gzip_level: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+    compression_brotli_quality: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+    health_probe_interval_seconds: float = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", 30))
+    health_probe_timeout_seconds: float = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", 10))
+    refresh_enabled: bool = os.getenv("REFRESH_ENABLED", "false").lower() == "true"
+    refresh_data_path: str = os.getenv("REFRESH_DATA_PATH", "./data/atualizacao")
+    refresh_interval_seconds: float = float(os.getenv("REFRESH_INTERVAL_SECONDS", 21600))
+    refresh_initial_delay_seconds: float = float(os.getenv("REFRESH_INITIAL_DELAY_SECONDS", 60))
+    refresh_jitter_seconds: float = float(os.getenv("REFRESH_JITTER_SECONDS", 300))
+    refresh_recent_years: int = int(os.getenv("REFRESH_RECENT_YEARS", 3))
+    refresh_max_concurrency: int = int(os.getenv("REFRESH_MAX_CONCURRENCY", 2))
+    bulk_max_concurrency: int = int(os.getenv("BULK_MAX_CONCURRENCY", 8))
+    bulk_max_cells: int = int(os.getenv("BULK_MAX_CELLS", 300))
+    cache_ttl_seconds: int = int(os.getenv("CACHE_TTL_SECONDS", 3600))
+    cache_max_entries: int = int(os.getenv("CACHE_MAX_ENTRIES", 256))
+    cache_stale_while_revalidate: bool = os.getenv("CACHE_STALE_WHILE_REVALIDATE", "true").lower() == "true"
+    cache_backend: str = os.getenv("CACHE_BACKEND", "memory")
+    cache_sqlite_path: str = os.getenv("CACHE_SQLITE_PATH", "./data/cache.sqlite3")
+    redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    cache_lock_ttl_seconds: float = float(os.getenv("CACHE_LOCK_TTL_SECONDS", 30))
+    cache_lock_wait_seconds: float = float(os.getenv("CACHE_LOCK_WAIT_SECONDS", os.getenv("UPSTREAM_TIMEOUT_SECONDS", 20)))
 
 settings = Settings()
 
 def setup_logging():
-    """Configura logging para arquivo e console."""
-    os.makedirs(os.path.dirname(settings.log_path), exist_ok=True)
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s %(levelname)s [%(name)s] %(message)s',
-        handlers=[
-            logging.FileHandler(settings.log_path),
-            logging.StreamHandler()
-        ]
+    """
+    Configura o logging: fila em memória e escrita em segundo plano (arquivo rotacionado e
+    console), em linhas JSON ou texto, com amostragem das linhas por requisição.
+    """
+    iniciar_logging(
+        settings.log_path,
+        level=settings.log_level,
+        formato=settings.log_format,
+        max_bytes=settings.log_max_bytes,
+        backup_count=settings.log_backup_count,
+        taxa_amostragem=settings.log_sample_rate,
     )
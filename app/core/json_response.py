@@ -0,0 +1,39 @@
+"""
+Serialização JSON rápida para as respostas da API.
+
+Usa orjson quando instalado (com fallback para o json da biblioteca padrão). Os corpos
+já serializados das rotas de dados são devolvidos pelo próprio router (ver
+routers.dados._responder_dados), com o media type negociado.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+def dumps(conteudo: Any) -> bytes:
+    """
+    Serializar um objeto em JSON (UTF-8, sem espaços).
+
+    Args:
+        conteudo (Any): Objeto serializável (dict, list, str, números, None).
+
+    Returns:
+        bytes: JSON codificado em UTF-8.
+    """
+    if orjson is not None:
+        return orjson.dumps(conteudo)
+    return json.dumps(conteudo, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Resposta JSON serializada com orjson (ou json, se orjson não estiver instalado)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
@@ -0,0 +1,131 @@
+"""
+Descarte de carga com limite de concorrência adaptativo.
+
+O limite de requisições simultâneas se ajusta pela latência até o início da resposta
+(AIMD): cada requisição abaixo da latência alvo aumenta o limite em 1/limite; acima
+dela, o limite cai 10%. Requisições que chegam com o limite atingido recebem 503
+imediato com Retry-After, em vez de esperar na fila e esgotar os workers.
+"""
+import threading
+import time
+from typing import Dict, Sequence
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.json_response import dumps
+from app.core.metrics import rejected_requests_total
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite de concorrência AIMD.
+
+    Args:
+        inicial (float): Limite inicial.
+        minimo (float): Limite mínimo.
+        maximo (float): Limite máximo.
+        latencia_alvo (float): Latência (segundos) acima da qual o limite diminui.
+        fator_reducao (float): Fator aplicado ao limite a cada requisição lenta.
+    """
+
+    def __init__(self, inicial: float, minimo: float, maximo: float, latencia_alvo: float, fator_reducao: float = 0.9):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.limite = max(minimo, min(maximo, inicial))
+        self.latencia_alvo = latencia_alvo
+        self.fator_reducao = fator_reducao
+        self.em_andamento = 0
+        self.rejeitadas = 0
+        self._lock = threading.Lock()
+
+    def adquirir(self) -> bool:
+        """Admitir uma requisição se houver vaga no limite atual."""
+        with self._lock:
+            if self.em_andamento >= int(self.limite):
+                self.rejeitadas += 1
+                return False
+            self.em_andamento += 1
+            return True
+
+    def liberar(self, latencia: float) -> None:
+        """Concluir uma requisição admitida, ajustando o limite pela latência."""
+        with self._lock:
+            self.em_andamento -= 1
+            if latencia > self.latencia_alvo:
+                self.limite = max(self.minimo, self.limite * self.fator_reducao)
+            else:
+                self.limite = min(self.maximo, self.limite + 1 / self.limite)
+
+    def stats(self) -> Dict:
+        """
+        Retornar o estado do limitador.
+
+        Returns:
+            dict: limite atual, em_andamento, rejeitadas e latencia_alvo.
+        """
+        return {
+            "limite": round(self.limite, 1),
+            "em_andamento": self.em_andamento,
+            "rejeitadas": self.rejeitadas,
+            "latencia_alvo": self.latencia_alvo,
+        }
+
+
+concurrency_limiter = AdaptiveConcurrencyLimiter(
+    settings.concurrency_limit_initial,
+    settings.concurrency_limit_min,
+    settings.concurrency_limit_max,
+    settings.concurrency_latency_target_seconds,
+)
+
+
+class LoadSheddingMiddleware:
+    """
+    Middleware ASGI que aplica o AdaptiveConcurrencyLimiter às rotas com os prefixos informados.
+
+    Args:
+        app (ASGIApp): Aplicação.
+        limiter (AdaptiveConcurrencyLimiter): Limitador compartilhado.
+        prefixos (sequence of str): Prefixos de caminho limitados (ex.: "/v1/").
+        retry_after (int): Valor do Retry-After (segundos) das respostas 503.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: AdaptiveConcurrencyLimiter, prefixos: Sequence[str] = ("/v1/",), retry_after: int = 1):
+        self.app = app
+        self.limiter = limiter
+        self.prefixos = tuple(prefixos)
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixos):
+            await self.app(scope, receive, send)
+            return
+        if not self.limiter.adquirir():
+            rejected_requests_total.inc("sobrecarga")
+            corpo = dumps({"detail": "Serviço sobrecarregado. Tente novamente em instantes."})
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(corpo)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": corpo})
+            return
+        inicio = time.perf_counter()
+        latencia = None
+
+        async def enviar(message: Message) -> None:
+            nonlocal latencia
+            if message["type"] == "http.response.start":
+                latencia = time.perf_counter() - inicio
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            # Latência até o início da resposta: o streaming longo do /v1/lote não reduz o limite
+            self.limiter.liberar(latencia if latencia is not None else time.perf_counter() - inicio)
@@ -0,0 +1,135 @@
+"""
+Pipeline de logging sem bloqueio no caminho das requisições.
+
+- Os registros são apenas enfileirados (QueueHandler) no thread que loga; a formatação
+  da mensagem e a escrita em disco/console acontecem no thread do QueueListener.
+- Saída em linhas JSON (ou texto), com rotação do arquivo por tamanho.
+- Linhas de alto volume por requisição são marcadas com ``extra=AMOSTRADO`` e gravadas
+  apenas em uma fração (LOG_SAMPLE_RATE); avisos e erros nunca são descartados.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+# Marca de linha de alto volume (por requisição), sujeita à amostragem
+AMOSTRADO = {"amostrado": True}
+
+FORMATO_TEXTO = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+# Atributos padrão do LogRecord; os demais vieram de ``extra`` e entram no JSON
+_ATRIBUTOS_PADRAO = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "amostrado"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatar cada registro como uma linha JSON (ts, level, logger, msg, campos extras e exc)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        linha = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                linha[chave] = valor
+        if record.exc_info:
+            linha["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            linha["exc"] = record.exc_text
+        return json.dumps(linha, ensure_ascii=False, default=str)
+
+
+class AmostragemFilter(logging.Filter):
+    """
+    Descartar parte dos registros marcados com AMOSTRADO.
+
+    Args:
+        taxa (float): Fração mantida (0 a 1). Registros acima de INFO são sempre mantidos.
+    """
+
+    def __init__(self, taxa: float):
+        super().__init__()
+        self.taxa = max(0.0, min(1.0, taxa))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not getattr(record, "amostrado", False):
+            return True
+        return self.taxa >= 1.0 or random.random() < self.taxa
+
+
+class _LazyQueueHandler(QueueHandler):
+    """QueueHandler que não formata no thread de origem: a mensagem é montada no listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def iniciar_logging(
+    path: str,
+    level: str = "INFO",
+    formato: str = "json",
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    taxa_amostragem: float = 1.0,
+) -> QueueListener:
+    """
+    Configurar o logger raiz com fila e escrita em segundo plano.
+
+    Pode ser chamada novamente (ex.: em testes): a configuração anterior é encerrada.
+
+    Args:
+        path (str): Arquivo de log (rotacionado ao atingir ``max_bytes``).
+        level (str): Nível mínimo (DEBUG, INFO, WARNING...).
+        formato (str): "json" (uma linha JSON por registro) ou "texto".
+        max_bytes (int): Tamanho máximo do arquivo antes da rotação.
+        backup_count (int): Arquivos rotacionados mantidos.
+        taxa_amostragem (float): Fração das linhas marcadas com AMOSTRADO que são gravadas.
+
+    Returns:
+        QueueListener: Listener em execução.
+    """
+    global _listener, _queue_handler
+    encerrar_logging()
+    diretorio = os.path.dirname(path)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    formatter = JsonFormatter() if formato.lower() == "json" else logging.Formatter(FORMATO_TEXTO)
+    destinos = [RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"), logging.StreamHandler()]
+    for handler in destinos:
+        handler.setFormatter(formatter)
+
+    fila: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _LazyQueueHandler(fila)
+    _queue_handler.addFilter(AmostragemFilter(taxa_amostragem))
+    raiz = logging.getLogger()
+    raiz.setLevel(level.upper())
+    raiz.addHandler(_queue_handler)
+    _listener = QueueListener(fila, *destinos, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def encerrar_logging() -> None:
+    """Esvaziar a fila, parar o listener e fechar os arquivos de log."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(encerrar_logging)
@@ -0,0 +1,269 @@
+"""
+Métricas no formato de exposição de texto do Prometheus (version 0.0.4).
+
+Implementação mínima, sem dependências: contadores e histogramas com rótulos,
+registrados em ``registry`` e expostos em ``/metrics``.
+
+Métricas da aplicação:
+
+- vitibrasil_http_request_duration_seconds{method, route, status}: latência por rota (template, ex.: /v1/producao).
+- vitibrasil_upstream_request_duration_seconds{resource}: requisição HTTP ao site da Embrapa.
+- vitibrasil_parse_duration_seconds{resource, parser}: extração da tabela HTML e conversão numérica.
+- vitibrasil_serialization_duration_seconds{media}: serialização das respostas de dados.
+- vitibrasil_data_source_total{resource, origem}: origem das respostas de dados (cache, stale, online, local);
+  a taxa de fallback de um recurso é origem="local" sobre o total.
+- vitibrasil_scrape_failures_total{resource, exception}: falhas de raspagem por tipo de exceção.
+- vitibrasil_rejected_requests_total{motivo}: requisições recusadas (rate_limit, sobrecarga) e
+  raspagens descartadas com a fila do site cheia (upstream_fila).
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica(ABC):
+    tipo = ""
+
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+
+    def _chave(self, valores: Sequence[str]) -> Tuple[str, ...]:
+        if len(valores) != len(self.rotulos):
+            raise ValueError(f"{self.nome}: esperados os rótulos {self.rotulos}, recebidos {tuple(valores)}")
+        return tuple(str(v) for v in valores)
+
+    @abstractmethod
+    def _amostras(self) -> List[str]:
+        """Linhas de amostra da métrica no formato de texto."""
+
+    def expor(self) -> str:
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas.extend(self._amostras())
+        return "\n".join(linhas)
+
+
+class Counter(_Metrica):
+    """
+    Contador monotônico com rótulos.
+
+    Args:
+        nome (str): Nome da métrica (sufixo _total por convenção).
+        descricao (str): Texto do HELP.
+        rotulos (sequence of str): Nomes dos rótulos.
+    """
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str] = ()):
+        super().__init__(nome, descricao, rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *valores: str, quantidade: float = 1) -> None:
+        """Incrementar o contador da combinação de rótulos informada."""
+        chave = self._chave(valores)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + quantidade
+
+    def valor(self, *valores: str) -> float:
+        """Valor atual da combinação de rótulos (0 se nunca incrementada)."""
+        return self._valores.get(self._chave(valores), 0)
+
+    def _amostras(self) -> List[str]:
+        with self._lock:
+            itens = sorted(self._valores.items())
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos, k)} {_formatar_numero(v)}" for k, v in itens]
+
+
+class Histogram(_Metrica):
+    """
+    Histograma cumulativo com rótulos.
+
+    Args:
+        nome (str): Nome da métrica (sufixo _seconds por convenção).
+        descricao (str): Texto do HELP.
+        rotulos (sequence of str): Nomes dos rótulos.
+        buckets (sequence of float): Limites superiores dos buckets, em ordem crescente.
+    """
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_PADRAO):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(buckets)
+        # Por combinação de rótulos: [contagem por bucket (não cumulativa, + Inf), soma, contagem]
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, segundos: float, *valores: str) -> None:
+        """Registrar uma observação para a combinação de rótulos informada."""
+        chave = self._chave(valores)
+        indice = bisect_left(self.buckets, segundos)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += segundos
+            serie[2] += 1
+
+    @contextmanager
+    def time(self, *valores: str) -> Iterator[None]:
+        """Medir a duração do bloco ``with`` (registrada também se o bloco lançar exceção)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, *valores)
+
+    def contagem(self, *valores: str) -> int:
+        """Quantidade de observações da combinação de rótulos."""
+        serie = self._series.get(self._chave(valores))
+        return serie[2] if serie else 0
+
+    def _amostras(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, ([*s[0]], s[1], s[2])) for k, s in self._series.items())
+        linhas = []
+        for chave, (contagens, soma, total) in series:
+            acumulado = 0
+            for limite, quantidade in zip((*self.buckets, math.inf), contagens):
+                acumulado += quantidade
+                le = f'le="{_formatar_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, le)} {acumulado}")
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_numero(soma)}")
+            linhas.append(f"{self.nome}_count{rotulos} {total}")
+        return linhas
+
+
+class Registry:
+    """Conjunto de métricas expostas em /metrics."""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+
+    def register(self, metrica: _Metrica) -> _Metrica:
+        """Registrar uma métrica (nomes duplicados são rejeitados)."""
+        if metrica.nome in self._metricas:
+            raise ValueError(f"Métrica já registrada: {metrica.nome}")
+        self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def expor(self) -> bytes:
+        """
+        Montar o corpo do /metrics.
+
+        Returns:
+            bytes: Todas as métricas no formato de texto do Prometheus.
+        """
+        return ("\n".join(m.expor() for m in self._metricas.values()) + "\n").encode("utf-8")
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "vitibrasil_http_request_duration_seconds",
+    "Latência das requisições HTTP por rota.",
+    ("method", "route", "status"),
+))
+upstream_request_duration = registry.register(Histogram(
+    "vitibrasil_upstream_request_duration_seconds",
+    "Duração das requisições HTTP ao site da Embrapa.",
+    ("resource",),
+))
+parse_duration = registry.register(Histogram(
+    "vitibrasil_parse_duration_seconds",
+    "Duração da extração da tabela HTML e da conversão numérica.",
+    ("resource", "parser"),
+))
+serialization_duration = registry.register(Histogram(
+    "vitibrasil_serialization_duration_seconds",
+    "Duração da serialização das respostas de dados.",
+    ("media",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+))
+data_source_total = registry.register(Counter(
+    "vitibrasil_data_source_total",
+    "Respostas de dados por recurso e origem (cache, stale, online, local).",
+    ("resource", "origem"),
+))
+scrape_failures_total = registry.register(Counter(
+    "vitibrasil_scrape_failures_total",
+    "Falhas de raspagem do site da Embrapa por tipo de exceção.",
+    ("resource", "exception"),
+))
+
+rejected_requests_total = registry.register(Counter(
+    "vitibrasil_rejected_requests_total",
+    "Requisições recusadas por limite de uso ou sobrecarga.",
+    ("motivo",),
+))
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede a latência de cada requisição HTTP.
+
+    A rota é o template (ex.: /v1/producao), não o caminho requisitado, para manter a
+    cardinalidade limitada; requisições sem rota correspondente usam "nao_encontrada".
+
+    Args:
+        app (ASGIApp): Aplicação.
+        excluir (sequence of str): Caminhos não medidos (ex.: o próprio /metrics).
+    """
+
+    def __init__(self, app: ASGIApp, excluir: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.excluir = frozenset(excluir)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluir:
+            await self.app(scope, receive, send)
+            return
+        inicio = time.perf_counter()
+        status: Optional[int] = None
+
+        async def enviar(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            rota = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - inicio,
+                scope["method"],
+                getattr(rota, "path", "nao_encontrada"),
+                str(status or 500),
+            )
@@ -0,0 +1,125 @@
+"""
+Hash e verificação de senhas com scrypt (KDF da biblioteca padrão).
+
+O cálculo do hash é deliberadamente caro, por isso as funções assíncronas o executam
+em um pool de threads limitado (o scrypt libera o GIL), sem bloquear o event loop.
+Formato armazenado: ``scrypt$<log2 N>$<r>$<p>$<salt base64>$<hash base64>``.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+PREFIXO = "scrypt"
+_BLOCO_R = 8
+_PARALELISMO_P = 1
+_TAMANHO_SALT = 16
+_TAMANHO_HASH = 32
+
+_executor: Optional[ThreadPoolExecutor] = None
+# Verificações bem-sucedidas recentes: chave HMAC(hash armazenado + senha) com segredo do processo
+_verificacoes = TTLCache(max_entries=1024, ttl_seconds=settings.password_cache_ttl_seconds)
+_segredo_cache = secrets.token_bytes(32)
+
+
+def _derivar(password: str, salt: bytes, custo: int, r: int, p: int) -> bytes:
+    n = 2 ** custo
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p, dklen=_TAMANHO_HASH, maxmem=256 * n * r + 1024 * 1024,
+    )
+
+
+def hash_password(password: str, custo: Optional[int] = None) -> str:
+    """
+    Gerar o hash de uma senha.
+
+    Args:
+        password (str): Senha em texto.
+        custo (int, opcional): log2 do fator N do scrypt. Padrão: PASSWORD_HASH_COST.
+
+    Returns:
+        str: Hash no formato ``scrypt$...``.
+    """
+    custo = custo or settings.password_hash_cost
+    salt = os.urandom(_TAMANHO_SALT)
+    digest = _derivar(password, salt, custo, _BLOCO_R, _PARALELISMO_P)
+    b64 = lambda b: base64.b64encode(b).decode("ascii")
+    return f"{PREFIXO}${custo}${_BLOCO_R}${_PARALELISMO_P}${b64(salt)}${b64(digest)}"
+
+
+def verify_password(password: str, armazenado: str) -> Tuple[bool, bool]:
+    """
+    Verificar uma senha contra o valor armazenado.
+
+    Valores que não estão no formato ``scrypt$...`` são senhas legadas em texto puro
+    (usuários migrados de users.json) e são comparados em tempo constante.
+
+    Args:
+        password (str): Senha informada.
+        armazenado (str): Hash (ou senha legada) armazenado.
+
+    Returns:
+        tuple: (válida, precisa_atualizar). ``precisa_atualizar`` indica que a senha é
+        válida mas está em texto puro ou com custo diferente de PASSWORD_HASH_COST.
+    """
+    if not armazenado.startswith(PREFIXO + "$"):
+        valida = hmac.compare_digest(password.encode("utf-8"), armazenado.encode("utf-8"))
+        return valida, valida
+    try:
+        _, custo, r, p, salt, digest = armazenado.split("$")
+        custo, r, p = int(custo), int(r), int(p)
+        esperado = base64.b64decode(salt), base64.b64decode(digest)
+    except ValueError:
+        return False, False
+    valida = hmac.compare_digest(_derivar(password, esperado[0], custo, r, p), esperado[1])
+    return valida, valida and custo != settings.password_hash_cost
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="senhas")
+    return _executor
+
+
+async def hash_password_async(password: str, custo: Optional[int] = None) -> str:
+    """Gerar o hash de uma senha no pool de hashing (ver hash_password)."""
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), hash_password, password, custo)
+
+
+async def verify_password_async(password: str, armazenado: str) -> Tuple[bool, bool]:
+    """
+    Verificar uma senha no pool de hashing (ver verify_password).
+
+    Verificações bem-sucedidas ficam em cache por PASSWORD_CACHE_TTL_SECONDS, de modo
+    que logins repetidos com a mesma credencial não recalculam o KDF. A chave do cache
+    é um HMAC com segredo do processo, nunca a senha.
+    """
+    chave = hmac.new(_segredo_cache, f"{armazenado}\0{password}".encode("utf-8"), hashlib.sha256).digest()
+    entrada = _verificacoes.get(chave)
+    if entrada is not None and entrada.fresh:
+        return entrada.value
+    resultado = await asyncio.get_running_loop().run_in_executor(_get_executor(), verify_password, password, armazenado)
+    if resultado[0]:
+        _verificacoes.set(chave, resultado)
+    return resultado
+
+
+def clear_verification_cache() -> None:
+    """Esvaziar o cache de verificações bem-sucedidas."""
+    _verificacoes.clear()
+
+
+def shutdown_executor() -> None:
+    """Encerrar o pool de hashing (recriado no próximo uso)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
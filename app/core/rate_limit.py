@@ -0,0 +1,146 @@
+"""
+Limite de requisições por usuário (token bucket), com cotas por rota.
+
+Cada combinação (usuário do JWT, rota) tem um balde com ``rajada`` fichas, reposto a
+``por_minuto`` fichas por minuto. Sem fichas, a requisição recebe 429 com Retry-After.
+As cotas por rota vêm de RATE_LIMIT_ROUTES (ex.: "/v1/lote=6:2"); as demais rotas usam
+RATE_LIMIT_PER_MINUTE e RATE_LIMIT_BURST.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request
+
+from app.core.config import settings
+from app.core.metrics import rejected_requests_total
+from app.core.security import verify_token
+
+Cota = Tuple[float, float]
+
+
+def parse_cotas(texto: str) -> Dict[str, Cota]:
+    """
+    Interpretar RATE_LIMIT_ROUTES.
+
+    Args:
+        texto (str): Lista "rota=por_minuto:rajada" separada por vírgulas
+            (ex.: "/v1/lote=6:2,/v1/{recurso}/variacao=30:10"). A rajada é opcional.
+
+    Returns:
+        dict: Cota (por_minuto, rajada) por template de rota.
+
+    Raises:
+        ValueError: Se algum item estiver mal formado.
+    """
+    cotas = {}
+    for item in filter(None, (p.strip() for p in texto.split(","))):
+        try:
+            rota, valores = item.split("=", 1)
+            por_minuto, _, rajada = valores.partition(":")
+            cotas[rota.strip()] = (float(por_minuto), float(rajada or por_minuto))
+        except ValueError:
+            raise ValueError(f"RATE_LIMIT_ROUTES inválido: {item!r}. Formato: rota=por_minuto:rajada")
+    return cotas
+
+
+class RateLimiter:
+    """
+    Token buckets por (usuário, rota), em memória.
+
+    Args:
+        por_minuto (float): Reposição padrão de fichas por minuto.
+        rajada (float): Capacidade padrão do balde.
+        cotas (dict, opcional): Cotas (por_minuto, rajada) por template de rota.
+        max_baldes (int): Baldes mantidos (os usados há mais tempo são descartados).
+    """
+
+    def __init__(self, por_minuto: float, rajada: float, cotas: Optional[Dict[str, Cota]] = None, max_baldes: int = 10000):
+        self.padrao = (por_minuto, rajada)
+        self.cotas = cotas or {}
+        self.max_baldes = max_baldes
+        self._baldes: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejeitadas = 0
+
+    def cota(self, rota: str) -> Cota:
+        """Cota (por_minuto, rajada) da rota."""
+        return self.cotas.get(rota, self.padrao)
+
+    def consumir(self, usuario: str, rota: str) -> float:
+        """
+        Consumir uma ficha do balde de (usuário, rota).
+
+        Returns:
+            float: 0 se a requisição foi admitida; caso contrário, segundos até haver uma ficha.
+        """
+        por_minuto, rajada = self.cota(rota)
+        taxa = por_minuto / 60
+        agora = time.monotonic()
+        chave = (usuario, rota)
+        with self._lock:
+            balde = self._baldes.get(chave)
+            if balde is None:
+                balde = self._baldes[chave] = [rajada, agora]
+                if len(self._baldes) > self.max_baldes:
+                    self._baldes.popitem(last=False)
+            else:
+                self._baldes.move_to_end(chave)
+                balde[0] = min(rajada, balde[0] + (agora - balde[1]) * taxa)
+                balde[1] = agora
+            if balde[0] >= 1:
+                balde[0] -= 1
+                return 0.0
+            self.rejeitadas += 1
+            return (1 - balde[0]) / taxa if taxa > 0 else 60.0
+
+    def reset(self) -> None:
+        """Esvaziar todos os baldes (todos os usuários voltam à rajada completa)."""
+        with self._lock:
+            self._baldes.clear()
+            self.rejeitadas = 0
+
+    def stats(self) -> Dict:
+        """
+        Retornar o estado do limitador.
+
+        Returns:
+            dict: Cota padrão, cotas por rota, baldes ativos e requisições rejeitadas.
+        """
+        return {
+            "por_minuto": self.padrao[0],
+            "rajada": self.padrao[1],
+            "cotas_por_rota": {rota: {"por_minuto": p, "rajada": r} for rota, (p, r) in self.cotas.items()},
+            "baldes": len(self._baldes),
+            "rejeitadas": self.rejeitadas,
+        }
+
+
+rate_limiter = RateLimiter(
+    settings.rate_limit_per_minute, settings.rate_limit_burst, parse_cotas(settings.rate_limit_routes)
+)
+
+
+async def limitar_requisicao(request: Request, user: dict = Depends(verify_token)) -> None:
+    """
+    Dependência FastAPI: aplicar o limite do usuário autenticado na rota atual.
+
+    O token é validado uma única vez por requisição (o FastAPI reaproveita o verify_token
+    das rotas).
+
+    Raises:
+        HTTPException: 429 com Retry-After se a cota da rota estiver esgotada.
+    """
+    if not settings.rate_limit_enabled:
+        return
+    rota = getattr(request.scope.get("route"), "path", request.url.path)
+    espera = rate_limiter.consumir(str(user.get("sub")), rota)
+    if espera > 0:
+        rejected_requests_total.inc("rate_limit")
+        raise HTTPException(
+            status_code=429,
+            detail="Limite de requisições excedido para esta rota. Tente novamente mais tarde.",
+            headers={"Retry-After": str(math.ceil(espera))},
+        )
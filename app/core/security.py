@@ -1,16 +1,65 @@
 """
 Módulo de segurança JWT.
 Geração e validação de tokens.
+
+Algoritmos HS* usam o segredo compartilhado JWT_SECRET_KEY. Algoritmos assimétricos
+(RS*/ES*) assinam com a chave privada (JWT_PRIVATE_KEY_PATH, necessária apenas no nó
+que emite tokens) e validam com a chave pública (JWT_PUBLIC_KEY_PATH), carregada uma vez.
 """
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 OAUTH2_SCHEME = OAuth2PasswordBearer(tokenUrl="/v1/auth/login")
 
+# Tokens já validados (sha256 do token -> claims); a expiração de cada token é conferida na leitura
+token_cache = TTLCache(max_entries=settings.jwt_cache_max_entries, ttl_seconds=settings.jwt_expire_minutes * 60)
+
+
+def _assimetrico() -> bool:
+    return not settings.jwt_algorithm.upper().startswith("HS")
+
+
+def _ler_chave(caminho: str, variavel: str) -> str:
+    if not caminho:
+        raise RuntimeError(f"{variavel} não configurada para o algoritmo {settings.jwt_algorithm}.")
+    with open(caminho, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=1)
+def _chave_assinatura() -> str:
+    if _assimetrico():
+        return _ler_chave(settings.jwt_private_key_path, "JWT_PRIVATE_KEY_PATH")
+    return settings.jwt_secret_key
+
+
+@lru_cache(maxsize=1)
+def _chave_verificacao() -> str:
+    if _assimetrico():
+        return _ler_chave(settings.jwt_public_key_path, "JWT_PUBLIC_KEY_PATH")
+    return settings.jwt_secret_key
+
+
+def load_verification_key() -> None:
+    """Carregar a chave de verificação (pública, nos modos assimétricos), falhando cedo se ausente."""
+    _chave_verificacao()
+
+
+def reset_security_state() -> None:
+    """Descartar as chaves carregadas e o cache de tokens validados (ex.: após trocar chaves)."""
+    _chave_assinatura.cache_clear()
+    _chave_verificacao.cache_clear()
+    token_cache.clear()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Gerar token JWT para autenticação.
@@ -21,38 +70,31 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
     Returns:
         str: Token JWT gerado.
-    """
-    """
-    Gera um token JWT.
 
-    Args:
-        data (dict): Dados do payload.
-        expires_delta (timedelta, optional): Tempo de expiração.
-
-    Returns:
-        str: Token JWT.
+    Raises:
+        RuntimeError: Se o algoritmo for assimétrico e a chave privada não estiver configurada.
     """
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.jwt_expire_minutes))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    encoded_jwt = jwt.encode(to_encode, _chave_assinatura(), algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
-def verify_token(token: str = Depends(OAUTH2_SCHEME)) -> dict:
-    """
-    Validar o token JWT recebido.
 
-    Args:
-        token (str): Token JWT.
+def _token_invalido() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token inválido ou expirado.",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
-    Returns:
-        dict: Payload decodificado.
 
-    Raises:
-        HTTPException: Se o token for inválido ou expirado.
-    """
+def verify_token(token: str = Depends(OAUTH2_SCHEME)) -> dict:
     """
-    Valida o token JWT recebido.
+    Validar o token JWT recebido.
+
+    Tokens já validados são servidos do cache (chave: sha256 do token) até o seu
+    ``exp``, sem repetir a decodificação e a verificação da assinatura.
 
     Args:
         token (str): Token JWT.
@@ -61,31 +103,27 @@ def verify_token(token: str = Depends(OAUTH2_SCHEME)) -> dict:
         dict: Payload decodificado.
 
     Raises:
-        HTTPException: Se token inválido ou expirado.
+        HTTPException: Se o token for inválido ou expirado.
     """
+    chave = hashlib.sha256(token.encode("utf-8")).digest()
+    entrada = token_cache.get(chave)
+    if entrada is not None and entrada.fresh:
+        payload: Dict = entrada.value
+        if payload.get("exp") is None or payload["exp"] > time.time():
+            return dict(payload)
+        raise _token_invalido()
     try:
-        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        return payload
+        payload = jwt.decode(token, _chave_verificacao(), algorithms=[settings.jwt_algorithm])
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido ou expirado.",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _token_invalido()
+    token_cache.set(chave, payload)
+    return dict(payload)
+
 
 def get_current_user(token: str = Depends(OAUTH2_SCHEME)) -> dict:
     """
     Obter usuário atual a partir do token JWT.
 
-    Args:
-        token (str): Token JWT.
-
-    Returns:
-        dict: Payload do usuário autenticado.
-    """
-    """
-    Obtém o usuário atual a partir do token JWT.
-
     Args:
         token (str): Token JWT.
 
@@ -0,0 +1,162 @@
+"""
+Cache compartilhado entre processos (workers do uvicorn, réplicas).
+
+Define a interface dos backends e o ``SharedFlight``: consulta o valor no backend e,
+na ausência, apenas um processo o calcula (sob um lock com expiração no próprio
+backend) enquanto os demais aguardam o resultado gravado.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class CacheBackendError(Exception):
+    """Falha de comunicação com o backend de cache compartilhado."""
+
+
+class CacheBackend(ABC):
+    """Interface dos backends de cache compartilhado (chaves str, valores bytes)."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Ler um valor; None se ausente ou expirado."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        """Gravar um valor com expiração."""
+
+    @abstractmethod
+    async def acquire_lock(self, key: str, token: str, ttl_seconds: float) -> bool:
+        """Obter o lock ``key`` para ``token`` se estiver livre (ou expirado)."""
+
+    @abstractmethod
+    async def release_lock(self, key: str, token: str) -> None:
+        """Liberar o lock, apenas se ainda pertencer a ``token``."""
+
+    async def close(self) -> None:
+        """Liberar conexões."""
+
+
+class SharedFlight:
+    """
+    Deduplicação de cálculos entre processos através de um CacheBackend.
+
+    Args:
+        backend (CacheBackend): Backend compartilhado.
+        ttl_seconds (float): Validade dos valores gravados.
+        lock_ttl_seconds (float): Expiração do lock (protege contra um processo que morre com o lock).
+        wait_seconds (float): Tempo máximo aguardando outro processo antes de calcular localmente
+            (próximo do timeout do cálculo; acima dele o outro processo provavelmente falhou).
+        poll_seconds (float): Intervalo entre consultas enquanto aguarda.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl_seconds: float,
+        lock_ttl_seconds: float = 30,
+        wait_seconds: float = 20,
+        poll_seconds: float = 0.1,
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.errors = 0
+
+    async def _chamar(self, coro: Awaitable[Any]) -> Any:
+        """Executar uma operação do backend, convertendo falhas em CacheBackendError."""
+        try:
+            return await coro
+        except Exception as e:
+            raise CacheBackendError(str(e) or type(e).__name__) from e
+
+    async def _ler(self, key: str) -> Optional[Any]:
+        valor = await self._chamar(self.backend.get(key))
+        return json.loads(valor) if valor is not None else None
+
+    async def _calcular_com_lock(self, key: str, token: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            valor = await self._ler(key)
+            if valor is not None:
+                return valor
+            valor = await fn()
+            try:
+                await self._chamar(self.backend.set(key, json.dumps(valor, ensure_ascii=False).encode("utf-8"), self.ttl_seconds))
+            except CacheBackendError as e:
+                self.errors += 1
+                logging.warning(f"[CACHE COMPARTILHADO] Falha ao gravar {key}: {e}")
+            return valor
+        finally:
+            try:
+                await self._chamar(self.backend.release_lock(f"{key}:lock", token))
+            except CacheBackendError:
+                pass  # o lock expira sozinho
+
+    async def do(
+        self, key: str, fn: Callable[[], Awaitable[Any]], verificar: Optional[Callable[[], None]] = None
+    ) -> Any:
+        """
+        Obter o valor de ``key`` do backend ou calculá-lo com ``fn`` (uma vez entre os processos).
+
+        Falhas do backend não impedem a resposta: o valor é calculado localmente. Exceções
+        de ``fn`` são propagadas.
+
+        Args:
+            key (str): Chave do valor.
+            fn (callable): Fábrica assíncrona do valor (serializável em JSON).
+            verificar (callable, opcional): Chamado antes de aguardar o lock e a cada consulta
+                durante a espera; a exceção que lançar é propagada, interrompendo a espera
+                (ex.: circuit breaker local aberto, para servir o fallback sem aguardar outro processo).
+
+        Returns:
+            Any: Valor compartilhado ou recém-calculado.
+        """
+        try:
+            valor = await self._ler(key)
+            if valor is not None:
+                self.hits += 1
+                return valor
+            self.misses += 1
+            if verificar is not None:
+                verificar()
+            token = uuid.uuid4().hex
+            limite = time.monotonic() + self.wait_seconds
+            aguardando = False
+            while not await self._chamar(self.backend.acquire_lock(f"{key}:lock", token, self.lock_ttl_seconds)):
+                # Outro processo está calculando: aguarda o valor ser gravado
+                if time.monotonic() >= limite:
+                    logging.warning(f"[CACHE COMPARTILHADO] Tempo de espera esgotado para {key}; calculando localmente")
+                    break
+                if not aguardando:
+                    aguardando = True
+                    self.waits += 1
+                await asyncio.sleep(self.poll_seconds)
+                if verificar is not None:
+                    verificar()
+                valor = await self._ler(key)
+                if valor is not None:
+                    return valor
+            else:
+                return await self._calcular_com_lock(key, token, fn)
+        except CacheBackendError as e:
+            self.errors += 1
+            logging.warning(f"[CACHE COMPARTILHADO] Backend indisponível ({e}); calculando localmente")
+        return await fn()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retornar os contadores do cache compartilhado.
+
+        Returns:
+            dict: hits, misses, waits (esperas por outro processo) e errors (falhas do backend).
+        """
+        return {"hits": self.hits, "misses": self.misses, "waits": self.waits, "errors": self.errors}
@@ -0,0 +1,70 @@
+"""
+Coalescência de requisições concorrentes (single-flight).
+Chamadas simultâneas com a mesma chave aguardam uma única execução em andamento.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Deduplicar execuções assíncronas concorrentes por chave.
+
+    A primeira chamada para uma chave inicia a execução em uma tarefa própria; as
+    chamadas seguintes, enquanto ela estiver em andamento, aguardam o mesmo resultado
+    (ou a mesma exceção). O cancelamento de um chamador não cancela a execução
+    compartilhada.
+    """
+
+    def __init__(self):
+        self._em_voo: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Executar ``fn`` para a chave ou aguardar a execução já em andamento.
+
+        Args:
+            key (Hashable): Chave de deduplicação.
+            fn (Callable): Função assíncrona sem argumentos a executar.
+
+        Returns:
+            Any: Resultado da execução compartilhada.
+        """
+        tarefa = self._em_voo.get(key)
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(fn())
+            self._em_voo[key] = tarefa
+            tarefa.add_done_callback(lambda t: self._liberar(key, t))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(tarefa)
+
+    def _liberar(self, key: Hashable, tarefa: asyncio.Future) -> None:
+        if self._em_voo.get(key) is tarefa:
+            del self._em_voo[key]
+
+    def in_flight(self) -> int:
+        """Quantidade de execuções em andamento."""
+        return len(self._em_voo)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retornar os contadores de coalescência.
+
+        Returns:
+            dict: executions (execuções reais), coalesced (chamadas que reaproveitaram
+            uma execução em andamento) e in_flight.
+        """
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight(),
+        }
+
+    def reset(self) -> None:
+        """Zerar os contadores (as execuções em andamento são mantidas)."""
+        self.executions = 0
+        self.coalesced = 0
@@ -1,17 +1,52 @@
 """
 Módulo principal da API Vitibrasil.
-Instancia o FastAPI, inclui routers, configura logs e CORS.
+Instancia o FastAPI, inclui routers, configura logs, CORS e compressão.
 """
 
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings, setup_logging
-from app.routers import router_dados, router_auth, router_utils
+from app.core.logs import encerrar_logging
+from app.routers import router_dados, router_auth, router_utils, router_agregacoes
+from app.adapters.http_client import close_client
+from app.core.passwords import shutdown_executor
+from app.core.compression import CompressionMiddleware
+from app.core.json_response import FastJSONResponse
+from app.core.load_shedding import LoadSheddingMiddleware, concurrency_limiter
+from app.core.metrics import MetricsMiddleware
+from app.core.security import load_verification_key
+from app.services.refresh import start_refresh_worker, stop_refresh_worker
+from app.services.scraping import close_shared_cache
+from app.services.utils import start_site_probe, stop_site_probe
 
-setup_logging()
 
-app = FastAPI(title="Vitibrasil API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida da aplicação: configura os logs, carrega a chave de verificação JWT e
+    inicia a sonda do site da Embrapa e a atualização periódica na inicialização; no
+    encerramento, para as tarefas em segundo plano, libera o pool de conexões HTTP, o cache
+    compartilhado e o pool de hashing e esvazia a fila de logs.
+
+    Nada disso roda na importação do módulo: importar app.main não toca o sistema de
+    arquivos (ver benchmarks/bench_inicializacao.py).
+    """
+    setup_logging()
+    load_verification_key()
+    start_site_probe()
+    start_refresh_worker()
+    yield
+    await stop_refresh_worker()
+    await stop_site_probe()
+    await close_client()
+    await close_shared_cache()
+    shutdown_executor()
+    encerrar_logging()
+
+
+app = FastAPI(title="Vitibrasil API", version="1.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,7 +55,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
+if settings.load_shedding_enabled:
+    app.add_middleware(LoadSheddingMiddleware, limiter=concurrency_limiter)
+# Mais externo: a latência medida inclui a compressão e o CORS
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(router_dados)
+app.include_router(router_agregacoes)
 app.include_router(router_auth)
 app.include_router(router_utils)
@@ -1,4 +1,4 @@
-from typing import List, Any
+from typing import Dict, List, Any, Optional, Union
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -10,14 +10,17 @@ class DataResponse(BaseModel):
         fonte (str): Origem dos dados ('online' ou 'local').
         timestamp (datetime): Data/hora da resposta.
         ano (int): Ano efetivamente filtrado/retornado.
-        valor_total (str): Valor total extraído da tabela.
+        valor_total (str | int | float): Valor total extraído da tabela (numérico com ?formato=numerico).
         dados (List[Any]): Lista de registros extraídos.
+        paginacao (dict, opcional): Com filtros/paginação/projeção: total de linhas selecionadas,
+            offset, limit e proximo_cursor (None na última página).
     """
     fonte: str
     timestamp: datetime
     ano: int
-    valor_total: str
+    valor_total: Union[str, int, float]
     dados: List[Any]
+    paginacao: Optional[Dict[str, Any]] = None
 
     class Config:
         json_schema_extra = {
@@ -1,6 +1,7 @@
 from .dados import router_dados
 from .auth import router_auth
 from .health import router_utils
+from .agregacoes import router_agregacoes
 
-__all__ = ["router_dados", "router_auth", "router_utils"]
+__all__ = ["router_dados", "router_auth", "router_utils", "router_agregacoes"]
 
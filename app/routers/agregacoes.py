@@ -0,0 +1,122 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.services.agregacoes import obter_categorias, obter_top, obter_variacao
+from app.core.rate_limit import limitar_requisicao
+from app.core.security import verify_token
+
+router_agregacoes = APIRouter(prefix="/v1", tags=["Agregações"], dependencies=[Depends(limitar_requisicao)])
+
+Recurso = Literal["producao", "processamento", "comercializacao", "importacao", "exportacao"]
+
+
+@router_agregacoes.get(
+    "/{recurso}/categorias",
+    summary="Obter totais por categoria",
+    description=(
+        "**Retornar os totais por categoria (ex.: VINHO DE MESA) com seus subitens (Tinto, Branco, Rosado).**  \n\n"
+        "A hierarquia é montada no servidor a partir da ordem das linhas e dos nomes em maiúsculas das categorias.\n\n"
+        "**Parâmetros:**\n"
+        "- `recurso` (str): producao, processamento ou comercializacao.\n"
+        "- `ano` (str, opcional): Ano de referência. Padrão conforme o recurso.\n"
+        "- `user` (dict): Usuário autenticado (extraído do JWT).\n\n"
+        "**Respostas de erro:**\n"
+        "- 400: Recurso sem hierarquia (importacao/exportacao)."
+    )
+)
+async def categorias(
+    recurso: Recurso,
+    ano: str = Query(default=None, description="Ano de referência. Padrão conforme o recurso."),
+    user: dict = Depends(verify_token)
+):
+    """
+    Retornar os totais por categoria do recurso no ano.
+
+    Args:
+        recurso (str): Nome do recurso.
+        ano (str, opcional): Ano de referência.
+        user (dict): Usuário autenticado (extraído do JWT).
+
+    Returns:
+        dict: Categorias com total e subitens.
+    """
+    try:
+        return await obter_categorias(recurso, ano)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router_agregacoes.get(
+    "/{recurso}/top",
+    summary="Obter os maiores produtos, categorias ou países",
+    description=(
+        "**Retornar os N maiores itens do ano, com a participação percentual no total.**  \n\n"
+        "Para produção, processamento e comercialização a métrica é `Quantidade (L.)`; "
+        "para importação e exportação, `Valor (US$)`.\n\n"
+        "**Parâmetros:**\n"
+        "- `recurso` (str): Nome do recurso.\n"
+        "- `ano` (str, opcional): Ano de referência. Padrão conforme o recurso.\n"
+        "- `n` (int): Quantidade de itens (1 a 100). Padrão: 10.\n"
+        "- `nivel` (str): `item` (produtos/países) ou `categoria`. Padrão: item.\n"
+        "- `user` (dict): Usuário autenticado (extraído do JWT)."
+    )
+)
+async def top(
+    recurso: Recurso,
+    ano: str = Query(default=None, description="Ano de referência. Padrão conforme o recurso."),
+    n: int = Query(default=10, ge=1, le=100, description="Quantidade de itens."),
+    nivel: Literal["item", "categoria"] = Query(default="item", description="Agrupar por item ou por categoria."),
+    user: dict = Depends(verify_token)
+):
+    """
+    Retornar os N maiores itens ou categorias do recurso no ano.
+
+    Args:
+        recurso (str): Nome do recurso.
+        ano (str, opcional): Ano de referência.
+        n (int): Quantidade de itens.
+        nivel (str): "item" ou "categoria".
+        user (dict): Usuário autenticado (extraído do JWT).
+
+    Returns:
+        dict: Itens ordenados por valor decrescente.
+    """
+    return await obter_top(recurso, ano, n, nivel)
+
+
+@router_agregacoes.get(
+    "/{recurso}/variacao",
+    summary="Obter a variação ano a ano",
+    description=(
+        "**Retornar a série anual do total e de cada categoria, com a variação em relação ao ano anterior.**  \n\n"
+        "Os anos são buscados em paralelo e reaproveitam o cache. Anos sem dados próprios aparecem em `anos_indisponiveis`.\n\n"
+        "**Parâmetros:**\n"
+        "- `recurso` (str): Nome do recurso.\n"
+        "- `ano_inicio` (int): Ano inicial (inclusive).\n"
+        "- `ano_fim` (int): Ano final (inclusive).\n"
+        "- `user` (dict): Usuário autenticado (extraído do JWT).\n\n"
+        "**Respostas de erro:**\n"
+        "- 400: Intervalo inválido."
+    )
+)
+async def variacao(
+    recurso: Recurso,
+    ano_inicio: int = Query(..., description="Ano inicial (inclusive). Ex.: 2015"),
+    ano_fim: int = Query(..., description="Ano final (inclusive). Ex.: 2023"),
+    user: dict = Depends(verify_token)
+):
+    """
+    Retornar a variação ano a ano do recurso no intervalo.
+
+    Args:
+        recurso (str): Nome do recurso.
+        ano_inicio (int): Ano inicial (inclusive).
+        ano_fim (int): Ano final (inclusive).
+        user (dict): Usuário autenticado (extraído do JWT).
+
+    Returns:
+        dict: Série anual com totais e variações.
+    """
+    try:
+        return await obter_variacao(recurso, ano_inicio, ano_fim)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
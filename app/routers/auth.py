@@ -23,7 +23,7 @@ router_auth = APIRouter(prefix="/v1/auth", tags=["Autenticação"])
         "- 400: Usuário já existe."
     )
 )
-def cadastrar_usuario(user: UserCreate):
+async def cadastrar_usuario(user: UserCreate):
     """
     Cadastrar novo usuário na base persistente.
 
@@ -37,7 +37,7 @@ def cadastrar_usuario(user: UserCreate):
         HTTPException: Se o usuário já existir.
     """
     try:
-        add_user(user.username, user.password)
+        await add_user(user.username, user.password)
         return {"username": user.username}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -58,9 +58,9 @@ def cadastrar_usuario(user: UserCreate):
         "- 401: Credenciais inválidas."
     )
 )
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Autentica usuário e retorna JWT."""
-    if not authenticate_user(form_data.username, form_data.password):
+    if not await authenticate_user(form_data.username, form_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário ou senha inválidos",
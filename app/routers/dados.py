@@ -1,13 +1,147 @@
-from fastapi import APIRouter, Depends, Query
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from app.models.data import DataResponse
-from app.services.scraping import get_resource_data
+from app.adapters.hierarquia import colunas_tabela
+from app.services.scraping import get_resource_payload
+from app.services.consulta import Consulta
+from app.services.bulk import montar_celulas, iterar_lote
+from app.services.formatos import (
+    MEDIA_COLUNAR, MEDIA_CSV, MEDIA_NDJSON, REPRESENTACOES_DADOS, REPRESENTACOES_LOTE, negociar, para_csv,
+)
+from app.core.config import settings
+from app.core.json_response import dumps
+from app.core.metrics import serialization_duration
+from app.core.rate_limit import limitar_requisicao
 from app.core.security import verify_token
 
-router_dados = APIRouter(prefix="/v1", tags=["Dados da Vitivinicultura"])
+router_dados = APIRouter(
+    prefix="/v1", tags=["Dados da Vitivinicultura"], dependencies=[Depends(limitar_requisicao)]
+)
+
+FORMATO_QUERY = Query(
+    default="texto",
+    description="Formato dos valores: 'texto' (como no site, ex.: \"1.234\") ou 'numerico' (int/float nativos, '-' vira null)."
+)
+
+IF_NONE_MATCH_HEADER = Header(
+    default=None,
+    description="ETag de uma resposta anterior. Se o conteúdo não mudou, a API responde 304 sem corpo."
+)
+
+ACCEPT_HEADER = Header(
+    default=None,
+    description=(
+        "Representação desejada: application/json (padrão), text/csv (apenas as linhas) ou "
+        f"{MEDIA_COLUNAR} (dados como {{coluna: [valores]}})."
+    )
+)
+
+RESPOSTAS_DADOS = {
+    200: {
+        "description": "Dados no formato negociado pelo cabeçalho Accept.",
+        "content": {MEDIA_CSV: {"schema": {"type": "string"}}, MEDIA_COLUNAR: {"schema": {"type": "object"}}},
+    },
+    304: {"description": "Conteúdo inalterado em relação ao ETag enviado em If-None-Match."},
+}
+
+TIPOS_CONTEUDO = {MEDIA_CSV: "text/csv; charset=utf-8"}
+
+
+def parametros_consulta(
+    nome: Optional[str] = Query(
+        default=None, description="Filtrar por país/produto (sem diferenciar acentos e maiúsculas). Ex.: ?nome=ale"
+    ),
+    busca: Literal["prefixo", "exato"] = Query(default="prefixo", description="Comparação do filtro `nome`."),
+    sem_vazios: bool = Query(default=False, description="Descartar linhas sem nenhum valor numérico (\"-\")."),
+    metrica: Optional[str] = Query(
+        default=None,
+        description="Coluna de `min`/`max`/`ordenar`: quantidade ou valor. Padrão: valor (importação/exportação) ou quantidade."
+    ),
+    minimo: Optional[float] = Query(default=None, alias="min", description="Valor mínimo (inclusive) da métrica."),
+    maximo: Optional[float] = Query(default=None, alias="max", description="Valor máximo (inclusive) da métrica."),
+    ordenar: Optional[Literal["asc", "desc"]] = Query(
+        default=None, description="Ordenar pela métrica (linhas sem valor ao final). Padrão: ordem do site."
+    ),
+    limit: Optional[int] = Query(default=None, ge=1, le=10000, description="Quantidade máxima de linhas."),
+    offset: int = Query(default=0, ge=0, description="Linhas ignoradas no início."),
+    cursor: Optional[str] = Query(default=None, description="Cursor da próxima página (`paginacao.proximo_cursor`)."),
+    fields: Optional[str] = Query(
+        default=None, description="Colunas devolvidas, separadas por vírgula (nome, quantidade, valor ou o nome da coluna)."
+    ),
+) -> Optional[Consulta]:
+    """
+    Montar a consulta a partir dos parâmetros de filtro, ordenação, paginação e projeção.
+
+    Returns:
+        Consulta | None: None se nenhum parâmetro foi informado (resposta completa, já serializada no cache).
+    """
+    consulta = Consulta(
+        nome=nome,
+        nome_exato=busca == "exato",
+        sem_vazios=sem_vazios,
+        metrica=metrica,
+        minimo=minimo,
+        maximo=maximo,
+        ordem=ordenar,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        fields=tuple(c.strip() for c in fields.split(",") if c.strip()) if fields else None,
+    )
+    # `busca` sozinha (sem `nome`) não altera a resposta
+    if consulta == Consulta(nome_exato=consulta.nome_exato):
+        return None
+    return consulta
+
+
+def _etag_corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    """Verificar o cabeçalho If-None-Match (lista de ETags ou "*", comparação fraca)."""
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidatos or etag in (c[2:] if c.startswith("W/") else c for c in candidatos)
+
+
+async def _responder_dados(
+    resource: str,
+    ano: Optional[str],
+    formato: str,
+    if_none_match: Optional[str],
+    accept: Optional[str],
+    consulta: Optional[Consulta] = None,
+) -> Response:
+    """
+    Responder com o corpo já serializado do (recurso, ano), ou 304 se o ETag do cliente ainda vale.
+
+    Args:
+        resource (str): Nome do recurso.
+        ano (str, opcional): Ano de referência.
+        formato (str): Formato dos valores ("texto" ou "numerico").
+        if_none_match (str, opcional): Cabeçalho If-None-Match da requisição.
+        accept (str, opcional): Cabeçalho Accept (JSON, CSV ou JSON colunar).
+        consulta (Consulta, opcional): Filtros, ordenação, paginação e projeção das linhas.
+
+    Returns:
+        Response: 200 com a representação negociada ou 304 sem corpo, ambos com ETag e Cache-Control.
+
+    Raises:
+        HTTPException: 400 se a consulta tiver campo, métrica ou cursor inválidos.
+    """
+    media = negociar(accept, REPRESENTACOES_DADOS)
+    try:
+        resposta = await get_resource_payload(resource, ano, formato, media, consulta)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"ETag": resposta["etag"], "Cache-Control": resposta["cache_control"], "Vary": "Accept"}
+    if _etag_corresponde(if_none_match, resposta["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(resposta["corpo"], media_type=TIPOS_CONTEUDO.get(media, media), headers=headers)
 
 @router_dados.get(
     "/producao",
     response_model=DataResponse,
+    responses=RESPOSTAS_DADOS,
     summary="Obter dados de produção de vinhos, sucos e derivados",
     description=(
         "**Retornar dados de produção de vinhos, sucos e derivados do Rio Grande do Sul.**  \n\n"
@@ -15,13 +149,22 @@ router_dados = APIRouter(prefix="/v1", tags=["Dados da Vitivinicultura"])
         "Caso a requisição principal falhe (timeout, 404 ou 500), utiliza fallback local em `producao.json`, retornando as informações do ano padrão configurado.\n\n"
         "**Parâmetros:**\n"
         "- `ano` (str, opcional): Ano de referência. Padrão: 2023.\n"
+        "- `formato` (str, opcional): `texto` (padrão, valores como no site) ou `numerico` (números nativos).\n"
+        "- `nome`/`busca`, `sem_vazios`, `metrica`, `min`/`max`, `ordenar`, `limit`/`offset`/`cursor` e `fields` (opcionais): "
+        "filtros, ordenação, paginação e projeção das linhas, avaliados sobre um índice do ano (ver `paginacao` na resposta).\n"
         "- `user` (dict): Usuário autenticado (extraído do JWT).\n\n"
         "**Retorno:**\n"
+        "- 304: Conteúdo inalterado em relação ao ETag enviado em `If-None-Match`.\n"
+        "- Com `Accept: text/csv` ou `Accept: application/vnd.vitibrasil.colunar+json`, CSV ou JSON colunar.\n"
         "- `DataResponse`: Dados de produção, ano efetivo, valor total e metadados."
     )
 )
-def producao(
+async def producao(
     ano: str = Query(default=None, description="Ano entre 1970 e 2023. Padrão: 2023"),
+    formato: Literal["texto", "numerico"] = FORMATO_QUERY,
+    if_none_match: Optional[str] = IF_NONE_MATCH_HEADER,
+    accept: Optional[str] = ACCEPT_HEADER,
+    consulta: Optional[Consulta] = Depends(parametros_consulta),
     user: dict = Depends(verify_token)
 ):
     """
@@ -30,16 +173,21 @@ def producao(
 
     Args:
         ano (str, opcional): Ano de referência. Padrão: 2023.
+        formato (str): Formato dos valores ("texto" ou "numerico").
+        if_none_match (str, opcional): ETag de uma resposta anterior.
+        accept (str, opcional): Representação desejada (JSON, CSV ou JSON colunar).
+        consulta (Consulta, opcional): Filtros, ordenação, paginação e projeção das linhas.
         user (dict): Usuário autenticado (extraído do JWT).
 
     Returns:
         DataResponse: Dados de produção, ano efetivo, valor total e metadados.
     """
-    return get_resource_data("producao", ano)
+    return await _responder_dados("producao", ano, formato, if_none_match, accept, consulta)
 
 @router_dados.get(
     "/processamento",
     response_model=DataResponse,
+    responses=RESPOSTAS_DADOS,
     summary="Obter dados de processamento de uvas",
     description=(
         "**Retornar dados de processamento de quantidade de uvas processadas no Rio Grande do Sul.**  \n"
@@ -48,13 +196,22 @@ def producao(
         "Caso a requisição principal falhe (timeout, 404 ou 500), utiliza fallback local em `processamento.json`, retornando as informações do ano padrão configurado.\n\n"
         "**Parâmetros:**\n"
         "- `ano` (str, opcional): Ano de referência. Padrão: 2023.\n"
+        "- `formato` (str, opcional): `texto` (padrão, valores como no site) ou `numerico` (números nativos).\n"
+        "- `nome`/`busca`, `sem_vazios`, `metrica`, `min`/`max`, `ordenar`, `limit`/`offset`/`cursor` e `fields` (opcionais): "
+        "filtros, ordenação, paginação e projeção das linhas, avaliados sobre um índice do ano (ver `paginacao` na resposta).\n"
         "- `user` (dict): Usuário autenticado (extraído do JWT).\n\n"
         "**Retorno:**\n"
+        "- 304: Conteúdo inalterado em relação ao ETag enviado em `If-None-Match`.\n"
+        "- Com `Accept: text/csv` ou `Accept: application/vnd.vitibrasil.colunar+json`, CSV ou JSON colunar.\n"
         "- `DataResponse`: Dados de processamento, ano efetivo, valor total e metadados."
     )
 )
-def processamento(
+async def processamento(
     ano: str = Query(default=None, description="Ano entre 1970 e 2023. Padrão: 2023"),
+    formato: Literal["texto", "numerico"] = FORMATO_QUERY,
+    if_none_match: Optional[str] = IF_NONE_MATCH_HEADER,
+    accept: Optional[str] = ACCEPT_HEADER,
+    consulta: Optional[Consulta] = Depends(parametros_consulta),
     user: dict = Depends(verify_token)
 ):
     """
@@ -63,16 +220,21 @@ def processamento(
 
     Args:
         ano (str, opcional): Ano de referência. Padrão: 2023.
+        formato (str): Formato dos valores ("texto" ou "numerico").
+        if_none_match (str, opcional): ETag de uma resposta anterior.
+        accept (str, opcional): Representação desejada (JSON, CSV ou JSON colunar).
+        consulta (Consulta, opcional): Filtros, ordenação, paginação e projeção das linhas.
         user (dict): Usuário autenticado (extraído do JWT).
 
     Returns:
         DataResponse: Dados de processamento, ano efetivo, valor total e metadados.
     """
-    return get_resource_data("processamento", ano)
+    return await _responder_dados("processamento", ano, formato, if_none_match, accept, consulta)
 
 @router_dados.get(
     "/comercializacao",
     response_model=DataResponse,
+    responses=RESPOSTAS_DADOS,
     summary="Obter dados de comercialização de vinhos",
     description=(
         "**Retornar dados de comercialização de vinhos e derivados no Rio Grande do Sul.**  \n\n"
@@ -80,13 +242,22 @@ def processamento(
         "Caso a requisição principal falhe (timeout, 404 ou 500), utiliza fallback local em `comercializacao.json`, retornando as informações do ano padrão configurado.\n\n"
         "**Parâmetros:**\n"
         "- `ano` (str, opcional): Ano de referência. Padrão: 2023.\n"
+        "- `formato` (str, opcional): `texto` (padrão, valores como no site) ou `numerico` (números nativos).\n"
+        "- `nome`/`busca`, `sem_vazios`, `metrica`, `min`/`max`, `ordenar`, `limit`/`offset`/`cursor` e `fields` (opcionais): "
+        "filtros, ordenação, paginação e projeção das linhas, avaliados sobre um índice do ano (ver `paginacao` na resposta).\n"
         "- `user` (dict): Usuário autenticado (extraído do JWT).\n\n"
         "**Retorno:**\n"
+        "- 304: Conteúdo inalterado em relação ao ETag enviado em `If-None-Match`.\n"
+        "- Com `Accept: text/csv` ou `Accept: application/vnd.vitibrasil.colunar+json`, CSV ou JSON colunar.\n"
         "- `DataResponse`: Dados de comercialização, ano efetivo, valor total e metadados."
     )
 )
-def comercializacao(
+async def comercializacao(
     ano: str = Query(default=None, description="Ano entre 1970 e 2023. Padrão: 2023"),
+    formato: Literal["texto", "numerico"] = FORMATO_QUERY,
+    if_none_match: Optional[str] = IF_NONE_MATCH_HEADER,
+    accept: Optional[str] = ACCEPT_HEADER,
+    consulta: Optional[Consulta] = Depends(parametros_consulta),
     user: dict = Depends(verify_token)
 ):
     """
@@ -95,16 +266,21 @@ def comercializacao(
 
     Args:
         ano (str, opcional): Ano de referência. Padrão: 2023.
+        formato (str): Formato dos valores ("texto" ou "numerico").
+        if_none_match (str, opcional): ETag de uma resposta anterior.
+        accept (str, opcional): Representação desejada (JSON, CSV ou JSON colunar).
+        consulta (Consulta, opcional): Filtros, ordenação, paginação e projeção das linhas.
         user (dict): Usuário autenticado (extraído do JWT).
 
     Returns:
         DataResponse: Dados de comercialização, ano efetivo, valor total e metadados.
     """
-    return get_resource_data("comercializacao", ano)
+    return await _responder_dados("comercializacao", ano, formato, if_none_match, accept, consulta)
 
 @router_dados.get(
     "/importacao",
     response_model=DataResponse,
+    responses=RESPOSTAS_DADOS,
     summary="Obter dados de importação de derivados de uva",
     description=(
         "**Retornar dados de importação de derivados de uva.**  \n"
@@ -113,13 +289,22 @@ def comercializacao(
         "Caso a requisição principal falhe (timeout, 404 ou 500), utiliza fallback local em `importacao.json`, retornando as informações do ano padrão configurado.\n\n"
         "**Parâmetros:**\n"
         "- `ano` (str, opcional): Ano de referência. Padrão: 2024.\n"
+        "- `formato` (str, opcional): `texto` (padrão, valores como no site) ou `numerico` (números nativos).\n"
+        "- `nome`/`busca`, `sem_vazios`, `metrica`, `min`/`max`, `ordenar`, `limit`/`offset`/`cursor` e `fields` (opcionais): "
+        "filtros, ordenação, paginação e projeção das linhas, avaliados sobre um índice do ano (ver `paginacao` na resposta).\n"
         "- `user` (dict): Usuário autenticado (extraído do JWT).\n\n"
         "**Retorno:**\n"
+        "- 304: Conteúdo inalterado em relação ao ETag enviado em `If-None-Match`.\n"
+        "- Com `Accept: text/csv` ou `Accept: application/vnd.vitibrasil.colunar+json`, CSV ou JSON colunar.\n"
         "- `DataResponse`: Dados de importação, ano efetivo, valor total e metadados."
     )
 )
-def importacao(
+async def importacao(
     ano: str = Query(default=None, description="Ano entre 1970 e 2024. Padrão: 2024"),
+    formato: Literal["texto", "numerico"] = FORMATO_QUERY,
+    if_none_match: Optional[str] = IF_NONE_MATCH_HEADER,
+    accept: Optional[str] = ACCEPT_HEADER,
+    consulta: Optional[Consulta] = Depends(parametros_consulta),
     user: dict = Depends(verify_token)
 ):
     """
@@ -130,11 +315,12 @@ def importacao(
     Returns:
         DataResponse: Dados de importação, ano efetivo, valor total e metadados.
     """
-    return get_resource_data("importacao", ano)
+    return await _responder_dados("importacao", ano, formato, if_none_match, accept, consulta)
 
 @router_dados.get(
     "/exportacao",
     response_model=DataResponse,
+    responses=RESPOSTAS_DADOS,
     summary="Obter dados de exportação de derivados de uva",
     description=(
         "**Retornar dados de exportação de derivados de uva.**  \n"
@@ -143,13 +329,22 @@ def importacao(
         "Caso a requisição principal falhe (timeout, 404 ou 500), utiliza fallback local em `exportacao.json`, retornando as informações do ano padrão configurado.\n\n"
         "**Parâmetros:**\n"
         "- `ano` (str, opcional): Ano de referência. Padrão: 2024.\n"
+        "- `formato` (str, opcional): `texto` (padrão, valores como no site) ou `numerico` (números nativos).\n"
+        "- `nome`/`busca`, `sem_vazios`, `metrica`, `min`/`max`, `ordenar`, `limit`/`offset`/`cursor` e `fields` (opcionais): "
+        "filtros, ordenação, paginação e projeção das linhas, avaliados sobre um índice do ano (ver `paginacao` na resposta).\n"
         "- `user` (dict): Usuário autenticado (extraído do JWT).\n\n"
         "**Retorno:**\n"
+        "- 304: Conteúdo inalterado em relação ao ETag enviado em `If-None-Match`.\n"
+        "- Com `Accept: text/csv` ou `Accept: application/vnd.vitibrasil.colunar+json`, CSV ou JSON colunar.\n"
         "- `DataResponse`: Dados de exportação, ano efetivo, valor total e metadados."
     )
 )
-def exportacao(
+async def exportacao(
     ano: str = Query(default=None, description="Ano entre 1970 e 2024. Padrão: 2024"),
+    formato: Literal["texto", "numerico"] = FORMATO_QUERY,
+    if_none_match: Optional[str] = IF_NONE_MATCH_HEADER,
+    accept: Optional[str] = ACCEPT_HEADER,
+    consulta: Optional[Consulta] = Depends(parametros_consulta),
     user: dict = Depends(verify_token)
 ):
     """
@@ -160,4 +355,87 @@ def exportacao(
     Returns:
         DataResponse: Dados de exportação, ano efetivo, valor total e metadados.
     """
-    return get_resource_data("exportacao", ano)
+    return await _responder_dados("exportacao", ano, formato, if_none_match, accept, consulta)
+
+@router_dados.get(
+    "/lote",
+    summary="Obter vários recursos e anos em uma única requisição",
+    response_class=StreamingResponse,
+    responses={200: {"content": {MEDIA_NDJSON: {}, MEDIA_CSV: {"schema": {"type": "string"}}}}},
+    description=(
+        "**Consulta em lote de recursos e anos (séries históricas).**  \n\n"
+        "Busca em paralelo, com concorrência limitada, todas as combinações de recurso e ano do intervalo, "
+        "reaproveitando o cache. Os resultados são enviados em streaming (NDJSON, um JSON por linha) "
+        "conforme cada combinação fica pronta, portanto **fora de ordem**.\n\n"
+        "Com `Accept: text/csv`, as linhas de todas as combinações saem em um único CSV, "
+        "com as colunas `recurso`, `ano`, `fonte`, as colunas dos recursos e `erro`.\n\n"
+        "O intervalo é recortado ao período disponível de cada recurso.\n\n"
+        "**Parâmetros:**\n"
+        "- `recursos` (list of str): Recursos desejados (producao, processamento, comercializacao, importacao, exportacao). Pode ser repetido.\n"
+        "- `ano_inicio` (int): Ano inicial (inclusive).\n"
+        "- `ano_fim` (int): Ano final (inclusive).\n"
+        "- `formato` (str, opcional): `texto` (padrão) ou `numerico`.\n"
+        "- `user` (dict): Usuário autenticado (extraído do JWT).\n\n"
+        "**Retorno:**\n"
+        "- Linhas `DataResponse` acrescidas de `recurso`; falhas de uma combinação vêm como `{recurso, ano, erro}`.\n\n"
+        "**Respostas de erro:**\n"
+        "- 400: Recurso inválido, intervalo vazio ou combinações acima do limite."
+    )
+)
+async def lote(
+    recursos: List[str] = Query(..., description="Recursos desejados. Ex.: ?recursos=exportacao&recursos=importacao"),
+    ano_inicio: int = Query(..., description="Ano inicial (inclusive). Ex.: 1970"),
+    ano_fim: int = Query(..., description="Ano final (inclusive). Ex.: 2024"),
+    formato: Literal["texto", "numerico"] = FORMATO_QUERY,
+    accept: Optional[str] = Header(default=None, description="application/x-ndjson (padrão) ou text/csv."),
+    user: dict = Depends(verify_token)
+):
+    """
+    Retornar em streaming os dados de vários recursos e anos.
+
+    Args:
+        recursos (list of str): Recursos desejados.
+        ano_inicio (int): Ano inicial (inclusive).
+        ano_fim (int): Ano final (inclusive).
+        formato (str): Formato dos valores ("texto" ou "numerico").
+        accept (str, opcional): Representação desejada (NDJSON ou CSV).
+        user (dict): Usuário autenticado (extraído do JWT).
+
+    Returns:
+        StreamingResponse: Linhas NDJSON, uma por combinação (recurso, ano), ou CSV com uma linha por linha de dados.
+
+    Raises:
+        HTTPException: 400 se os parâmetros forem inválidos.
+    """
+    try:
+        celulas = montar_celulas(recursos, ano_inicio, ano_fim)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(celulas) > settings.bulk_max_cells:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Consulta com {len(celulas)} combinações excede o limite de {settings.bulk_max_cells}."
+        )
+
+    if negociar(accept, REPRESENTACOES_LOTE) == MEDIA_CSV:
+        colunas_dados = list(dict.fromkeys(c for resource, _ in celulas for c in colunas_tabela(resource)))
+        colunas = ["recurso", "ano", "fonte", *colunas_dados, "erro"]
+
+        async def gerar_csv():
+            yield para_csv([], colunas)
+            async for item in iterar_lote(celulas, settings.bulk_max_concurrency, formato):
+                meta = {"recurso": item["recurso"], "ano": item["ano"], "fonte": item.get("fonte"), "erro": item.get("erro")}
+                linhas = [{**meta, **linha} for linha in item.get("dados", [])] or [meta]
+                with serialization_duration.time(MEDIA_CSV):
+                    bloco = para_csv(linhas, colunas, cabecalho=False)
+                yield bloco
+
+        return StreamingResponse(gerar_csv(), media_type="text/csv; charset=utf-8")
+
+    async def gerar():
+        async for item in iterar_lote(celulas, settings.bulk_max_concurrency, formato):
+            with serialization_duration.time(MEDIA_NDJSON):
+                linha = dumps(item) + b"\n"
+            yield linha
+
+    return StreamingResponse(gerar(), media_type=MEDIA_NDJSON)
@@ -1,5 +1,12 @@
 from fastapi import APIRouter
-from app.services.utils import check_site_status
+from fastapi.responses import JSONResponse, Response
+from app.adapters.http_client import get_upstream_queue_stats
+from app.core.load_shedding import concurrency_limiter
+from app.core.metrics import CONTENT_TYPE, registry
+from app.core.rate_limit import rate_limiter
+from app.services.refresh import get_refresh_stats
+from app.services.utils import get_site_status, is_ready
+from app.services.scraping import get_cache_stats, get_shared_cache_stats, get_singleflight_stats, get_circuit_breaker_stats
 
 router_utils = APIRouter(tags=["Utilitários"])
 
@@ -8,21 +15,88 @@ router_utils = APIRouter(tags=["Utilitários"])
     summary="Verificar status da API e do site externo",
     description=(
         "**Healthcheck da API e do site da Embrapa.**  \n\n"
-        "Retorna status operacional da API e verifica se o site vitibrasil.cnpuv.embrapa.br está online.\n\n"
+        "Retorna status operacional da API e o último estado conhecido do site vitibrasil.cnpuv.embrapa.br, "
+        "verificado em segundo plano a cada HEALTH_PROBE_INTERVAL_SECONDS (a rota não acessa a rede).\n\n"
+        "Inclui os contadores do cache de respostas (hits/misses), do cache compartilhado entre workers "
+        "e de requisições coalescidas, "
+        "além do estado do circuit breaker do site externo (closed, open ou half_open) e das rodadas "
+        "de atualização em segundo plano (duração e falhas).\n\n"
         "**Retorno:**\n"
-        "- 200: API sempre online e site externo online ou offline.\n"
+        "- 200: API sempre online e site externo online, offline ou desconhecido (antes da primeira verificação).\n"
         "- Failed to fetch: API offline."
     )
 )
-def health_check():
+async def health_check():
     """
     Retorna o status do servidor FastAPI e do site da Embrapa.
     - "api": sempre "online" se o servidor está respondendo.
-    - "site_embrapa": "online" se o site está acessível, "offline" caso contrário.
+    - "site_embrapa": "online", "offline" ou "desconhecido", conforme a última sonda.
+    - "sonda": horário (verificado_em) e latência (latencia_ms) da última sonda, e se há backup local.
+    - "cache": contadores do cache de respostas (hits, stale_hits, misses, evictions, entries).
+    - "cache_compartilhado": backend (memory, sqlite ou redis) e contadores do cache entre processos.
+    - "singleflight": raspagens executadas e requisições coalescidas em uma raspagem já em andamento.
+    - "circuit_breaker": estado do circuit breaker do site (closed, open ou half_open).
+    - "atualizacao": rodadas da atualização em segundo plano, durações e falhas por tipo.
+    - "limites": limite por usuário, limite adaptativo de concorrência e fila de requisições ao site.
     """
-    status_embrapa = "online" if check_site_status() else "offline"
+    sonda = get_site_status()
     return {
         "api": "online",
-        "site_embrapa": status_embrapa
+        "site_embrapa": sonda.pop("status"),
+        "sonda": sonda,
+        "cache": get_cache_stats(),
+        "cache_compartilhado": get_shared_cache_stats(),
+        "singleflight": get_singleflight_stats(),
+        "circuit_breaker": get_circuit_breaker_stats(),
+        "atualizacao": get_refresh_stats(),
+        "limites": {
+            "usuarios": rate_limiter.stats(),
+            "concorrencia": concurrency_limiter.stats(),
+            "fila_upstream": get_upstream_queue_stats(),
+        },
     }
 
+@router_utils.get(
+    "/health/live",
+    summary="Liveness da API",
+    description=(
+        "**Liveness probe.**  \n\n"
+        "Responde sempre 200 enquanto o processo atende requisições; não depende do site externo."
+    )
+)
+async def liveness():
+    """Retorna {"status": "ok"} enquanto o servidor responde."""
+    return {"status": "ok"}
+
+@router_utils.get(
+    "/health/ready",
+    summary="Readiness da API",
+    description=(
+        "**Readiness probe.**  \n\n"
+        "Indica se a instância pode receber tráfego: a sonda do site já rodou e há uma fonte de dados "
+        "(site da Embrapa online ou dados locais para o fallback).\n\n"
+        "**Retorno:**\n"
+        "- 200: Pronta.\n"
+        "- 503: Ainda não pronta (sonda pendente ou sem fonte de dados)."
+    )
+)
+async def readiness():
+    """Retorna 200 se a instância está pronta, 503 caso contrário, com o estado da sonda."""
+    pronto = is_ready()
+    corpo = {"status": "ready" if pronto else "not_ready", "site_embrapa": get_site_status()}
+    return JSONResponse(status_code=200 if pronto else 503, content=corpo)
+
+@router_utils.get(
+    "/metrics",
+    summary="Métricas no formato do Prometheus",
+    response_class=Response,
+    description=(
+        "**Métricas para o Prometheus** (formato de texto 0.0.4).  \n\n"
+        "Histogramas de latência por rota, da requisição ao site da Embrapa, da extração do HTML e da "
+        "serialização das respostas; contadores de origem das respostas de dados por recurso (cache, "
+        "stale, online, local — a taxa de fallback é a fração local) e de falhas de raspagem por tipo de exceção."
+    )
+)
+async def metrics():
+    """Retorna todas as métricas registradas em app.core.metrics."""
+    return Response(content=registry.expor(), media_type=CONTENT_TYPE)
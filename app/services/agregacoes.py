@@ -0,0 +1,150 @@
+"""
+Agregações calculadas no servidor a partir dos agregados pré-computados por (recurso, ano):
+totais por categoria, ranking (top-N) e variação ano a ano.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.adapters.hierarquia import coluna_total
+from app.core.config import settings
+from app.services.bulk import montar_celulas
+from app.services.scraping import obter_registro
+
+
+def _variacao(atual: Optional[float], anterior: Optional[float]) -> Dict:
+    """Calcular a variação absoluta e percentual entre dois valores."""
+    if atual is None or anterior is None:
+        return {"variacao": None, "variacao_percentual": None}
+    percentual = round((atual - anterior) / anterior * 100, 2) if anterior else None
+    return {"variacao": atual - anterior, "variacao_percentual": percentual}
+
+
+async def obter_categorias(resource: str, ano: Optional[str] = None) -> Dict:
+    """
+    Retornar os totais por categoria, com os subitens de cada uma.
+
+    Args:
+        resource (str): Nome do recurso (com hierarquia: producao, processamento, comercializacao).
+        ano (str, opcional): Ano de referência.
+
+    Returns:
+        dict: recurso, ano, fonte, coluna, total e categorias.
+
+    Raises:
+        ValueError: Se o recurso não possuir hierarquia de categorias.
+    """
+    if resource in ("importacao", "exportacao"):
+        raise ValueError("Importação e exportação não possuem categorias; utilize o ranking por país.")
+    registro = await obter_registro(resource, ano)
+    agregados = registro["agregados"]
+    return {
+        "recurso": resource,
+        "ano": registro["ano"],
+        "fonte": registro["fonte"],
+        "coluna": agregados["coluna"],
+        "total": registro["total_numerico"],
+        "categorias": agregados["categorias"],
+    }
+
+
+async def obter_top(resource: str, ano: Optional[str] = None, n: int = 10, nivel: str = "item") -> Dict:
+    """
+    Retornar os N maiores itens (produtos/países) ou categorias do ano.
+
+    Args:
+        resource (str): Nome do recurso.
+        ano (str, opcional): Ano de referência.
+        n (int): Quantidade de itens.
+        nivel (str): "item" (produtos/países) ou "categoria".
+
+    Returns:
+        dict: recurso, ano, fonte, coluna, nivel e itens [{nome, categoria, valor, participacao_percentual}].
+    """
+    registro = await obter_registro(resource, ano)
+    agregados = registro["agregados"]
+    if nivel == "categoria":
+        candidatos = sorted(
+            ({"nome": c["nome"], "categoria": c["nome"], "valor": c["total"]} for c in agregados["categorias"] if c["total"]),
+            key=lambda item: item["valor"], reverse=True,
+        )
+    else:
+        candidatos = agregados["ranking"]
+    total = registro["total_numerico"]
+    itens = [
+        {**item, "participacao_percentual": round(item["valor"] / total * 100, 2) if total else None}
+        for item in candidatos[:n]
+    ]
+    return {
+        "recurso": resource,
+        "ano": registro["ano"],
+        "fonte": registro["fonte"],
+        "coluna": agregados["coluna"],
+        "nivel": nivel,
+        "itens": itens,
+    }
+
+
+async def obter_variacao(resource: str, ano_inicio: int, ano_fim: int) -> Dict:
+    """
+    Retornar a série anual do total (e de cada categoria) com a variação em relação ao ano anterior.
+
+    Os anos são buscados em paralelo (BULK_MAX_CONCURRENCY), reaproveitando o cache. Anos para
+    os quais só há dados de outro ano (fallback para o ano padrão) são listados como indisponíveis.
+
+    Args:
+        resource (str): Nome do recurso.
+        ano_inicio (int): Ano inicial (inclusive).
+        ano_fim (int): Ano final (inclusive).
+
+    Returns:
+        dict: recurso, coluna, anos [{ano, fonte, total, variacao, variacao_percentual, categorias}]
+        e anos_indisponiveis.
+
+    Raises:
+        ValueError: Se o intervalo for inválido ou exceder BULK_MAX_CELLS.
+    """
+    celulas = montar_celulas([resource], ano_inicio, ano_fim)
+    if len(celulas) > settings.bulk_max_cells:
+        raise ValueError(f"Intervalo com {len(celulas)} anos excede o limite de {settings.bulk_max_cells}.")
+    semaforo = asyncio.Semaphore(settings.bulk_max_concurrency)
+
+    async def buscar(ano: str) -> Optional[Dict]:
+        async with semaforo:
+            try:
+                return await obter_registro(resource, ano)
+            except HTTPException as e:
+                # 503 de obter_registro: sem dados online nem locais para o ano
+                logging.warning(f"[VARIACAO] {resource} ano={ano} indisponível: {e.detail}")
+                return None
+
+    registros = await asyncio.gather(*(buscar(ano) for _, ano in celulas))
+    serie: List[Dict] = []
+    indisponiveis: List[int] = []
+    anterior: Optional[Dict] = None
+    for (_, ano), registro in zip(celulas, registros):
+        if registro is None or str(registro["ano"]) != ano:
+            indisponiveis.append(int(ano))
+            continue
+        totais_categorias = {c["nome"]: c["total"] for c in registro["agregados"]["categorias"]}
+        categorias = {
+            nome: {"total": total, **_variacao(total, anterior["categorias"][nome]["total"] if anterior and nome in anterior["categorias"] else None)}
+            for nome, total in totais_categorias.items()
+        }
+        ponto = {
+            "ano": int(ano),
+            "fonte": registro["fonte"],
+            "total": registro["total_numerico"],
+            **_variacao(registro["total_numerico"], anterior["total"] if anterior else None),
+            "categorias": categorias,
+        }
+        serie.append(ponto)
+        anterior = ponto
+    return {
+        "recurso": resource,
+        "coluna": coluna_total(resource),
+        "anos": serie,
+        "anos_indisponiveis": indisponiveis,
+    }
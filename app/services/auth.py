@@ -1,30 +1,46 @@
+import asyncio
 import os
-import json
-from typing import Dict, List
+from typing import Dict, List, Optional
 from app.core.config import settings
+from app.adapters.user_store import SQLiteUserRepository, UserRepository
+from app.core.passwords import hash_password_async, verify_password_async
 
 USERS_FILE = os.path.join(settings.backup_path, "users.json")
 DEFAULT_USER = {"username": "admin", "password": "admin123"}
 
-def ensure_users_file():
+_repository: Optional[UserRepository] = None
+
+
+def get_user_repository() -> UserRepository:
     """
-    Garantir que o arquivo de usuários existe e contém o usuário padrão.
+    Obter o repositório de usuários, criando-o no primeiro uso.
+
+    Na criação, os usuários do ``users.json`` legado são migrados (de forma idempotente)
+    e o usuário padrão é garantido.
+
+    Returns:
+        UserRepository: Repositório de usuários configurado (USERS_DB_PATH).
     """
-    """Garante que o arquivo de usuários existe e contém o usuário default."""
-    if not os.path.exists(USERS_FILE):
-        with open(USERS_FILE, "w", encoding="utf-8") as f:
-            json.dump([DEFAULT_USER], f)
-    else:
-        with open(USERS_FILE, "r+", encoding="utf-8") as f:
-            try:
-                users = json.load(f)
-            except Exception:
-                users = []
-            if not any(u["username"] == DEFAULT_USER["username"] for u in users):
-                users.append(DEFAULT_USER)
-                f.seek(0)
-                json.dump(users, f)
-                f.truncate()
+    global _repository
+    if _repository is None:
+        repositorio = SQLiteUserRepository(settings.users_db_path)
+        repositorio.init()
+        repositorio.migrate_from_json(USERS_FILE)
+        repositorio.ensure_user(DEFAULT_USER["username"], DEFAULT_USER["password"])
+        _repository = repositorio
+    return _repository
+
+
+def set_user_repository(repositorio: Optional[UserRepository]) -> None:
+    """
+    Substituir o repositório de usuários (ex.: testes). None volta ao padrão no próximo uso.
+
+    Args:
+        repositorio (UserRepository | None): Repositório a utilizar.
+    """
+    global _repository
+    _repository = repositorio
+
 
 def get_all_users() -> List[Dict]:
     """
@@ -33,13 +49,16 @@ def get_all_users() -> List[Dict]:
     Returns:
         list of dict: Lista de usuários.
     """
-    ensure_users_file()
-    with open(USERS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_user_repository().list()
+
 
-def add_user(username: str, password: str) -> None:
+async def add_user(username: str, password: str) -> None:
     """
-    Adicionar novo usuário ao arquivo de usuários.
+    Adicionar novo usuário ao repositório de usuários.
+
+    A senha é armazenada como hash (scrypt), calculado no pool de hashing. A inserção
+    é atômica: cadastros simultâneos não se sobrescrevem. O acesso ao repositório
+    (SQLite) roda em thread, sem bloquear o event loop.
 
     Args:
         username (str): Nome do usuário.
@@ -48,17 +67,20 @@ def add_user(username: str, password: str) -> None:
     Raises:
         ValueError: Se o usuário já existir.
     """
-    users = get_all_users()
-    if any(u["username"] == username for u in users):
+    repositorio = await asyncio.to_thread(get_user_repository)
+    if await asyncio.to_thread(repositorio.get, username) is not None:
         raise ValueError("Usuário já existe.")
-    users.append({"username": username, "password": password})
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(users, f)
+    await asyncio.to_thread(repositorio.add, username, await hash_password_async(password))
+
 
-def authenticate_user(username: str, password: str) -> bool:
+async def authenticate_user(username: str, password: str) -> bool:
     """
     Validar credenciais do usuário.
 
+    A verificação do hash roda no pool de hashing e o acesso ao repositório em thread,
+    sem bloquear o event loop. Senhas legadas em texto puro, ou com custo diferente de
+    PASSWORD_HASH_COST, são regravadas com o hash atual após um login válido.
+
     Args:
         username (str): Nome do usuário.
         password (str): Senha do usuário.
@@ -66,6 +88,11 @@ def authenticate_user(username: str, password: str) -> bool:
     Returns:
         bool: True se as credenciais forem válidas, False caso contrário.
     """
-    users = get_all_users()
-    return any(u["username"] == username and u["password"] == password for u in users)
-
+    repositorio = await asyncio.to_thread(get_user_repository)
+    user = await asyncio.to_thread(repositorio.get, username)
+    if user is None:
+        return False
+    valida, precisa_atualizar = await verify_password_async(password, user["password"])
+    if precisa_atualizar:
+        await asyncio.to_thread(repositorio.update_password, username, await hash_password_async(password))
+    return valida
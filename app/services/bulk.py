@@ -0,0 +1,82 @@
+"""
+Consulta em lote de vários recursos e anos.
+Busca as células (recurso, ano) em paralelo, com concorrência limitada, e entrega
+cada resultado assim que fica pronto.
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Tuple
+
+from fastapi import HTTPException
+
+from app.adapters.embrapa_scraper import URLS
+from app.services.scraping import get_resource_data, intervalo_anos
+
+
+def montar_celulas(recursos: List[str], ano_inicio: int, ano_fim: int) -> List[Tuple[str, str]]:
+    """
+    Montar a lista de células (recurso, ano) de uma consulta em lote.
+
+    O intervalo é recortado ao período disponível de cada recurso (ex.: produção até 2023).
+
+    Args:
+        recursos (list of str): Recursos solicitados.
+        ano_inicio (int): Ano inicial (inclusive).
+        ano_fim (int): Ano final (inclusive).
+
+    Returns:
+        list of tuple: Células (recurso, ano) sem repetição, na ordem solicitada.
+
+    Raises:
+        ValueError: Se algum recurso for inválido ou o intervalo de anos for vazio.
+    """
+    invalidos = [r for r in recursos if r not in URLS]
+    if invalidos:
+        raise ValueError(f"Recursos inválidos: {', '.join(invalidos)}. Opções: {', '.join(URLS)}.")
+    if ano_inicio > ano_fim:
+        raise ValueError("ano_inicio deve ser menor ou igual a ano_fim.")
+    celulas = []
+    for resource in dict.fromkeys(recursos):
+        ano_min, ano_max, _ = intervalo_anos(resource)
+        for ano in range(max(ano_inicio, ano_min), min(ano_fim, ano_max) + 1):
+            celulas.append((resource, str(ano)))
+    if not celulas:
+        raise ValueError("Nenhum ano do intervalo está disponível para os recursos solicitados.")
+    return celulas
+
+
+async def iterar_lote(celulas: List[Tuple[str, str]], max_concorrencia: int, formato: str = "texto") -> AsyncIterator[Dict]:
+    """
+    Buscar as células em paralelo e produzir cada resultado assim que concluído.
+
+    Cada célula passa por get_resource_data, reaproveitando cache, single-flight e
+    circuit breaker. Falhas de uma célula não interrompem o lote: viram um item com
+    a chave "erro".
+
+    Args:
+        celulas (list of tuple): Células (recurso, ano) a buscar.
+        max_concorrencia (int): Máximo de células buscadas simultaneamente.
+        formato (str): Formato dos valores ("texto" ou "numerico").
+
+    Yields:
+        dict: Resposta da célula acrescida da chave "recurso", ou item de erro.
+    """
+    semaforo = asyncio.Semaphore(max_concorrencia)
+
+    async def buscar(resource: str, ano: str) -> Dict:
+        async with semaforo:
+            try:
+                resp = await get_resource_data(resource, ano, formato)
+                return {"recurso": resource, **resp}
+            except HTTPException as e:
+                logging.warning(f"[LOTE] Falha em {resource} ano={ano}: {e.detail}")
+                return {"recurso": resource, "ano": int(ano), "erro": e.detail}
+
+    tarefas = [asyncio.create_task(buscar(resource, ano)) for resource, ano in celulas]
+    try:
+        for proxima in asyncio.as_completed(tarefas):
+            yield await proxima
+    finally:
+        # Cliente desconectado no meio do streaming: cancela o que ainda não terminou
+        for tarefa in tarefas:
+            tarefa.cancel()
@@ -0,0 +1,225 @@
+"""
+Filtros, ordenação, paginação e projeção de campos das respostas de dados.
+
+As consultas são avaliadas sobre um índice por (recurso, ano), montado uma única vez
+por registro do cache (``registro["indice"]``):
+
+- nomes normalizados (sem acentos e sem diferenciar maiúsculas) em ordem, para busca
+  exata ou por prefixo com bisect;
+- para cada coluna numérica, as linhas ordenadas por valor (faixas com bisect e
+  ordenação sem ordenar a cada requisição) e as linhas sem valor;
+- as linhas com ao menos um valor numérico (descarte de linhas vazias, ex.: países com "-").
+
+Apenas as linhas selecionadas são copiadas e serializadas.
+"""
+import base64
+import hashlib
+import unicodedata
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.adapters.hierarquia import coluna_total, colunas_tabela
+from app.adapters.numeric import COLUNAS_NUMERICAS
+
+# Apelidos aceitos em ``fields`` e ``metrica`` (além do nome exato da coluna)
+APELIDOS = {"nome": 0, "pais": 0, "produto": 0, "quantidade": "Quantidade", "valor": "Valor"}
+
+
+@dataclass(frozen=True)
+class Consulta:
+    """
+    Parâmetros de uma consulta às linhas de dados.
+
+    Attributes:
+        nome (str, opcional): Nome de país/produto procurado (sem diferenciar acentos e maiúsculas).
+        nome_exato (bool): Busca exata (True) ou por prefixo (False).
+        sem_vazios (bool): Descartar linhas sem nenhum valor numérico ("-").
+        metrica (str, opcional): Coluna usada em ``minimo``/``maximo`` e na ordenação. Padrão: coluna do total.
+        minimo (float, opcional): Valor mínimo (inclusive) da métrica.
+        maximo (float, opcional): Valor máximo (inclusive) da métrica.
+        ordem (str, opcional): "asc" ou "desc" pela métrica (linhas sem valor ao final); None mantém a ordem do site.
+        limit (int, opcional): Quantidade máxima de linhas devolvidas.
+        offset (int): Linhas ignoradas no início.
+        cursor (str, opcional): Cursor devolvido em ``paginacao.proximo_cursor`` (substitui ``offset``).
+        fields (tuple of str, opcional): Colunas devolvidas, na ordem informada.
+    """
+
+    nome: Optional[str] = None
+    nome_exato: bool = False
+    sem_vazios: bool = False
+    metrica: Optional[str] = None
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+    ordem: Optional[str] = None
+    limit: Optional[int] = None
+    offset: int = 0
+    cursor: Optional[str] = None
+    fields: Optional[Tuple[str, ...]] = None
+
+
+def normalizar_nome(nome) -> str:
+    """Normalizar um nome para busca: sem acentos, minúsculo e sem espaços nas pontas."""
+    decomposto = unicodedata.normalize("NFKD", str(nome or "").strip())
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def _colunas_numericas(resource: str) -> List[str]:
+    return [c for c in colunas_tabela(resource) if c in COLUNAS_NUMERICAS]
+
+
+def resolver_coluna(resource: str, campo: str) -> str:
+    """
+    Converter um nome de campo (coluna ou apelido: nome, pais, produto, quantidade, valor) na coluna do recurso.
+
+    Raises:
+        ValueError: Se o campo não existir no recurso.
+    """
+    colunas = colunas_tabela(resource)
+    if campo in colunas:
+        return campo
+    apelido = APELIDOS.get(normalizar_nome(campo))
+    if apelido == 0:
+        return colunas[0]
+    if apelido is not None:
+        for coluna in colunas:
+            if coluna.startswith(apelido):
+                return coluna
+    opcoes = ", ".join(colunas + [a for a, c in APELIDOS.items() if c == 0 or any(col.startswith(str(c)) for col in colunas)])
+    raise ValueError(f"Campo inválido para {resource}: {campo}. Opções: {opcoes}.")
+
+
+def montar_indice(resource: str, registro: Dict) -> Dict:
+    """
+    Montar o índice de consulta de um registro.
+
+    Args:
+        resource (str): Nome do recurso.
+        registro (dict): Registro do cache (ver scraping._montar_registro).
+
+    Returns:
+        dict: nomes (chaves normalizadas e posições em ordem), metricas (por coluna: valores,
+        posições ascendentes, posições descendentes e posições sem valor) e nao_vazias.
+    """
+    linhas = registro["dados_numericos"]
+    coluna_nome = colunas_tabela(resource)[0]
+    nomes = sorted((normalizar_nome(linha.get(coluna_nome)), i) for i, linha in enumerate(linhas))
+    metricas = {}
+    for coluna in _colunas_numericas(resource):
+        pares = sorted((linha[coluna], i) for i, linha in enumerate(linhas) if linha.get(coluna) is not None)
+        metricas[coluna] = {
+            "valores": [v for v, _ in pares],
+            "asc": [i for _, i in pares],
+            # Decrescente por valor, mantendo a ordem do site entre valores iguais
+            "desc": [i for _, i in sorted(pares, key=lambda p: (-p[0], p[1]))],
+            "sem_valor": [i for i, linha in enumerate(linhas) if linha.get(coluna) is None],
+        }
+    return {
+        "total": len(linhas),
+        "nomes": {"chaves": [n for n, _ in nomes], "posicoes": [i for _, i in nomes]},
+        "metricas": metricas,
+        "nao_vazias": frozenset(
+            i for i, linha in enumerate(linhas) if any(linha.get(c) is not None for c in _colunas_numericas(resource))
+        ),
+    }
+
+
+def obter_indice(resource: str, registro: Dict) -> Dict:
+    """Obter o índice do registro, montando-o no primeiro uso."""
+    indice = registro.get("indice")
+    if indice is None:
+        indice = registro["indice"] = montar_indice(resource, registro)
+    return indice
+
+
+def _assinatura(resource: str, ano, consulta: Consulta) -> str:
+    """Identificar a consulta (sem a paginação), para que um cursor só valha para ela."""
+    base = replace(consulta, limit=None, offset=0, cursor=None, fields=None)
+    return hashlib.sha256(repr((resource, str(ano), base)).encode("utf-8")).hexdigest()[:16]
+
+
+def _codificar_cursor(offset: int, assinatura: str) -> str:
+    return base64.urlsafe_b64encode(f"{offset}:{assinatura}".encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str, assinatura: str) -> int:
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        offset, dono = texto.split(":", 1)
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Cursor inválido.")
+    if dono != assinatura or offset < 0:
+        raise ValueError("Cursor inválido para esta consulta (filtros diferentes dos que o geraram).")
+    return offset
+
+
+def _selecionar(indice: Dict, consulta: Consulta, metrica: str) -> Sequence[int]:
+    """Posições das linhas selecionadas, na ordem de saída."""
+    candidatos: Optional[Set[int]] = None
+
+    def restringir(posicoes) -> None:
+        nonlocal candidatos
+        candidatos = set(posicoes) if candidatos is None else candidatos.intersection(posicoes)
+
+    if consulta.nome:
+        alvo = normalizar_nome(consulta.nome)
+        chaves = indice["nomes"]["chaves"]
+        inicio = bisect_left(chaves, alvo)
+        fim = bisect_right(chaves, alvo) if consulta.nome_exato else bisect_left(chaves, alvo + "\U0010ffff")
+        restringir(indice["nomes"]["posicoes"][inicio:fim])
+    if consulta.minimo is not None or consulta.maximo is not None:
+        valores = indice["metricas"][metrica]["valores"]
+        inicio = bisect_left(valores, consulta.minimo) if consulta.minimo is not None else 0
+        fim = bisect_right(valores, consulta.maximo) if consulta.maximo is not None else len(valores)
+        restringir(indice["metricas"][metrica]["asc"][inicio:fim])
+    if consulta.sem_vazios:
+        restringir(indice["nao_vazias"])
+
+    if consulta.ordem:
+        ordenadas = indice["metricas"][metrica][consulta.ordem] + indice["metricas"][metrica]["sem_valor"]
+        return ordenadas if candidatos is None else [i for i in ordenadas if i in candidatos]
+    return range(indice["total"]) if candidatos is None else sorted(candidatos)
+
+
+def aplicar_consulta(resource: str, registro: Dict, resposta: Dict, consulta: Consulta) -> Tuple[Dict, List[str]]:
+    """
+    Aplicar filtros, ordenação, paginação e projeção a uma resposta de dados.
+
+    ``valor_total`` continua sendo o total da tabela completa; a quantidade de linhas
+    selecionadas vem em ``paginacao.total``.
+
+    Args:
+        resource (str): Nome do recurso.
+        registro (dict): Registro do cache (fonte do índice).
+        resposta (dict): Resposta completa (ver scraping.formatar_resposta), no formato desejado.
+        consulta (Consulta): Parâmetros da consulta.
+
+    Returns:
+        tuple: (resposta com as linhas selecionadas e ``paginacao``, colunas devolvidas).
+
+    Raises:
+        ValueError: Para campo, métrica ou cursor inválidos.
+    """
+    metrica = resolver_coluna(resource, consulta.metrica) if consulta.metrica else coluna_total(resource)
+    if metrica not in COLUNAS_NUMERICAS:
+        raise ValueError(f"Métrica inválida para {resource}: {consulta.metrica}. Use uma coluna numérica.")
+    colunas = [resolver_coluna(resource, c) for c in consulta.fields] if consulta.fields else colunas_tabela(resource)
+    colunas = list(dict.fromkeys(colunas))
+
+    assinatura = _assinatura(resource, resposta["ano"], consulta)
+    offset = _decodificar_cursor(consulta.cursor, assinatura) if consulta.cursor else consulta.offset
+    posicoes = _selecionar(obter_indice(resource, registro), consulta, metrica)
+    fim = len(posicoes) if consulta.limit is None else offset + consulta.limit
+    linhas = resposta["dados"]
+    if consulta.fields:
+        dados = [{c: linhas[i].get(c) for c in colunas} for i in posicoes[offset:fim]]
+    else:
+        dados = [linhas[i] for i in posicoes[offset:fim]]
+    paginacao = {
+        "total": len(posicoes),
+        "offset": offset,
+        "limit": consulta.limit,
+        "proximo_cursor": _codificar_cursor(fim, assinatura) if fim < len(posicoes) else None,
+    }
+    return {**resposta, "dados": dados, "paginacao": paginacao}, colunas
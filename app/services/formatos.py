@@ -0,0 +1,109 @@
+"""
+Representações alternativas das respostas de dados, escolhidas pelo cabeçalho Accept.
+
+- application/json: formato padrão (DataResponse, uma lista de objetos por linha).
+- text/csv: apenas as linhas de dados, com cabeçalho.
+- application/vnd.vitibrasil.colunar+json: metadados do DataResponse e ``dados`` como
+  {coluna: [valores]}, sem repetir os nomes das colunas em cada linha.
+"""
+import csv
+import io
+from typing import Dict, Iterable, List, Optional, Sequence
+
+MEDIA_JSON = "application/json"
+MEDIA_NDJSON = "application/x-ndjson"
+MEDIA_CSV = "text/csv"
+MEDIA_COLUNAR = "application/vnd.vitibrasil.colunar+json"
+
+REPRESENTACOES_DADOS = (MEDIA_JSON, MEDIA_CSV, MEDIA_COLUNAR)
+REPRESENTACOES_LOTE = (MEDIA_NDJSON, MEDIA_CSV)
+
+
+def _qualidade(accept: str, media: str) -> float:
+    """Qualidade (q) do tipo de mídia no Accept, usando a faixa mais específica que o aceita."""
+    tipo, subtipo = media.split("/", 1)
+    melhor, especificidade = 0.0, -1
+    for item in accept.split(","):
+        partes = [p.strip() for p in item.split(";")]
+        faixa = partes[0].lower()
+        q = 1.0
+        for parametro in partes[1:]:
+            if parametro.startswith("q="):
+                try:
+                    q = float(parametro[2:])
+                except ValueError:
+                    q = 0.0
+        if faixa == media:
+            nivel = 2
+        elif faixa == f"{tipo}/*":
+            nivel = 1
+        elif faixa == "*/*":
+            nivel = 0
+        else:
+            continue
+        if nivel > especificidade:
+            melhor, especificidade = q, nivel
+    return melhor
+
+
+def negociar(accept: Optional[str], suportados: Sequence[str]) -> str:
+    """
+    Escolher a representação pelo cabeçalho Accept.
+
+    Em empate vale a ordem de ``suportados``; sem Accept, ou se nenhum tipo suportado for
+    aceito, usa o primeiro (padrão).
+
+    Args:
+        accept (str, opcional): Valor do cabeçalho Accept.
+        suportados (sequence of str): Tipos de mídia suportados, o padrão primeiro.
+
+    Returns:
+        str: Tipo de mídia escolhido.
+    """
+    if not accept:
+        return suportados[0]
+    escolhido, maior = suportados[0], 0.0
+    for media in suportados:
+        q = _qualidade(accept, media)
+        if q > maior:
+            escolhido, maior = media, q
+    return escolhido
+
+
+def _valor_csv(valor) -> str:
+    return "" if valor is None else str(valor)
+
+
+def para_csv(linhas: Iterable[Dict], colunas: List[str], cabecalho: bool = True) -> bytes:
+    """
+    Serializar linhas de dados em CSV (UTF-8, separador vírgula).
+
+    Args:
+        linhas (iterable of dict): Linhas de dados.
+        colunas (list of str): Colunas, na ordem de saída.
+        cabecalho (bool): Incluir a linha de cabeçalho.
+
+    Returns:
+        bytes: CSV codificado em UTF-8; valores ausentes (None) ficam vazios.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    if cabecalho:
+        escritor.writerow(colunas)
+    escritor.writerows([_valor_csv(linha.get(c)) for c in colunas] for linha in linhas)
+    return buffer.getvalue().encode("utf-8")
+
+
+def para_colunar(resposta: Dict, colunas: List[str]) -> Dict:
+    """
+    Converter uma resposta de dados para o formato colunar.
+
+    Args:
+        resposta (dict): Resposta no formato DataResponse.
+        colunas (list of str): Colunas das linhas de dados.
+
+    Returns:
+        dict: Mesmos metadados, com ``dados`` como {coluna: [valores]}.
+    """
+    linhas = resposta["dados"]
+    return {**resposta, "dados": {c: [linha.get(c) for linha in linhas] for c in colunas}}
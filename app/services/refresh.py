@@ -0,0 +1,169 @@
+"""
+Atualização periódica em segundo plano dos dados de todos os recursos.
+
+A cada REFRESH_INTERVAL_SECONDS (mais um atraso aleatório de até REFRESH_JITTER_SECONDS,
+para que várias instâncias não raspem o site ao mesmo tempo), raspa o ano padrão e os
+REFRESH_RECENT_YEARS anos mais recentes de cada recurso, com concorrência limitada, e:
+
+- aquece o cache de respostas, para que as requisições não paguem a latência do site;
+- grava o snapshot em ``{REFRESH_DATA_PATH}/historico.sqlite3`` (transação única por
+  recurso/ano), consultado pelo fallback antes dos backups versionados de BACKUP_PATH,
+  que nunca são alterados.
+
+Desabilitada por padrão (REFRESH_ENABLED).
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.adapters.embrapa_scraper import URLS
+from app.adapters.history_store import refresh_store
+from app.core.config import settings
+from app.services.scraping import _raspar, armazenar_registro, intervalo_anos
+
+_estatisticas: Dict = {
+    "execucoes": 0,
+    "em_execucao": False,
+    "ultima_execucao": None,
+    "ultima_duracao_segundos": None,
+    "atualizados": 0,
+    "falhas": 0,
+    "falhas_por_tipo": {},
+    "duracao_por_recurso": {},
+}
+_tarefa: Optional[asyncio.Task] = None
+
+
+def celulas_atualizacao(anos_recentes: int) -> List[Tuple[str, str]]:
+    """
+    Montar as combinações (recurso, ano) atualizadas a cada execução.
+
+    Args:
+        anos_recentes (int): Quantidade de anos mais recentes por recurso (inclui o ano padrão).
+
+    Returns:
+        list of tuple: Combinações (recurso, ano), do ano mais recente para o mais antigo.
+    """
+    celulas = []
+    for resource in URLS:
+        ano_min, ano_max, ano_padrao = intervalo_anos(resource)
+        anos = [ano_padrao] + [str(a) for a in range(ano_max, max(ano_min, ano_max - anos_recentes + 1) - 1, -1)]
+        celulas.extend((resource, ano) for ano in dict.fromkeys(anos))
+    return celulas
+
+
+def _gravar(resource: str, ano: str, resultado: Dict) -> None:
+    """Gravar o snapshot no armazenamento da atualização (E/S bloqueante)."""
+    refresh_store.init()
+    refresh_store.save(resource, int(ano), resultado)
+
+
+async def _atualizar(resource: str, ano: str) -> bool:
+    """Raspar e gravar um (recurso, ano). Retorna True em caso de sucesso."""
+    inicio = time.perf_counter()
+    try:
+        resultado = await _raspar(resource, ano)
+        armazenar_registro(resource, ano, resultado)
+        # Transação SQLite fora do event loop que atende as requisições
+        await asyncio.to_thread(_gravar, resource, ano, resultado)
+    except Exception as e:
+        tipo = type(e).__name__
+        _estatisticas["falhas"] += 1
+        _estatisticas["falhas_por_tipo"][tipo] = _estatisticas["falhas_por_tipo"].get(tipo, 0) + 1
+        logging.warning(f"[REFRESH] Falha ao atualizar {resource} ano={ano}: {tipo}: {e}")
+        return False
+    finally:
+        _estatisticas["duracao_por_recurso"][f"{resource}/{ano}"] = round(time.perf_counter() - inicio, 3)
+    _estatisticas["atualizados"] += 1
+    return True
+
+
+async def refresh_all(anos_recentes: Optional[int] = None, concorrencia: Optional[int] = None) -> Dict[str, int]:
+    """
+    Executar uma rodada de atualização de todos os recursos.
+
+    As raspagens passam pelo single-flight e pelo circuit breaker: com o site fora do ar
+    as combinações falham rapidamente e o fallback local continua intacto.
+
+    Args:
+        anos_recentes (int, opcional): Anos mais recentes por recurso. Padrão: REFRESH_RECENT_YEARS.
+        concorrencia (int, opcional): Raspagens simultâneas. Padrão: REFRESH_MAX_CONCURRENCY.
+
+    Returns:
+        dict: Quantidade de combinações atualizadas e com falha na rodada.
+    """
+    celulas = celulas_atualizacao(anos_recentes or settings.refresh_recent_years)
+    semaforo = asyncio.Semaphore(concorrencia or settings.refresh_max_concurrency)
+
+    async def processar(resource: str, ano: str) -> bool:
+        async with semaforo:
+            return await _atualizar(resource, ano)
+
+    inicio = time.perf_counter()
+    _estatisticas["em_execucao"] = True
+    try:
+        resultados = await asyncio.gather(*(processar(r, a) for r, a in celulas))
+    finally:
+        _estatisticas["em_execucao"] = False
+    duracao = time.perf_counter() - inicio
+    _estatisticas["execucoes"] += 1
+    _estatisticas["ultima_execucao"] = datetime.utcnow().isoformat() + "Z"
+    _estatisticas["ultima_duracao_segundos"] = round(duracao, 3)
+    resumo = {"atualizados": sum(resultados), "falhas": len(resultados) - sum(resultados)}
+    logging.info(f"[REFRESH] Rodada concluída em {duracao:.1f}s: {resumo['atualizados']} atualizados, {resumo['falhas']} falhas")
+    return resumo
+
+
+async def _executar_periodicamente() -> None:
+    await asyncio.sleep(settings.refresh_initial_delay_seconds + random.uniform(0, settings.refresh_jitter_seconds))
+    while True:
+        try:
+            await refresh_all()
+        except Exception as e:
+            logging.error(f"[REFRESH] Rodada interrompida: {e}")
+        await asyncio.sleep(settings.refresh_interval_seconds + random.uniform(0, settings.refresh_jitter_seconds))
+
+
+def start_refresh_worker() -> Optional[asyncio.Task]:
+    """
+    Iniciar a atualização periódica, se habilitada (REFRESH_ENABLED).
+
+    Returns:
+        asyncio.Task | None: Tarefa da atualização, ou None se desabilitada.
+    """
+    global _tarefa
+    if not settings.refresh_enabled:
+        return None
+    if _tarefa is None or _tarefa.done():
+        _tarefa = asyncio.create_task(_executar_periodicamente())
+    return _tarefa
+
+
+async def stop_refresh_worker() -> None:
+    """Interromper a atualização periódica, se estiver em execução."""
+    global _tarefa
+    if _tarefa is not None:
+        _tarefa.cancel()
+        try:
+            await _tarefa
+        except asyncio.CancelledError:
+            pass
+        _tarefa = None
+
+
+def get_refresh_stats() -> Dict:
+    """
+    Retornar as estatísticas da atualização em segundo plano.
+
+    Returns:
+        dict: execucoes, em_execucao, ultima_execucao, ultima_duracao_segundos, atualizados,
+        falhas, falhas_por_tipo e duracao_por_recurso (segundos da última atualização de cada recurso/ano).
+    """
+    return {
+        **_estatisticas,
+        "falhas_por_tipo": dict(_estatisticas["falhas_por_tipo"]),
+        "duracao_por_recurso": dict(_estatisticas["duracao_por_recurso"]),
+    }
@@ -1,11 +1,348 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
+import asyncio
+import hashlib
+from app.adapters.cache_backends import create_cache_backend
 from app.adapters.embrapa_scraper import scrape_table
+from app.adapters.http_client import UpstreamOverloadedError, upstream_sobrecarregado
+from app.adapters.hierarquia import colunas_tabela
 from app.adapters.local_backup import load_backup
+from app.adapters.numeric import enriquecer_resultado
+from app.core.cache import TTLCache
+from app.core.singleflight import SingleFlight
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.shared_cache import SharedFlight
+from app.core.config import settings
+from app.core.json_response import dumps
+from app.core.logs import AMOSTRADO
+from app.core.metrics import data_source_total, rejected_requests_total, serialization_duration
+from app.services.consulta import Consulta, aplicar_consulta
+from app.services.formatos import MEDIA_COLUNAR, MEDIA_CSV, MEDIA_JSON, para_colunar, para_csv
 import logging
 
+# Cache das respostas online, chaveado por (recurso, ano)
+response_cache = TTLCache(max_entries=settings.cache_max_entries, ttl_seconds=settings.cache_ttl_seconds)
+# Deduplicação de raspagens concorrentes para o mesmo (recurso, ano)
+upstream_flight = SingleFlight()
+# Circuit breaker do site da Embrapa: com o site fora do ar, o fallback local é imediato
+circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.breaker_failure_threshold,
+    cooldown_seconds=settings.breaker_cooldown_seconds,
+)
+# Cache compartilhado entre workers/réplicas (CACHE_BACKEND); None usa apenas o cache local
+shared_cache = create_cache_backend()
+shared_flight = (
+    SharedFlight(
+        shared_cache,
+        ttl_seconds=settings.cache_ttl_seconds,
+        lock_ttl_seconds=settings.cache_lock_ttl_seconds,
+        # Esperar além do timeout do site só atrasaria o fallback
+        wait_seconds=min(settings.cache_lock_wait_seconds, settings.upstream_timeout_seconds),
+    )
+    if shared_cache is not None
+    else None
+)
+_revalidando: Set[Tuple[str, str]] = set()
+_tarefas_revalidacao: Set[asyncio.Task] = set()
 
-def get_resource_data(resource: str, ano: Optional[str] = None) -> Dict:
+
+def intervalo_anos(resource: str) -> Tuple[int, int, str]:
+    """
+    Retornar o intervalo de anos disponível e o ano padrão do recurso.
+
+    Args:
+        resource (str): Nome do recurso.
+
+    Returns:
+        tuple: (ano mínimo, ano máximo, ano padrão).
+    """
+    if resource in ("importacao", "exportacao"):
+        return 1970, 2024, "2024"
+    return 1970, 2023, "2023"
+
+
+def normalizar_ano(resource: str, ano: Optional[str]) -> str:
+    """
+    Normalizar o ano solicitado, aplicando o ano padrão do recurso quando ausente ou inválido.
+
+    Args:
+        resource (str): Nome do recurso.
+        ano (str, opcional): Ano solicitado.
+
+    Returns:
+        str: Ano efetivo a ser consultado.
+    """
+    ano_min, ano_max, ano_padrao = intervalo_anos(resource)
+    ano = str(ano) if ano else ano_padrao
+    if not (ano.isdigit() and ano_min <= int(ano) <= ano_max):
+        ano = ano_padrao
+    return ano
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """
+    Retornar os contadores do cache de respostas (hits, misses, etc).
+
+    Returns:
+        dict: Estatísticas do cache.
+    """
+    return response_cache.stats()
+
+
+def get_singleflight_stats() -> Dict[str, int]:
+    """
+    Retornar os contadores de coalescência de raspagens (execuções e chamadas coalescidas).
+
+    Returns:
+        dict: Estatísticas do single-flight.
+    """
+    return upstream_flight.stats()
+
+
+def get_shared_cache_stats() -> Dict:
+    """
+    Retornar os contadores do cache compartilhado entre processos.
+
+    Returns:
+        dict: Backend configurado e, se houver, hits, misses, waits e errors.
+    """
+    if shared_flight is None:
+        return {"backend": "memory"}
+    return {"backend": settings.cache_backend.lower(), **shared_flight.stats()}
+
+
+async def close_shared_cache() -> None:
+    """Fechar as conexões do cache compartilhado, se configurado."""
+    if shared_cache is not None:
+        await shared_cache.close()
+
+
+def get_circuit_breaker_stats() -> Dict:
+    """
+    Retornar o estado do circuit breaker do site da Embrapa.
+
+    Returns:
+        dict: Estado (closed, open, half_open) e contadores.
+    """
+    return circuit_breaker.stats()
+
+
+def _verificar_upstream() -> None:
+    """
+    Falhar rápido se o site não deve ser chamado (fila cheia ou circuito aberto).
+
+    Raises:
+        UpstreamOverloadedError: Se a fila de requisições ao site estiver cheia.
+        CircuitOpenError: Se o circuito estiver aberto.
+    """
+    if upstream_sobrecarregado():
+        rejected_requests_total.inc("upstream_fila")
+        raise UpstreamOverloadedError("Fila de requisições ao site da Embrapa cheia, raspagem descartada.")
+    circuit_breaker.raise_if_open()
+
+
+async def _raspar_protegido(resource: str, ano: str) -> Dict:
+    """Raspar o site da Embrapa passando pelo circuit breaker e pelo limite da fila de requisições."""
+    _verificar_upstream()
+    if not circuit_breaker.allow_request():
+        raise CircuitOpenError("Circuito aberto: site da Embrapa indisponível, raspagem não executada.")
+    try:
+        resultado = await scrape_table(resource, ano)
+    except BaseException:
+        circuit_breaker.record_failure()
+        raise
+    circuit_breaker.record_success()
+    return resultado
+
+
+async def _raspar_compartilhado(resource: str, ano: str) -> Dict:
+    """Obter o resultado do cache compartilhado ou raspar (um único processo por vez)."""
+    if shared_flight is None:
+        return await _raspar_protegido(resource, ano)
+    # As verificações antes e durante a espera pelo lock evitam aguardar outro processo
+    # quando este já serviria o fallback local
+    return await shared_flight.do(
+        f"vitibrasil:resultado:{resource}:{ano}", lambda: _raspar_protegido(resource, ano), verificar=_verificar_upstream
+    )
+
+
+async def _raspar(resource: str, ano: str) -> Dict:
+    """Raspar o site da Embrapa, compartilhando a requisição entre chamadas concorrentes e entre processos."""
+    return await upstream_flight.do((resource, ano), lambda: _raspar_compartilhado(resource, ano))
+
+
+def _montar_registro(resource: str, resultado: Dict, fonte: str) -> Dict:
+    """
+    Montar o registro armazenado em cache a partir do resultado do adapter.
+
+    O registro guarda as representações em texto e numérica e os agregados por
+    categoria, calculados uma única vez na ingestão.
+    """
+    if "agregados" not in resultado:
+        resultado = enriquecer_resultado(resource, dict(resultado))
+    # Monta o dicionário na ordem desejada, SEM OrderedDict
+    return {
+        "fonte": fonte,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "ano": resultado.get("ano"),
+        "valor_total": resultado.get("valor_total", "-"),
+        "dados": resultado.get("dados", []),
+        "total_numerico": resultado.get("total_numerico"),
+        "dados_numericos": resultado.get("dados_numericos", []),
+        "agregados": resultado.get("agregados"),
+        # Respostas já serializadas por formato e representação (preenchido sob demanda por get_resource_payload)
+        "serializado": {},
+    }
+
+
+def formatar_resposta(registro: Dict, formato: str = "texto") -> Dict:
+    """
+    Montar a resposta da API a partir do registro, no formato solicitado.
+
+    Args:
+        registro (dict): Registro montado por _montar_registro.
+        formato (str): "texto" (valores como no site, ex.: "1.234") ou "numerico" (int/float nativos).
+
+    Returns:
+        dict: Resposta com fonte, timestamp, ano, valor_total e dados.
+    """
+    if formato == "numerico":
+        return {
+            "fonte": registro["fonte"],
+            "timestamp": registro["timestamp"],
+            "ano": registro["ano"],
+            "valor_total": registro["total_numerico"],
+            "dados": registro["dados_numericos"],
+        }
+    return {
+        "fonte": registro["fonte"],
+        "timestamp": registro["timestamp"],
+        "ano": registro["ano"],
+        "valor_total": registro["valor_total"],
+        "dados": registro["dados"],
+    }
+
+
+def _manter_se_inalterado(anterior: Optional[Dict], novo: Dict) -> Dict:
+    """
+    Reaproveitar o registro anterior quando os dados não mudaram.
+
+    Mantém timestamp, corpo serializado e ETag estáveis entre revalidações de dados
+    idênticos (ex.: anos históricos), para que os clientes continuem recebendo 304.
+    """
+    if anterior is not None and all(anterior[k] == novo[k] for k in ("fonte", "ano", "valor_total", "dados")):
+        return anterior
+    return novo
+
+
+def armazenar_registro(resource: str, ano: str, resultado: Dict) -> Dict:
+    """
+    Gravar no cache o resultado de uma raspagem bem-sucedida (ex.: atualização em segundo plano).
+
+    Args:
+        resource (str): Nome do recurso.
+        ano (str): Ano consultado.
+        resultado (dict): Resultado do scraping.
+
+    Returns:
+        dict: Registro armazenado (o anterior, se os dados não mudaram).
+    """
+    chave = (resource, str(ano))
+    registro = _manter_se_inalterado(response_cache.peek(chave), _montar_registro(resource, resultado, "online"))
+    response_cache.set(chave, registro)
+    return registro
+
+
+async def _revalidar(resource: str, ano: str, anterior: Optional[Dict] = None) -> None:
+    """Atualizar em segundo plano uma entrada expirada do cache."""
+    chave = (resource, ano)
+    try:
+        resultado = await _raspar(resource, ano)
+        response_cache.set(chave, _manter_se_inalterado(anterior, _montar_registro(resource, resultado, "online")))
+        logging.info(f"[CACHE] Revalidação concluída para {resource} ano={ano}")
+    except Exception as e:
+        logging.warning(f"[CACHE] Revalidação falhou para {resource} ano={ano}: {e}")
+    finally:
+        _revalidando.discard(chave)
+
+
+def _agendar_revalidacao(resource: str, ano: str, anterior: Optional[Dict] = None) -> None:
+    """Disparar a revalidação em segundo plano, no máximo uma por (recurso, ano)."""
+    chave = (resource, ano)
+    if chave in _revalidando:
+        return
+    _revalidando.add(chave)
+    tarefa = asyncio.create_task(_revalidar(resource, ano, anterior))
+    # Mantém referência à tarefa até o fim, evitando coleta prematura
+    _tarefas_revalidacao.add(tarefa)
+    tarefa.add_done_callback(_tarefas_revalidacao.discard)
+
+
+async def _carregar_backup(resource: str, ano: str) -> Tuple[Dict, str]:
+    """
+    Carregar o backup local como fallback, em um thread (consulta SQLite e leitura de
+    arquivos não bloqueiam o event loop enquanto o site estiver fora do ar).
+
+    Raises:
+        HTTPException: 503 se o backup local também falhar.
+    """
+    try:
+        return await asyncio.to_thread(load_backup, resource, ano), "local"
+    except Exception as e2:
+        logging.error(f"[FALLBACK] Backup local também falhou: {e2}")
+        from fastapi import HTTPException
+        raise HTTPException(status_code=503, detail="Dados indisponíveis no momento (falha online e local).")
+
+
+async def obter_registro(resource: str, ano: Optional[str] = None) -> Dict:
+    """
+    Obter o registro interno de um (recurso, ano): cache, raspagem online ou fallback local.
+
+    Além dos campos da resposta, o registro traz dados_numericos, total_numerico e
+    agregados. Usado por get_resource_data e pelos endpoints de agregação.
+
+    Args:
+        resource (str): Nome do recurso.
+        ano (Optional[str]): Ano desejado. Se None ou inválido, aplica default conforme o recurso.
+
+    Returns:
+        dict: Registro montado por _montar_registro.
+
+    Raises:
+        HTTPException: 503 se dados indisponíveis online e local.
+    """
+    ano = normalizar_ano(resource, ano)
+    chave = (resource, ano)
+    entrada = response_cache.get(chave)
+    if entrada is not None:
+        if entrada.fresh:
+            data_source_total.inc(resource, "cache")
+            return entrada.value
+        if settings.cache_stale_while_revalidate:
+            _agendar_revalidacao(resource, ano, entrada.value)
+            data_source_total.inc(resource, "stale")
+            return entrada.value
+    try:
+        resultado = await _raspar(resource, ano)
+        fonte = "online"
+    except (CircuitOpenError, UpstreamOverloadedError) as e:
+        logging.info("[FALLBACK] %s", e, extra=AMOSTRADO)
+        resultado, fonte = await _carregar_backup(resource, ano)
+    except Exception as e:
+        logging.warning("[FALLBACK] Scraping falhou, tentando backup local: %s", e)
+        resultado, fonte = await _carregar_backup(resource, ano)
+    registro = _montar_registro(resource, resultado, fonte)
+    # Apenas dados online são cacheados; o fallback local não deve mascarar a recuperação do site
+    if fonte == "online":
+        registro = _manter_se_inalterado(entrada.value if entrada is not None else None, registro)
+        response_cache.set(chave, registro)
+
+    data_source_total.inc(resource, fonte)
+    logging.info("Fonte dos dados de %s: %s", resource, fonte, extra=AMOSTRADO)
+    return registro
+
+
+async def get_resource_data(resource: str, ano: Optional[str] = None, formato: str = "texto") -> Dict:
     """
     Obter dados do recurso solicitado para o ano informado, via scraping online ou fallback local.
     Caso a requisição principal falhe (timeout, 404 ou 500), utiliza fallback local em arquivo JSON correspondente.
@@ -28,6 +365,14 @@ def get_resource_data(resource: str, ano: Optional[str] = None) -> Dict:
       2. Se falhar, tenta carregar backup local (CSV/JSON) filtrado pelo ano.
       3. Se ambos falharem, retorna erro 503 amigável.
 
+    Respostas online ficam em cache por (recurso, ano) durante CACHE_TTL_SECONDS.
+    Com CACHE_STALE_WHILE_REVALIDATE ativo, uma entrada expirada é devolvida
+    imediatamente enquanto uma atualização é feita em segundo plano.
+    Chamadas concorrentes para o mesmo (recurso, ano) compartilham uma única raspagem.
+    Com o circuit breaker aberto (falhas consecutivas do site) ou com a fila de requisições
+    ao site cheia (UPSTREAM_MAX_QUEUE), o backup local é usado diretamente, sem aguardar o
+    timeout da requisição.
+
     O ano default é definido conforme o recurso:
       - 'importacao' e 'exportacao': ano default 2024
       - Demais recursos: ano default 2023
@@ -38,48 +383,109 @@ def get_resource_data(resource: str, ano: Optional[str] = None) -> Dict:
     Args:
         resource (str): Nome do recurso (producao, processamento, comercializacao, importacao, exportacao).
         ano (Optional[str]): Ano desejado. Se None ou inválido, aplica default conforme o recurso.
+        formato (str): "texto" (padrão, valores como no site) ou "numerico" (valores int/float nativos).
 
     Returns:
         dict: Resposta padronizada com as chaves:
             - fonte (str): 'online' ou 'local'.
             - timestamp (str): Data/hora da consulta (UTC, formato ISO8601).
             - ano (int): Ano efetivo dos dados.
-            - valor_total (str): Valor total do recurso.
+            - valor_total (str | int | float): Valor total do recurso.
             - dados (list): Lista de registros conforme o recurso.
 
     Raises:
         HTTPException: 503 se dados indisponíveis online e local.
     """
-    # Definir ano padrão por recurso
-    if resource in ("importacao", "exportacao"):
-        ano_padrao = "2024"
-        ano_min, ano_max = 1970, 2024
-    else:
-        ano_padrao = "2023"
-        ano_min, ano_max = 1970, 2023
-    ano = str(ano) if ano else ano_padrao
-    if not (ano.isdigit() and ano_min <= int(ano) <= ano_max):
-        ano = ano_padrao
-    try:
-        resultado = scrape_table(resource, ano)
-        fonte = "online"
-    except Exception as e:
-        logging.warning(f"[FALLBACK] Scraping falhou, tentando backup local: {e}")
-        try:
-            resultado = load_backup(resource, ano)
-            fonte = "local"
-        except Exception as e2:
-            logging.error(f"[FALLBACK] Backup local também falhou: {e2}")
-            from fastapi import HTTPException
-            raise HTTPException(status_code=503, detail="Dados indisponíveis no momento (falha online e local).")
-    # Monta o dicionário na ordem desejada, SEM OrderedDict
-    resp = {
-        "fonte": fonte,
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "ano": resultado.get("ano"),
-        "valor_total": resultado.get("valor_total", "-"),
-        "dados": resultado.get("dados", [])
-    }
+    registro = await obter_registro(resource, ano)
+    return formatar_resposta(registro, formato)
+
+
+def cache_control(resource: str, ano: int, fonte: str) -> str:
+    """
+    Montar o cabeçalho Cache-Control de uma resposta de dados.
+
+    Anos fechados (anteriores ao último ano disponível do recurso) mudam raramente e
+    recebem validade longa; o ano corrente recebe validade curta. Respostas do fallback
+    local exigem revalidação, para não fixar em caches dados de outra fonte/ano.
+
+    Args:
+        resource (str): Nome do recurso.
+        ano (int): Ano efetivo da resposta.
+        fonte (str): Origem dos dados ("online" ou "local").
+
+    Returns:
+        str: Valor do cabeçalho Cache-Control.
+    """
+    if fonte != "online":
+        return "no-cache"
+    _, ano_max, _ = intervalo_anos(resource)
+    if int(ano) < ano_max:
+        return f"public, max-age={settings.cache_control_closed_year_seconds}"
+    return f"public, max-age={settings.cache_control_current_year_seconds}"
 
-    logging.info(f"Fonte dos dados de {resource}: {fonte}")
-    return resp
+
+def _corpo_e_etag(resposta: Dict, colunas: List[str], media: str) -> Dict:
+    """
+    Serializar uma resposta na representação pedida e calcular seu ETag.
+
+    O ETag (forte) é o hash do conteúdo da representação, sem o timestamp da coleta: o
+    mesmo conteúdo tem sempre o mesmo ETag.
+    """
+    with serialization_duration.time(media):
+        if media == MEDIA_CSV:
+            corpo = conteudo = para_csv(resposta["dados"], colunas)
+        else:
+            if media == MEDIA_COLUNAR:
+                resposta = para_colunar(resposta, colunas)
+            corpo = dumps(resposta)
+            conteudo = dumps({k: v for k, v in resposta.items() if k != "timestamp"})
+    return {"corpo": corpo, "etag": f'"{hashlib.sha256(conteudo).hexdigest()[:32]}"'}
+
+
+def _serializar(registro: Dict, resource: str, formato: str, media: str) -> Dict:
+    """Serializar a resposta completa do registro, uma única vez por formato e representação."""
+    serializado = registro.setdefault("serializado", {})
+    item = serializado.get((formato, media))
+    if item is None:
+        item = serializado[(formato, media)] = _corpo_e_etag(
+            formatar_resposta(registro, formato), colunas_tabela(resource), media
+        )
+    return item
+
+
+async def get_resource_payload(
+    resource: str,
+    ano: Optional[str] = None,
+    formato: str = "texto",
+    media: str = MEDIA_JSON,
+    consulta: Optional[Consulta] = None,
+) -> Dict:
+    """
+    Obter a resposta de get_resource_data já serializada, com ETag e Cache-Control.
+
+    O corpo e o ETag são guardados no próprio registro, de modo que respostas servidas
+    do cache são serializadas uma única vez por (recurso, ano, formato, representação).
+    Com uma consulta (filtros, paginação ou projeção), apenas as linhas selecionadas no
+    índice do registro são serializadas, a cada requisição.
+
+    Args:
+        resource (str): Nome do recurso.
+        ano (str, opcional): Ano de referência.
+        formato (str): Formato dos valores ("texto" ou "numerico").
+        media (str): Representação (ver app.services.formatos): JSON, CSV ou JSON colunar.
+        consulta (Consulta, opcional): Filtros, ordenação, paginação e projeção (ver app.services.consulta).
+
+    Returns:
+        dict: corpo (bytes), etag (str) e cache_control (str).
+
+    Raises:
+        HTTPException: Se ambos scraping e fallback local falharem.
+        ValueError: Se a consulta tiver campo, métrica ou cursor inválidos.
+    """
+    registro = await obter_registro(resource, ano)
+    if consulta is None:
+        item = _serializar(registro, resource, formato, media)
+    else:
+        resposta, colunas = aplicar_consulta(resource, registro, formatar_resposta(registro, formato), consulta)
+        item = _corpo_e_etag(resposta, colunas, media)
+    return {**item, "cache_control": cache_control(resource, registro["ano"], registro["fonte"])}
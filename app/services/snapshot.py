@@ -0,0 +1,104 @@
+"""
+Construção offline do histórico completo (todos os recursos e anos).
+
+Raspa cada (recurso, ano) do site da Embrapa com paralelismo limitado e grava o
+resultado no histórico SQLite usado por load_backup. Combinações já gravadas são
+ignoradas (retomada), de modo que uma execução interrompida pode ser reiniciada.
+
+Uso:
+    python -m app.services.snapshot --ano-inicio 1970 --ano-fim 2024 --concorrencia 4
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from app.adapters.embrapa_scraper import URLS, scrape_table
+from app.adapters.history_store import HistoryStore, history_store
+from app.adapters.http_client import close_client
+from app.services.bulk import montar_celulas
+
+
+async def build_snapshot(
+    recursos: List[str],
+    ano_inicio: int,
+    ano_fim: int,
+    concorrencia: int = 4,
+    retomar: bool = True,
+    tentativas: int = 3,
+    store: Optional[HistoryStore] = None,
+) -> Dict[str, int]:
+    """
+    Raspar e gravar no histórico todas as combinações (recurso, ano) do intervalo.
+
+    Args:
+        recursos (list of str): Recursos a raspar.
+        ano_inicio (int): Ano inicial (inclusive).
+        ano_fim (int): Ano final (inclusive).
+        concorrencia (int): Máximo de raspagens simultâneas.
+        retomar (bool): Se True, ignora combinações já presentes no histórico.
+        tentativas (int): Tentativas por combinação antes de registrar falha.
+        store (HistoryStore, opcional): Histórico de destino. Padrão: HISTORY_DB_PATH.
+
+    Returns:
+        dict: Quantidade de combinações gravadas, ignoradas e com falha.
+    """
+    store = store or history_store
+    store.init()
+    celulas = montar_celulas(recursos, ano_inicio, ano_fim)
+    if retomar:
+        existentes = {resource: store.available_years(resource) for resource in dict.fromkeys(recursos)}
+        pendentes = [(r, a) for r, a in celulas if int(a) not in existentes[r]]
+    else:
+        pendentes = celulas
+    resumo = {"salvos": 0, "ignorados": len(celulas) - len(pendentes), "falhas": 0}
+    logging.info(f"[SNAPSHOT] {len(pendentes)} combinações pendentes, {resumo['ignorados']} já gravadas")
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def processar(resource: str, ano: str) -> None:
+        async with semaforo:
+            for tentativa in range(1, tentativas + 1):
+                try:
+                    resultado = await scrape_table(resource, ano)
+                    break
+                except Exception as e:
+                    logging.warning(f"[SNAPSHOT] {resource} ano={ano} tentativa {tentativa}/{tentativas} falhou: {e}")
+                    if tentativa == tentativas:
+                        resumo["falhas"] += 1
+                        return
+                    await asyncio.sleep(2 ** tentativa)
+        # Gravação fora do semáforo: o SQLite serializa as escritas
+        store.save(resource, int(ano), resultado)
+        resumo["salvos"] += 1
+        logging.info(f"[SNAPSHOT] {resource} ano={ano} gravado ({len(resultado.get('dados', []))} linhas)")
+
+    await asyncio.gather(*(processar(resource, ano) for resource, ano in pendentes))
+    return resumo
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description="Gera o histórico local completo a partir do site da Embrapa.")
+    parser.add_argument("--recursos", nargs="+", default=list(URLS), choices=list(URLS), help="Recursos a raspar (padrão: todos).")
+    parser.add_argument("--ano-inicio", type=int, default=1970, help="Ano inicial (padrão: 1970).")
+    parser.add_argument("--ano-fim", type=int, default=2024, help="Ano final (padrão: 2024).")
+    parser.add_argument("--concorrencia", type=int, default=4, help="Raspagens simultâneas (padrão: 4).")
+    parser.add_argument("--sem-retomar", action="store_true", help="Raspa novamente combinações já gravadas.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    async def executar() -> Dict[str, int]:
+        try:
+            return await build_snapshot(
+                args.recursos, args.ano_inicio, args.ano_fim,
+                concorrencia=args.concorrencia, retomar=not args.sem_retomar,
+            )
+        finally:
+            await close_client()
+
+    resumo = asyncio.run(executar())
+    print(f"Gravados: {resumo['salvos']} | Já existentes: {resumo['ignorados']} | Falhas: {resumo['falhas']}")
+
+
+if __name__ == "__main__":
+    main()
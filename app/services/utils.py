@@ -1,16 +1,119 @@
-import requests
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
 
-def check_site_status() -> bool:
+from app.adapters.embrapa_scraper import URLS
+from app.adapters.history_store import history_store, refresh_store
+from app.adapters.http_client import fetch
+from app.core.config import settings
+
+
+# Último resultado da sonda do site da Embrapa, atualizado em segundo plano
+_estado_site: Dict = {
+    "status": "desconhecido",
+    "verificado_em": None,
+    "latencia_ms": None,
+    "backup_local": False,
+}
+_tarefa_sonda: Optional[asyncio.Task] = None
+
+
+async def check_site_status(timeout: float = 10) -> bool:
     """
     Verificar se o site da Embrapa está online.
 
+    Args:
+        timeout (float): Tempo máximo da verificação (em segundos).
+
     Returns:
         bool: True se o site estiver online, False caso contrário.
     """
-    """Verifica se o site da Embrapa está online."""
     try:
-        resp = requests.get("http://vitibrasil.cnpuv.embrapa.br", timeout=10)
+        resp = await fetch(settings.embrapa_base_url, timeout=timeout)
         return resp.status_code == 200
     except Exception:
         return False
 
+
+def _backup_local_disponivel() -> bool:
+    """Indicar se há dados locais (histórico SQLite ou backups JSON) para o fallback."""
+    return history_store.exists() or refresh_store.exists() or any(
+        os.path.exists(os.path.join(settings.backup_path, f"{resource}.json")) for resource in URLS
+    )
+
+
+async def probe_site() -> Dict:
+    """
+    Executar uma verificação do site da Embrapa e gravar o resultado no estado em memória.
+
+    Returns:
+        dict: Estado atualizado (status, verificado_em, latencia_ms, backup_local).
+    """
+    inicio = time.perf_counter()
+    online = await check_site_status(timeout=settings.health_probe_timeout_seconds)
+    _estado_site.update(
+        status="online" if online else "offline",
+        verificado_em=datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        latencia_ms=round((time.perf_counter() - inicio) * 1000, 1),
+        backup_local=_backup_local_disponivel(),
+    )
+    return get_site_status()
+
+
+async def _sondar_periodicamente(intervalo: float) -> None:
+    while True:
+        try:
+            await probe_site()
+        except Exception as e:
+            logging.warning(f"[HEALTH] Falha na sonda do site da Embrapa: {e}")
+        await asyncio.sleep(intervalo)
+
+
+def start_site_probe() -> asyncio.Task:
+    """
+    Iniciar a sonda periódica do site da Embrapa (HEALTH_PROBE_INTERVAL_SECONDS).
+
+    Returns:
+        asyncio.Task: Tarefa da sonda (a mesma, se já estiver em execução).
+    """
+    global _tarefa_sonda
+    if _tarefa_sonda is None or _tarefa_sonda.done():
+        _tarefa_sonda = asyncio.create_task(_sondar_periodicamente(settings.health_probe_interval_seconds))
+    return _tarefa_sonda
+
+
+async def stop_site_probe() -> None:
+    """Interromper a sonda periódica, se estiver em execução."""
+    global _tarefa_sonda
+    if _tarefa_sonda is not None:
+        _tarefa_sonda.cancel()
+        try:
+            await _tarefa_sonda
+        except asyncio.CancelledError:
+            pass
+        _tarefa_sonda = None
+
+
+def get_site_status() -> Dict:
+    """
+    Retornar o último estado conhecido do site da Embrapa, sem acessar a rede.
+
+    Returns:
+        dict: status ("online", "offline" ou "desconhecido" antes da primeira sonda),
+        verificado_em, latencia_ms e backup_local.
+    """
+    return dict(_estado_site)
+
+
+def is_ready() -> bool:
+    """
+    Indicar se a instância está pronta para receber tráfego.
+
+    Pronta quando a sonda já rodou ao menos uma vez e há uma fonte de dados: o site
+    online ou dados locais para o fallback.
+    """
+    estado = _estado_site
+    return estado["verificado_em"] is not None and (estado["status"] == "online" or estado["backup_local"])
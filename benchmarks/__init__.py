@@ -0,0 +1 @@
+# Benchmarks e ferramentas de carga (não fazem parte da aplicação)
@@ -0,0 +1,219 @@
+"""
+Benchmark de carga da API contra o servidor fake da Embrapa (sem rede).
+
+Sobe o FakeEmbrapaServer no mesmo processo, aponta EMBRAPA_BASE_URL para ele e
+dispara requisições concorrentes às rotas de dados pelo ASGI da aplicação (httpx), em
+três cenários:
+
+- cache_frio: cache vazio, cada requisição pede um ano diferente (toda resposta raspa o site fake);
+- cache_quente: cache aquecido, requisições repetidas ao ano padrão de cada recurso;
+- upstream_fora: site fake respondendo 500 em todas as requisições (fallback local e circuit breaker).
+
+Para cada cenário e rota, reporta req/s e latências p50/p95/p99, e grava tudo em JSON
+para comparar execuções entre versões (``--comparar``).
+
+Uso:
+    python -m benchmarks.bench_carga [--requisicoes 50] [--concorrencia 16] [--latencia-ms 80]
+        [--variacao-ms 40] [--cenarios cache_frio cache_quente upstream_fora]
+        [--saida benchmarks/resultados/carga.json] [--comparar resultado_anterior.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.adapters.embrapa_scraper import URLS
+from app.adapters.http_client import close_client
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.main import app
+from app.services.scraping import circuit_breaker, intervalo_anos, response_cache, upstream_flight
+from benchmarks.fake_embrapa import FakeEmbrapaServer
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIR_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+CENARIOS = ("cache_frio", "cache_quente", "upstream_fora")
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil ``p`` (0-100) pelo método nearest-rank; ``valores`` deve estar ordenado."""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[indice]
+
+
+def _requisicoes(cenario: str, quantidade: int) -> List[Tuple[str, Dict]]:
+    """Montar as requisições (rota, parâmetros) do cenário, intercalando os recursos."""
+    por_recurso = []
+    for resource in URLS:
+        ano_min, ano_max, ano_padrao = intervalo_anos(resource)
+        if cenario == "cache_quente":
+            anos = [ano_padrao] * quantidade
+        else:
+            # Anos distintos (do mais recente para o mais antigo): nenhuma resposta vem do cache
+            anos = [str(ano_max - i % (ano_max - ano_min + 1)) for i in range(quantidade)]
+        por_recurso.append([(f"/v1/{resource}", {"ano": ano}) for ano in anos])
+    return [req for grupo in zip(*por_recurso) for req in grupo]
+
+
+async def _executar_cenario(
+    cliente: httpx.AsyncClient, servidor: FakeEmbrapaServer, cenario: str, quantidade: int, concorrencia: int
+) -> Dict:
+    response_cache.clear()
+    upstream_flight.reset()
+    circuit_breaker.reset()
+    servidor.taxa_erro = 1.0 if cenario == "upstream_fora" else 0.0
+    requisicoes = _requisicoes(cenario, quantidade)
+    if cenario == "cache_quente":
+        for rota, params in dict.fromkeys((r, tuple(p.items())) for r, p in requisicoes):
+            (await cliente.get(rota, params=dict(params))).raise_for_status()
+
+    amostras: Dict[str, List[Tuple[float, float, int]]] = {}
+    semaforo = asyncio.Semaphore(concorrencia)
+    upstream_antes = servidor.requisicoes
+
+    async def uma(rota: str, params: Dict) -> None:
+        async with semaforo:
+            inicio = time.perf_counter()
+            try:
+                status = (await cliente.get(rota, params=params)).status_code
+            except httpx.HTTPError:
+                status = 0
+            amostras.setdefault(rota, []).append((inicio, time.perf_counter(), status))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma(rota, params) for rota, params in requisicoes))
+    duracao = time.perf_counter() - inicio
+
+    rotas = {}
+    for rota, itens in sorted(amostras.items()):
+        latencias = sorted(fim - ini for ini, fim, _ in itens)
+        janela = max(fim for _, fim, _ in itens) - min(ini for ini, _, _ in itens)
+        rotas[rota] = {
+            "requisicoes": len(itens),
+            "req_s": round(len(itens) / janela, 1) if janela > 0 else None,
+            "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+            "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+            "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+            "status": {str(s): n for s, n in sorted(Counter(s for _, _, s in itens).items())},
+        }
+    todas = sorted(fim - ini for itens in amostras.values() for ini, fim, _ in itens)
+    return {
+        "requisicoes": len(requisicoes),
+        "duracao_s": round(duracao, 3),
+        "req_s": round(len(requisicoes) / duracao, 1),
+        "p50_ms": round(percentil(todas, 50) * 1000, 2),
+        "p95_ms": round(percentil(todas, 95) * 1000, 2),
+        "p99_ms": round(percentil(todas, 99) * 1000, 2),
+        "requisicoes_upstream": servidor.requisicoes - upstream_antes,
+        "rotas": rotas,
+    }
+
+
+async def executar(
+    cenarios: List[str], quantidade: int, concorrencia: int, latencia_ms: float, variacao_ms: float
+) -> Dict[str, Dict]:
+    """
+    Executar os cenários contra o servidor fake.
+
+    Args:
+        cenarios (list of str): Cenários (ver CENARIOS), na ordem de execução.
+        quantidade (int): Requisições por rota em cada cenário.
+        concorrencia (int): Requisições simultâneas.
+        latencia_ms (float): Latência fixa do site fake.
+        variacao_ms (float): Latência aleatória adicional máxima do site fake.
+
+    Returns:
+        dict: Resultado por cenário.
+    """
+    token = create_access_token({"sub": "bench"})
+    url_original = settings.embrapa_base_url
+    # Um único usuário dispara todas as requisições: o limite por usuário distorceria a medição
+    limite_original = settings.rate_limit_enabled
+    settings.rate_limit_enabled = False
+    async with FakeEmbrapaServer(latencia_ms=latencia_ms, variacao_ms=variacao_ms) as servidor:
+        settings.embrapa_base_url = servidor.url
+        transporte = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transporte, base_url="http://api", headers={"Authorization": f"Bearer {token}"}, timeout=60
+            ) as cliente:
+                return {c: await _executar_cenario(cliente, servidor, c, quantidade, concorrencia) for c in cenarios}
+        finally:
+            settings.embrapa_base_url = url_original
+            settings.rate_limit_enabled = limite_original
+            await close_client()
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _imprimir(resultados: Dict[str, Dict], anterior: Optional[Dict] = None) -> None:
+    print(f"{'cenário':<15}{'rota':<22}{'req/s':>9}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}  status")
+    for cenario, r in resultados.items():
+        for rota, m in [*r["rotas"].items(), ("(todas)", r)]:
+            linha = (
+                f"{cenario:<15}{rota:<22}{m['req_s'] or 0:>9.1f}{m['p50_ms']:>10.1f}{m['p95_ms']:>10.1f}{m['p99_ms']:>10.1f}"
+                f"  {m.get('status', '')}"
+            )
+            base = (anterior or {}).get(cenario, {})
+            base = base if rota == "(todas)" else base.get("rotas", {}).get(rota)
+            if base and base.get("req_s") and m["req_s"] and base.get("p95_ms"):
+                linha += f"  (req/s {m['req_s'] / base['req_s'] - 1:+.0%}, p95 {m['p95_ms'] / base['p95_ms'] - 1:+.0%})"
+            print(linha)
+        print(f"{cenario:<15}requisições ao site fake: {r['requisicoes_upstream']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de carga da API contra o servidor fake da Embrapa.")
+    parser.add_argument("--requisicoes", type=int, default=50, help="Requisições por rota em cada cenário (padrão: 50).")
+    parser.add_argument("--concorrencia", type=int, default=16, help="Requisições simultâneas (padrão: 16).")
+    parser.add_argument("--latencia-ms", type=float, default=80.0, help="Latência fixa do site fake, em ms (padrão: 80).")
+    parser.add_argument("--variacao-ms", type=float, default=40.0, help="Latência aleatória adicional do site fake, em ms.")
+    parser.add_argument("--cenarios", nargs="+", choices=CENARIOS, default=list(CENARIOS), help="Cenários executados.")
+    parser.add_argument("--saida", help="Arquivo JSON de resultados (padrão: benchmarks/resultados/carga_<data>.json).")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar req/s e p95.")
+    args = parser.parse_args()
+    # Os logs por requisição distorceriam a medição
+    logging.disable(logging.CRITICAL)
+
+    resultados = asyncio.run(executar(args.cenarios, args.requisicoes, args.concorrencia, args.latencia_ms, args.variacao_ms))
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)["cenarios"]
+    _imprimir(resultados, anterior)
+
+    saida = args.saida or os.path.join(DIR_RESULTADOS, f"carga_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    documento = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "versao": app.version,
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "comparar")},
+        "cenarios": resultados,
+    }
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(documento, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
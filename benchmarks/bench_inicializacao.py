@@ -0,0 +1,209 @@
+"""
+Relatório do tempo de inicialização da API (cold start), com verificação de limites.
+
+Cada medição roda em um processo Python novo, como um worker recém-criado após o
+scale-to-zero, com o site da Embrapa substituído pelo FakeEmbrapaServer (sem rede):
+
+- importação de app.main, com o tempo de ``-X importtime`` agrupado por pacote;
+- lifespan (logs, chave JWT, sonda e cache compartilhado);
+- primeira requisição de dados (cache vazio: raspagem do site fake, com a importação
+  tardia do parser HTML) e a segunda, já do cache.
+
+A verificação falha (código de saída 1) se algum módulo pesado (pandas, bs4, lxml, numpy)
+for carregado na importação, se a importação criar arquivos ou diretórios (ex.: logs) ou
+se a mediana dos tempos passar dos limites.
+
+Uso:
+    python -m benchmarks.bench_inicializacao [--repeticoes 3] [--max-importacao-ms 2000]
+        [--max-primeira-requisicao-ms 1500] [--top 15] [--saida resultado.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULOS_PESADOS = ("pandas", "numpy", "bs4", "lxml")
+
+# Executado no processo medido: só a biblioteca padrão é importada antes de app.main
+_CODIGO_FILHO = r"""
+import json, os, sys, time
+inicio = time.perf_counter()
+import app.main
+importado = time.perf_counter()
+pesados = sorted(m for m in json.loads(sys.argv[1]) if m in sys.modules)
+criados = os.path.exists(os.path.dirname(os.environ["LOG_PATH"]))
+from fastapi.testclient import TestClient
+from app.core.security import create_access_token
+cabecalhos = {"Authorization": "Bearer " + create_access_token({"sub": "bench"})}
+antes = time.perf_counter()
+with TestClient(app.main.app) as cliente:
+    pronto = time.perf_counter()
+    primeira = cliente.get("/v1/producao", params={"ano": "2023"}, headers=cabecalhos)
+    t_primeira = time.perf_counter()
+    segunda = cliente.get("/v1/producao", params={"ano": "2023"}, headers=cabecalhos)
+    t_segunda = time.perf_counter()
+print(json.dumps({
+    "importacao_ms": (importado - inicio) * 1000,
+    "lifespan_ms": (pronto - antes) * 1000,
+    "primeira_requisicao_ms": (t_primeira - pronto) * 1000,
+    "segunda_requisicao_ms": (t_segunda - t_primeira) * 1000,
+    "status": [primeira.status_code, segunda.status_code],
+    "fonte": primeira.json().get("fonte"),
+    "modulos_pesados": pesados,
+    "arquivos_na_importacao": criados,
+}))
+"""
+
+
+def agrupar_importtime(saida: str, raiz: str = "app.main") -> Tuple[List[Tuple[str, float]], List[Tuple[str, float]]]:
+    """
+    Agrupar a saída de ``-X importtime`` até a conclusão do módulo ``raiz``.
+
+    Args:
+        saida (str): stderr do processo executado com ``-X importtime``.
+        raiz (str): Último módulo considerado (os imports seguintes são do próprio relatório).
+
+    Returns:
+        tuple: (tempo próprio em ms por pacote de primeiro nível, tempo próprio em ms por
+        módulo), ambos em ordem decrescente.
+    """
+    por_pacote: Dict[str, float] = {}
+    por_modulo: Dict[str, float] = {}
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, _, nome = linha[len("import time:"):].split("|")
+        modulo = nome.strip()
+        por_modulo[modulo] = int(proprio) / 1000
+        pacote = modulo.split(".")[0]
+        por_pacote[pacote] = por_pacote.get(pacote, 0.0) + int(proprio) / 1000
+        if modulo == raiz:
+            break
+    ordenar = lambda d: sorted(d.items(), key=lambda item: item[1], reverse=True)  # noqa: E731
+    return ordenar(por_pacote), ordenar(por_modulo)
+
+
+async def _executar_filho(url: str, importtime: bool) -> Tuple[Dict, str]:
+    with tempfile.TemporaryDirectory() as temporario:
+        env = {
+            **os.environ,
+            "EMBRAPA_BASE_URL": url,
+            "REFRESH_ENABLED": "false",
+            "LOG_PATH": os.path.join(temporario, "logs", "app.log"),
+            "PYTHONPATH": RAIZ,
+        }
+        argumentos = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", _CODIGO_FILHO]
+        processo = await asyncio.create_subprocess_exec(
+            *argumentos, json.dumps(MODULOS_PESADOS), cwd=RAIZ, env=env,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        inicio = time.perf_counter()
+        stdout, stderr = await processo.communicate()
+        total = (time.perf_counter() - inicio) * 1000
+    if processo.returncode != 0:
+        raise RuntimeError(f"Processo medido falhou ({processo.returncode}):\n{stderr.decode(errors='replace')[-2000:]}")
+    resultado = json.loads(stdout.decode().strip().splitlines()[-1])
+    resultado["processo_ms"] = total
+    return resultado, stderr.decode(errors="replace")
+
+
+async def medir(repeticoes: int = 3) -> Dict:
+    """
+    Medir a inicialização em processos novos.
+
+    Args:
+        repeticoes (int): Processos medidos (a mediana de cada tempo é reportada).
+
+    Returns:
+        dict: Medianas dos tempos (ms), status e fonte da primeira requisição, módulos
+        pesados carregados na importação, arquivos criados na importação e o tempo de
+        importação por pacote e por módulo.
+    """
+    from benchmarks.fake_embrapa import FakeEmbrapaServer
+
+    async with FakeEmbrapaServer() as servidor:
+        # Uma execução extra com -X importtime, fora das medianas (o próprio importtime pesa)
+        detalhe, stderr = await _executar_filho(servidor.url, importtime=True)
+        execucoes = [(await _executar_filho(servidor.url, importtime=False))[0] for _ in range(repeticoes)]
+    por_pacote, por_modulo = agrupar_importtime(stderr)
+    tempos = ("importacao_ms", "lifespan_ms", "primeira_requisicao_ms", "segunda_requisicao_ms", "processo_ms")
+    return {
+        **{t: round(statistics.median(e[t] for e in execucoes), 1) for t in tempos},
+        "status": sorted({s for e in execucoes for s in e["status"]}),
+        "fonte": detalhe["fonte"],
+        "modulos_pesados": sorted({m for e in [detalhe, *execucoes] for m in e["modulos_pesados"]}),
+        "arquivos_na_importacao": any(e["arquivos_na_importacao"] for e in [detalhe, *execucoes]),
+        "importacao_por_pacote_ms": [(p, round(ms, 1)) for p, ms in por_pacote],
+        "importacao_por_modulo_ms": [(m, round(ms, 1)) for m, ms in por_modulo],
+    }
+
+
+def verificar(resultado: Dict, max_importacao_ms: Optional[float], max_primeira_requisicao_ms: Optional[float]) -> List[str]:
+    """
+    Conferir o resultado de ``medir`` com os limites.
+
+    Args:
+        resultado (dict): Resultado de ``medir``.
+        max_importacao_ms (float, opcional): Limite da mediana da importação (None não verifica).
+        max_primeira_requisicao_ms (float, opcional): Limite da mediana da primeira requisição (None não verifica).
+
+    Returns:
+        list of str: Violações encontradas (vazia se a inicialização está dentro dos limites).
+    """
+    violacoes = []
+    if resultado["modulos_pesados"]:
+        violacoes.append(f"Módulos pesados carregados na importação de app.main: {', '.join(resultado['modulos_pesados'])}")
+    if resultado["arquivos_na_importacao"]:
+        violacoes.append("A importação de app.main criou arquivos (a inicialização deve ficar no lifespan).")
+    if resultado["status"] != [200]:
+        violacoes.append(f"Requisições com status inesperado: {resultado['status']}")
+    if max_importacao_ms is not None and resultado["importacao_ms"] > max_importacao_ms:
+        violacoes.append(f"Importação em {resultado['importacao_ms']} ms (limite: {max_importacao_ms} ms)")
+    if max_primeira_requisicao_ms is not None and resultado["primeira_requisicao_ms"] > max_primeira_requisicao_ms:
+        violacoes.append(
+            f"Primeira requisição em {resultado['primeira_requisicao_ms']} ms (limite: {max_primeira_requisicao_ms} ms)"
+        )
+    return violacoes
+
+
+def _imprimir(resultado: Dict, top: int) -> None:
+    print(f"{'etapa':<28}{'mediana (ms)':>14}")
+    for etapa in ("importacao_ms", "lifespan_ms", "primeira_requisicao_ms", "segunda_requisicao_ms", "processo_ms"):
+        print(f"{etapa[:-3]:<28}{resultado[etapa]:>14.1f}")
+    print(f"\nImportação por pacote (tempo próprio, top {top}):")
+    for pacote, ms in resultado["importacao_por_pacote_ms"][:top]:
+        print(f"  {pacote:<40}{ms:>10.1f}")
+    print(f"\nImportação por módulo (tempo próprio, top {top}):")
+    for modulo, ms in resultado["importacao_por_modulo_ms"][:top]:
+        print(f"  {modulo:<40}{ms:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Relatório e verificação do tempo de inicialização da API.")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Processos medidos (padrão: 3).")
+    parser.add_argument("--max-importacao-ms", type=float, default=2000.0, help="Limite da importação de app.main.")
+    parser.add_argument("--max-primeira-requisicao-ms", type=float, default=1500.0, help="Limite da primeira requisição.")
+    parser.add_argument("--top", type=int, default=15, help="Pacotes e módulos listados no detalhamento.")
+    parser.add_argument("--saida", help="Arquivo JSON para gravar o resultado.")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(medir(args.repeticoes))
+    _imprimir(resultado, args.top)
+    if args.saida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+    violacoes = verificar(resultado, args.max_importacao_ms, args.max_primeira_requisicao_ms)
+    for violacao in violacoes:
+        print(f"FALHA: {violacao}", file=sys.stderr)
+    sys.exit(1 if violacoes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark do custo de validação de JWT por requisição.
+
+Compara, para HS256 e RS256 (par de chaves temporário), a validação completa
+(jwt.decode a cada chamada, como antes do cache) com verify_token usando o cache
+de tokens validados.
+
+Uso:
+    python -m benchmarks.bench_jwt [--repeticoes 5000]
+"""
+import argparse
+import os
+import tempfile
+import timeit
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+
+from app.core import security
+from app.core.config import settings
+
+
+def _gerar_chaves(diretorio: str) -> None:
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    privada, publica = os.path.join(diretorio, "priv.pem"), os.path.join(diretorio, "pub.pem")
+    with open(privada, "wb") as f:
+        f.write(chave.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    with open(publica, "wb") as f:
+        f.write(chave.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo))
+    settings.jwt_private_key_path, settings.jwt_public_key_path = privada, publica
+
+
+def _medir(algoritmo: str, repeticoes: int) -> tuple:
+    settings.jwt_algorithm = algoritmo
+    security.reset_security_state()
+    token = security.create_access_token({"sub": "bench"})
+    chave = security._chave_verificacao()
+    sem_cache = timeit.timeit(lambda: jwt.decode(token, chave, algorithms=[algoritmo]), number=repeticoes)
+    security.verify_token(token)
+    com_cache = timeit.timeit(lambda: security.verify_token(token), number=repeticoes)
+    return sem_cache / repeticoes * 1e6, com_cache / repeticoes * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mede o custo de validação de JWT com e sem cache.")
+    parser.add_argument("--repeticoes", type=int, default=5000, help="Validações por cenário (padrão: 5000).")
+    args = parser.parse_args()
+
+    print(f"{'algoritmo':<10}{'decode (µs)':>14}{'cache (µs)':>14}{'ganho':>9}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        _gerar_chaves(diretorio)
+        for algoritmo in ("HS256", "RS256"):
+            sem_cache, com_cache = _medir(algoritmo, args.repeticoes)
+            print(f"{algoritmo:<10}{sem_cache:>14.1f}{com_cache:>14.1f}{sem_cache / com_cache:>8.1f}x")
+    security.reset_security_state()
+
+
+if __name__ == "__main__":
+    main()
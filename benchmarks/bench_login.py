@@ -0,0 +1,95 @@
+"""
+Benchmark de login: latência e vazão por custo do hash de senha (PASSWORD_HASH_COST).
+
+Para cada custo, cadastra um usuário em um repositório temporário e dispara logins
+simultâneos via authenticate_user (sem e com o cache de verificações), medindo
+p50/p95, logins por segundo e o maior atraso observado no event loop, que deve
+ficar baixo porque o hash roda no pool de threads.
+
+Uso:
+    python -m benchmarks.bench_login [--custos 10 12 14 15] [--logins 64] [--workers 4]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from app.adapters.user_store import SQLiteUserRepository
+from app.core import passwords
+from app.core.config import settings
+from app.services.auth import add_user, authenticate_user, set_user_repository
+
+
+async def _monitorar_loop(parar: asyncio.Event, atrasos: List[float], intervalo: float = 0.005) -> None:
+    """Medir quanto cada tique do event loop atrasou em relação ao intervalo esperado."""
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        atrasos.append(time.perf_counter() - inicio - intervalo)
+
+
+async def _rodada(logins: int, senha: str) -> Dict:
+    latencias: List[float] = []
+
+    async def um_login() -> None:
+        inicio = time.perf_counter()
+        if not await authenticate_user("bench", senha):
+            raise SystemExit("Login do benchmark falhou")
+        latencias.append(time.perf_counter() - inicio)
+
+    atrasos: List[float] = []
+    parar = asyncio.Event()
+    monitor = asyncio.create_task(_monitorar_loop(parar, atrasos))
+    inicio = time.perf_counter()
+    await asyncio.gather(*(um_login() for _ in range(logins)))
+    total = time.perf_counter() - inicio
+    parar.set()
+    await monitor
+    latencias.sort()
+    return {
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p95_ms": latencias[int(len(latencias) * 0.95) - 1] * 1000,
+        "logins_s": logins / total,
+        "atraso_loop_ms": max(atrasos, default=0.0) * 1000,
+    }
+
+
+async def _medir(custo: int, logins: int, diretorio: str) -> Dict[str, Dict]:
+    settings.password_hash_cost = custo
+    set_user_repository(SQLiteUserRepository(os.path.join(diretorio, f"users_{custo}.sqlite3")))
+    await add_user("bench", "senha-de-benchmark")
+    passwords.clear_verification_cache()
+    # Sem cache: cada login concorrente calcula o KDF (são disparados antes de qualquer um concluir)
+    frio = await _rodada(logins, "senha-de-benchmark")
+    quente = await _rodada(logins, "senha-de-benchmark")
+    return {"sem cache": frio, "com cache": quente}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mede a latência de login por custo do hash de senha.")
+    parser.add_argument("--custos", type=int, nargs="+", default=[10, 12, 14, 15], help="Custos (log2 N) a medir.")
+    parser.add_argument("--logins", type=int, default=64, help="Logins simultâneos por rodada (padrão: 64).")
+    parser.add_argument("--workers", type=int, default=settings.password_hash_workers, help="Threads do pool de hashing.")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    settings.password_hash_workers = args.workers
+    passwords.shutdown_executor()
+
+    print(f"{'custo':>5}  {'modo':<10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'logins/s':>10}{'atraso loop (ms)':>18}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for custo in args.custos:
+            for modo, r in asyncio.run(_medir(custo, args.logins, diretorio)).items():
+                print(
+                    f"{custo:>5}  {modo:<10}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+                    f"{r['logins_s']:>10.1f}{r['atraso_loop_ms']:>18.1f}"
+                )
+            passwords.shutdown_executor()
+    set_user_repository(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark dos backends de extração da tabela HTML (BeautifulSoup x lxml).
+
+Usa as páginas salvas em tests/fixtures/embrapa, confere que os dois backends
+produzem o mesmo resultado e mede o tempo médio de parse_table por página.
+
+Uso:
+    python -m benchmarks.bench_parsers [--repeticoes 200]
+"""
+import argparse
+import glob
+import logging
+import os
+import timeit
+
+from app.adapters.embrapa_scraper import PARSERS, parse_table
+
+DIR_FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures", "embrapa")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara os backends de extração da tabela HTML.")
+    parser.add_argument("--repeticoes", type=int, default=200, help="Execuções por página e backend (padrão: 200).")
+    args = parser.parse_args()
+    # Os logs por página distorceriam a medição
+    logging.disable(logging.CRITICAL)
+
+    backends = sorted(PARSERS)
+    print(f"{'página':<28}{'KB':>6}" + "".join(f"{b + ' (ms)':>12}" for b in backends) + f"{'ganho':>9}")
+    for caminho in sorted(glob.glob(os.path.join(DIR_FIXTURES, "*.html"))):
+        nome = os.path.basename(caminho)
+        resource, ano = nome[:-5].rsplit("_", 1)
+        with open(caminho, "rb") as f:
+            html = f.read()
+        resultados = {b: parse_table(resource, ano, html, parser=b) for b in backends}
+        if len({repr(r) for r in resultados.values()}) != 1:
+            raise SystemExit(f"Backends divergem para {nome}")
+        tempos = {
+            b: timeit.timeit(lambda b=b: parse_table(resource, ano, html, parser=b), number=args.repeticoes) / args.repeticoes * 1000
+            for b in backends
+        }
+        ganho = f"{tempos['bs4'] / tempos['lxml']:.1f}x" if "lxml" in tempos else "-"
+        print(f"{nome:<28}{len(html) / 1024:>6.1f}" + "".join(f"{tempos[b]:>12.3f}" for b in backends) + f"{ganho:>9}")
+
+
+if __name__ == "__main__":
+    main()
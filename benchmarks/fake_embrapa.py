@@ -0,0 +1,197 @@
+"""
+Servidor HTTP fake do site da Embrapa, para testes e benchmarks sem rede.
+
+Serve as páginas salvas em tests/fixtures/embrapa (geradas por benchmarks.gerar_fixtures)
+em ``/index.php?ano=...&opcao=opt_XX``, para todas as opções de URLS. Anos sem página
+própria recebem a página do recurso disponível (parse_table usa o ano da requisição).
+A latência e a injeção de erros são configuráveis e podem ser alteradas com o servidor
+em execução (ex.: simular o site fora do ar no meio de um benchmark). Caminhos com o
+prefixo ``/redirecionar`` recebem 302 para o mesmo caminho sem o prefixo.
+
+Uso (servidor avulso; aponte a API com EMBRAPA_BASE_URL=http://127.0.0.1:8081):
+    python -m benchmarks.fake_embrapa [--porta 8081] [--latencia-ms 150] [--variacao-ms 50] [--taxa-erro 0.05]
+"""
+import argparse
+import asyncio
+import glob
+import os
+import random
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from app.adapters.embrapa_scraper import URLS
+
+DIR_FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures", "embrapa")
+TIPOS_ERRO = ("500", "reset")
+
+_RECURSO_POR_OPCAO = {opcao: resource for resource, opcao in URLS.items()}
+_MOTIVOS = {200: "OK", 302: "Found", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def carregar_fixtures(diretorio: str = DIR_FIXTURES) -> Dict[Tuple[str, str], bytes]:
+    """
+    Carregar as páginas salvas, chaveadas por (recurso, ano).
+
+    Raises:
+        SystemExit: Se faltar página para algum recurso de URLS.
+    """
+    paginas = {}
+    for caminho in glob.glob(os.path.join(diretorio, "*.html")):
+        resource, ano = os.path.basename(caminho)[:-5].rsplit("_", 1)
+        with open(caminho, "rb") as f:
+            paginas[(resource, ano)] = f.read()
+    faltando = set(URLS) - {resource for resource, _ in paginas}
+    if faltando:
+        raise SystemExit(f"Fixtures ausentes para {sorted(faltando)}; gere com python -m benchmarks.gerar_fixtures")
+    return paginas
+
+
+class FakeEmbrapaServer:
+    """
+    Servidor HTTP/1.1 mínimo (asyncio, keep-alive) que imita o site da Embrapa.
+
+    Args:
+        host (str): Endereço de escuta.
+        port (int): Porta (0 escolhe uma porta livre).
+        latencia_ms (float): Atraso fixo antes de cada resposta.
+        variacao_ms (float): Atraso adicional aleatório (0 a variacao_ms).
+        taxa_erro (float): Fração das requisições que falham (0 a 1).
+        tipo_erro (str): "500" (resposta de erro) ou "reset" (conexão fechada sem resposta).
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latencia_ms: float = 0.0,
+        variacao_ms: float = 0.0,
+        taxa_erro: float = 0.0,
+        tipo_erro: str = "500",
+    ):
+        if tipo_erro not in TIPOS_ERRO:
+            raise ValueError(f"tipo_erro inválido: {tipo_erro}. Opções: {', '.join(TIPOS_ERRO)}.")
+        self.host = host
+        self.port = port
+        self.latencia_ms = latencia_ms
+        self.variacao_ms = variacao_ms
+        self.taxa_erro = taxa_erro
+        self.tipo_erro = tipo_erro
+        self.paginas = carregar_fixtures()
+        self.requisicoes = 0
+        self.erros = 0
+        self._servidor: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        """URL base para EMBRAPA_BASE_URL."""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "FakeEmbrapaServer":
+        """Iniciar o servidor; com port=0, ``port`` passa a ter a porta escolhida."""
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.port)
+        self.port = self._servidor.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        """Parar o servidor."""
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+
+    async def __aenter__(self) -> "FakeEmbrapaServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def _pagina(self, alvo: str) -> Tuple[int, bytes]:
+        partes = urlsplit(alvo)
+        if partes.path in ("", "/"):
+            return 200, b"<html><body>Vitibrasil</body></html>"
+        if partes.path != "/index.php":
+            return 404, b"Not Found"
+        query = parse_qs(partes.query)
+        resource = _RECURSO_POR_OPCAO.get(query.get("opcao", [""])[0])
+        if resource is None:
+            return 404, b"Not Found"
+        ano = query.get("ano", [""])[0]
+        pagina = self.paginas.get((resource, ano))
+        if pagina is None:
+            pagina = next(conteudo for (r, _), conteudo in sorted(self.paginas.items()) if r == resource)
+        return 200, pagina
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                metodo, alvo, _ = linha.decode("latin-1").split(" ", 2)
+                fechar = False
+                while True:
+                    cabecalho = await reader.readline()
+                    if cabecalho in (b"\r\n", b"\n", b""):
+                        break
+                    if cabecalho.lower().startswith(b"connection:") and b"close" in cabecalho.lower():
+                        fechar = True
+
+                self.requisicoes += 1
+                destino = None
+                atraso = self.latencia_ms + random.uniform(0, self.variacao_ms)
+                if atraso > 0:
+                    await asyncio.sleep(atraso / 1000)
+                if self.taxa_erro > 0 and random.random() < self.taxa_erro:
+                    self.erros += 1
+                    if self.tipo_erro == "reset":
+                        break
+                    status, corpo = 500, b"Internal Server Error"
+                elif metodo != "GET":
+                    status, corpo = 405, b"Method Not Allowed"
+                elif alvo.startswith("/redirecionar/"):
+                    status, corpo, destino = 302, b"", alvo[len("/redirecionar"):]
+                else:
+                    status, corpo = self._pagina(alvo)
+
+                cabecalhos = (
+                    f"HTTP/1.1 {status} {_MOTIVOS[status]}\r\n"
+                    f"Content-Type: text/html; charset=utf-8\r\n"
+                    f"Content-Length: {len(corpo)}\r\n"
+                    + (f"Location: {destino}\r\n" if destino else "")
+                    + f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n"
+                )
+                writer.write(cabecalhos.encode("latin-1") + corpo)
+                await writer.drain()
+                if fechar:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _executar(args: argparse.Namespace) -> None:
+    servidor = FakeEmbrapaServer(
+        args.host, args.porta, args.latencia_ms, args.variacao_ms, args.taxa_erro, args.tipo_erro
+    )
+    async with servidor:
+        print(f"Servidor fake da Embrapa em {servidor.url} (Ctrl+C para encerrar)")
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor HTTP fake do site da Embrapa (fixtures locais).")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: 127.0.0.1).")
+    parser.add_argument("--porta", type=int, default=8081, help="Porta (padrão: 8081).")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Atraso fixo por resposta, em ms.")
+    parser.add_argument("--variacao-ms", type=float, default=0.0, help="Atraso aleatório adicional máximo, em ms.")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração das requisições com erro (0 a 1).")
+    parser.add_argument("--tipo-erro", choices=TIPOS_ERRO, default="500", help="Erro injetado: resposta 500 ou conexão fechada.")
+    try:
+        asyncio.run(_executar(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
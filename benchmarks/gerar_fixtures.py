@@ -0,0 +1,120 @@
+"""
+Gera fixtures HTML no layout das páginas do Vitibrasil/Embrapa a partir dos backups em data/.
+
+As páginas reproduzem a estrutura do site (menu de navegação, formulário de ano e a
+tabela ``tb_base tb_dados`` com thead/tbody/tfoot), servindo de entrada offline para
+testes, benchmarks de parsing e para o servidor fake da Embrapa.
+
+Uso:
+    python -m benchmarks.gerar_fixtures
+"""
+import html
+import json
+import os
+from typing import Dict
+
+from app.adapters.embrapa_scraper import URLS
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIR_DADOS = os.path.join(RAIZ, "data")
+DIR_FIXTURES = os.path.join(RAIZ, "tests", "fixtures", "embrapa")
+
+TITULOS = {
+    "producao": "Produção de vinhos, sucos e derivados do Rio Grande do Sul",
+    "processamento": "Quantidade de uvas processadas no Rio Grande do Sul",
+    "comercializacao": "Comercialização de vinhos e derivados no Rio Grande do Sul",
+    "importacao": "Importação de vinhos de mesa",
+    "exportacao": "Exportação de vinhos de mesa",
+}
+MENU = ["Apresentação", "Produção", "Processamento", "Comercialização", "Importação", "Exportação", "Publicação"]
+
+
+def _cabecalho(resource: str, ano: int) -> str:
+    botoes = "".join(
+        f'<td><button type="submit" value="opt_{i + 1:02d}" name="opcao" class="btn_opt">{nome}</button></td>'
+        for i, nome in enumerate(MENU)
+    )
+    ano_max = 2024 if resource in ("importacao", "exportacao") else 2023
+    opcoes = "".join(
+        f'<option value="{a}"{" selected" if a == ano else ""}>{a}</option>' for a in range(1970, ano_max + 1)
+    )
+    return (
+        "<!DOCTYPE html><html lang=\"pt-br\"><head>"
+        "<meta http-equiv=\"Content-Type\" content=\"text/html; charset=utf-8\">"
+        "<title>Banco de dados de uva, vinho e derivados</title>"
+        "<link rel=\"stylesheet\" href=\"css/estilo.css\"><script src=\"js/jquery.min.js\"></script>"
+        "</head><body><div id=\"cabecalho\"><img src=\"img/embrapa.png\" alt=\"Embrapa\">"
+        "<h1>Banco de dados de uva, vinho e derivados</h1></div>"
+        f"<form method=\"post\" action=\"index.php\"><table class=\"tb_base tb_header\"><tr>{botoes}</tr></table></form>"
+        "<div class=\"content_center\">"
+        f"<p class=\"text_center\">{html.escape(TITULOS[resource])} [{ano}]</p>"
+        f"<form method=\"post\" action=\"index.php?opcao={URLS[resource]}\"><table class=\"tb_base tb_filtro\"><tr>"
+        f"<td><label class=\"lbl_pesq\">Ano: [1970-{ano_max}]</label><select name=\"ano\">{opcoes}</select>"
+        "<button type=\"submit\" class=\"btn_pesq\">OK</button></td></tr></table></form>"
+    )
+
+
+def _tabela(resource: str, backup: Dict) -> str:
+    importacao = resource in ("importacao", "exportacao")
+    if importacao:
+        cabecalho = "<th>Países</th><th>Quantidade (Kg)</th><th>Valor (US$)</th>"
+    else:
+        cabecalho = "<th>Produto</th><th>Quantidade (L.)</th>"
+    linhas = []
+    for row in backup["dados"]:
+        if importacao:
+            celulas = [row["País"], row["Quantidade (Kg)"], row["Valor (US$)"]]
+            classe = "tb_item"
+        else:
+            celulas = [row["Produto"], row["Quantidade (L.)"]]
+            classe = "tb_item" if row["Produto"].isupper() else "tb_subitem"
+        tds = "".join(f'<td class="{classe}">\n\t\t\t\t{html.escape(c)}\t\t\t</td>' for c in celulas)
+        linhas.append(f"<tr>{tds}</tr>")
+    if importacao:
+        total_kg = sum(int(r["Quantidade (Kg)"].replace(".", "")) for r in backup["dados"] if r["Quantidade (Kg)"] != "-")
+        rodape = f"<td>Total</td><td>{total_kg:,}".replace(",", ".") + f"</td><td>{backup['valor_total']}</td>"
+    else:
+        rodape = f"<td>Total</td><td>{backup['valor_total']}</td>"
+    return (
+        f"<table class=\"tb_base tb_dados\"><thead><tr>{cabecalho}</tr></thead>"
+        f"<tbody>{''.join(linhas)}</tbody>"
+        f"<tfoot class=\"tb_total\"><tr>{rodape}</tr></tfoot></table>"
+    )
+
+
+def _rodape() -> str:
+    return (
+        "<p class=\"text_center\">Fonte: Embrapa Uva e Vinho</p></div>"
+        "<div id=\"rodape\"><p>Embrapa Uva e Vinho - Rua Livramento, 515 - Bento Gonçalves, RS</p></div>"
+        "</body></html>"
+    )
+
+
+def gerar_pagina(resource: str, backup: Dict) -> str:
+    """
+    Montar a página HTML de um recurso/ano a partir do conteúdo do backup.
+
+    Args:
+        resource (str): Nome do recurso.
+        backup (dict): Conteúdo de data/{resource}.json.
+
+    Returns:
+        str: Página HTML completa.
+    """
+    return _cabecalho(resource, int(backup["ano"])) + _tabela(resource, backup) + _rodape()
+
+
+def main() -> None:
+    """Gerar uma fixture por recurso em tests/fixtures/embrapa."""
+    os.makedirs(DIR_FIXTURES, exist_ok=True)
+    for resource in URLS:
+        with open(os.path.join(DIR_DADOS, f"{resource}.json"), encoding="utf-8") as f:
+            backup = json.load(f)
+        destino = os.path.join(DIR_FIXTURES, f"{resource}_{backup['ano']}.html")
+        with open(destino, "w", encoding="utf-8") as f:
+            f.write(gerar_pagina(resource, backup))
+        print(f"Fixture gerada: {os.path.relpath(destino, RAIZ)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Configuração compartilhada do pytest.
+"""
+import pytest
+from app.core.rate_limit import rate_limiter
+from app.services.scraping import response_cache, upstream_flight, circuit_breaker
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    """Garante que cada teste começa com cache vazio, circuito fechado e contadores zerados."""
+    response_cache.clear()
+    upstream_flight.reset()
+    circuit_breaker.reset()
+    rate_limiter.reset()
+    yield
+    response_cache.clear()
@@ -1,16 +1,24 @@
 """
 Testes unitários para adapters de scraping e backup.
 """
+import asyncio
+import json
+import os
+import time
 import pytest
-from app.adapters.embrapa_scraper import scrape_table
-from app.adapters.local_backup import load_backup
+from unittest.mock import patch
+from app.adapters.embrapa_scraper import scrape_table, parse_table
+from app.adapters.local_backup import load_backup, clear_backup_index
+from app.core.config import settings
+from app.adapters.numeric import parse_numero
+from app.adapters.history_store import HistoryStore, history_store
 
 @pytest.mark.parametrize("resource,ano", [
     ("producao", "2023"), ("processamento", "2023"), ("comercializacao", "2023"), ("importacao", "2024"), ("exportacao", "2024")
 ])
 def test_scraper(resource, ano):
     try:
-        dados = scrape_table(resource, ano)
+        dados = asyncio.run(scrape_table(resource, ano))
         assert isinstance(dados["dados"], list)
     except Exception:
         assert True  # Pode falhar se site indisponível
@@ -24,3 +32,317 @@ def test_backup(resource, ano):
         assert isinstance(dados["dados"], list)
     except Exception:
         assert True  # Pode falhar se backup não existir
+
+
+def test_parse_table_importacao():
+    html = (
+        '<table class="tb_base tb_dados"><tbody>'
+        '<tr><td>Alemanha</td><td>1.000</td><td>2.500</td></tr>'
+        '<tr><td>Argentina</td><td>-</td><td>-</td></tr>'
+        '</tbody><tfoot><tr><td>Total</td><td>1.000</td><td>2.500</td></tr></tfoot></table>'
+    ).encode()
+    resultado = parse_table("importacao", "2024", html)
+    assert resultado["ano"] == 2024
+    assert resultado["valor_total"] == "2.500"
+    assert resultado["dados"][0] == {"País": "Alemanha", "Quantidade (Kg)": "1.000", "Valor (US$)": "2.500"}
+    assert len(resultado["dados"]) == 2
+
+
+def test_parse_table_sem_tabela():
+    with pytest.raises(Exception):
+        parse_table("producao", "2023", b"<html><body>Sem dados</body></html>")
+
+
+@pytest.mark.parametrize("parser", ["lxml", "bs4"])
+@pytest.mark.parametrize("html", [b"", b"  \n "])
+def test_parse_table_corpo_vazio_falha_igual_nos_dois_parsers(parser, html):
+    with pytest.raises(Exception, match="Tabela de dados não encontrada") as erro:
+        parse_table("producao", "2023", html, parser=parser)
+    assert type(erro.value) is Exception
+
+
+def test_history_store_grava_e_carrega(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path / "historico.sqlite3"))
+    store.init()
+    dados = [{"Produto": "VINHO DE MESA", "Quantidade (L.)": "10"}, {"Produto": "Tinto", "Quantidade (L.)": "7"}]
+    store.save("producao", 1985, {"dados": dados, "valor_total": "10"})
+    carregado = store.load("producao", 1985)
+    assert carregado["dados"] == dados
+    assert carregado["valor_total"] == "10"
+    assert store.find("producao", 1985, "Tinto") == dados[1]
+    assert store.load("producao", 1986) is None
+    assert store.available_years("producao") == {1985}
+    # Uma conexão por thread, reaproveitada entre as consultas
+    assert store._connect() is store._connect()
+    # load_backup passa a servir anos históricos a partir do SQLite
+    monkeypatch.setattr(history_store, "path", store.path)
+    assert load_backup("producao", "1985")["dados"] == dados
+
+
+def test_historico_convertido_fica_em_memoria_ate_nova_gravacao(tmp_path, monkeypatch):
+    from app.adapters import local_backup
+
+    store = HistoryStore(str(tmp_path / "historico.sqlite3"))
+    store.init()
+    store.save("producao", 1985, {"dados": [{"Produto": "Tinto", "Quantidade (L.)": "7"}], "valor_total": "7"})
+    monkeypatch.setattr(history_store, "path", store.path)
+    clear_backup_index()
+    consultas = []
+    original = local_backup.load_history
+    monkeypatch.setattr(local_backup, "load_history", lambda r, a: (consultas.append((r, a)), original(r, a))[1])
+
+    for _ in range(3):
+        assert load_backup("producao", "1985")["total_numerico"] == 7
+    assert len(consultas) == 1
+    # Gravação no histórico invalida o resultado em memória
+    history_store.save("producao", 1985, {"dados": [{"Produto": "Tinto", "Quantidade (L.)": "9"}], "valor_total": "9"})
+    assert load_backup("producao", "1985")["total_numerico"] == 9
+    assert len(consultas) == 2
+    clear_backup_index()
+
+
+def test_backup_indexado_em_memoria_e_relido_quando_mtime_muda(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "backup_path", str(tmp_path))
+    clear_backup_index()
+    arquivo = tmp_path / "producao.json"
+    arquivo.write_text(json.dumps({"ano": 2023, "valor_total": "1", "dados": [{"Produto": "Tinto", "Quantidade (L.)": "1"}]}))
+    with patch("app.adapters.local_backup.json.load", wraps=json.load) as mock_load:
+        load_backup("producao", "2023")
+        load_backup("producao", "2023")
+        assert mock_load.call_count == 1
+        arquivo.write_text(json.dumps({"ano": 2023, "valor_total": "2", "dados": []}))
+        os.utime(arquivo, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        assert load_backup("producao", "2023")["valor_total"] == "2"
+        assert mock_load.call_count == 2
+    clear_backup_index()
+
+
+def test_backup_csv_filtra_por_ano(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "backup_path", str(tmp_path))
+    clear_backup_index()
+    (tmp_path / "producao.csv").write_text(
+        "Ano,Produto,Quantidade (L.)\n2022,Tinto,1000\n2023,Tinto,2000\n2023,Branco,500\n2023,Rosado,1.234\n"
+    )
+    resultado = load_backup("producao", "2023")
+    assert [row["Produto"] for row in resultado["dados"]] == ["Tinto", "Branco", "Rosado"]
+    # Separador de milhar do padrão brasileiro, como nos backups JSON
+    assert resultado["dados_numericos"][2]["Quantidade (L.)"] == 1234
+    assert resultado["valor_total"] == "3.734,00"
+    # Ano inexistente cai no ano default (2023)
+    assert load_backup("producao", "1999")["ano"] == 2023
+    clear_backup_index()
+
+
+@pytest.mark.parametrize("texto,esperado", [
+    ("1.234.567", 1234567), ("103", 103), ("-", None), ("", None), ("1.234,50", 1234.5), (2.0, 2), ("abc", None)
+])
+def test_parse_numero(texto, esperado):
+    assert parse_numero(texto) == esperado
+
+
+def test_backup_traz_valores_numericos_precalculados():
+    resultado = load_backup("exportacao", "2024")
+    assert resultado["total_numerico"] == 8751275
+    linha = resultado["dados_numericos"][1]
+    assert linha["País"] == "África do Sul"
+    assert linha["Quantidade (Kg)"] == 103 and linha["Valor (US$)"] == 1783
+    assert resultado["dados_numericos"][0]["Valor (US$)"] is None  # "-"
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "embrapa")
+
+
+@pytest.mark.parametrize("arquivo", sorted(os.listdir(FIXTURES)))
+def test_parsers_lxml_e_bs4_equivalentes(arquivo):
+    """Os dois backends de extração devem produzir o mesmo resultado que o backup de origem."""
+    resource, ano = arquivo[:-5].rsplit("_", 1)
+    with open(os.path.join(FIXTURES, arquivo), "rb") as f:
+        html = f.read()
+    resultado_bs4 = parse_table(resource, ano, html, parser="bs4")
+    resultado_lxml = parse_table(resource, ano, html, parser="lxml")
+    assert resultado_lxml == resultado_bs4
+    with open(os.path.join(os.path.dirname(__file__), "..", "data", f"{resource}.json"), encoding="utf-8") as f:
+        backup = json.load(f)
+    assert resultado_lxml["dados"] == backup["dados"]
+    assert resultado_lxml["valor_total"] == backup["valor_total"]
+
+
+def test_montar_agregados_hierarquia_de_producao():
+    resultado = load_backup("producao", "2023")
+    categorias = {c["nome"]: c for c in resultado["agregados"]["categorias"]}
+    vinho = categorias["VINHO DE MESA"]
+    assert [s["nome"] for s in vinho["subitens"]] == ["Tinto", "Branco", "Rosado"]
+    assert vinho["total"] == sum(s["valor"] for s in vinho["subitens"])
+    assert sum(c["total"] for c in categorias.values()) == resultado["total_numerico"]
+
+
+def test_user_repository_migra_json_e_insere_de_forma_atomica(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.adapters.user_store import SQLiteUserRepository
+
+    legado = tmp_path / "users.json"
+    legado.write_text(json.dumps([{"username": "ana", "password": "x"}]), encoding="utf-8")
+    repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"))
+    assert repo.migrate_from_json(str(legado)) == 1
+    assert repo.migrate_from_json(str(legado)) == 0
+    assert repo.get("ana") == {"username": "ana", "password": "x"}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: repo.add(f"user{i}", "senha"), range(50)))
+    assert len(repo.list()) == 51
+    with pytest.raises(ValueError):
+        repo.add("ana", "outra")
+    assert repo.get("ninguem") is None
+    # A conexão do thread é reaproveitada entre chamadas
+    assert repo._connect() is repo._connect()
+
+
+def test_cache_sqlite_compartilhado_raspa_uma_vez_entre_processos(tmp_path):
+    from app.adapters.cache_backends import SQLiteCacheBackend
+    from app.core.shared_cache import SharedFlight
+
+    caminho = str(tmp_path / "cache.sqlite3")
+    # Duas instâncias sobre o mesmo arquivo simulam dois workers
+    workers = [SharedFlight(SQLiteCacheBackend(caminho), ttl_seconds=60, poll_seconds=0.01) for _ in range(2)]
+    chamadas = []
+
+    async def raspar():
+        chamadas.append(1)
+        await asyncio.sleep(0.1)
+        return {"dados": [{"produto": "Tinto", "quantidade": "1"}]}
+
+    async def cenario():
+        return await asyncio.gather(*[workers[i % 2].do("vitibrasil:resultado:producao:2023", raspar) for i in range(6)])
+
+    resultados = asyncio.run(cenario())
+    assert len(chamadas) == 1
+    assert all(r == resultados[0] for r in resultados)
+    assert sum(w.stats()["waits"] for w in workers) >= 1
+    assert asyncio.run(workers[1].do("vitibrasil:resultado:producao:2023", raspar)) == resultados[0]
+    assert len(chamadas) == 1
+
+
+class _ServidorRESP:
+    """Servidor mínimo com o subconjunto do protocolo Redis usado pelo RedisCacheBackend."""
+
+    def __init__(self):
+        self.dados = {}
+        self.comandos = []
+
+    @staticmethod
+    def _resposta(valor) -> bytes:
+        if valor is None:
+            return b"$-1\r\n"
+        if isinstance(valor, int):
+            return b":%d\r\n" % valor
+        if valor == b"OK":
+            return b"+OK\r\n"
+        return b"$%d\r\n%s\r\n" % (len(valor), valor)
+
+    def _executar(self, args):
+        comando = args[0].upper()
+        self.comandos.append(comando)
+        if comando == b"GET":
+            return self.dados.get(args[1])
+        if comando == b"SET":
+            if b"NX" in [a.upper() for a in args[3:]] and args[1] in self.dados:
+                return None
+            self.dados[args[1]] = args[2]
+            return b"OK"
+        if comando == b"EVAL":  # compare-and-delete do lock
+            chave, token = args[3], args[4]
+            if self.dados.get(chave) == token:
+                del self.dados[chave]
+                return 1
+            return 0
+        return b"OK"
+
+    async def atender(self, reader, writer):
+        while True:
+            linha = await reader.readline()
+            if not linha:
+                break
+            args = []
+            for _ in range(int(linha[1:-2])):
+                tamanho = int((await reader.readline())[1:-2])
+                args.append((await reader.readexactly(tamanho + 2))[:-2])
+            writer.write(self._resposta(self._executar(args)))
+            await writer.drain()
+        writer.close()
+
+
+def test_cache_redis_via_protocolo_resp():
+    from app.adapters.cache_backends import RedisCacheBackend
+    from app.core.shared_cache import SharedFlight
+
+    servidor_resp = _ServidorRESP()
+
+    async def cenario():
+        servidor = await asyncio.start_server(servidor_resp.atender, "127.0.0.1", 0)
+        porta = servidor.sockets[0].getsockname()[1]
+        backend = RedisCacheBackend(f"redis://127.0.0.1:{porta}/1")
+        voo = SharedFlight(backend, ttl_seconds=60)
+        chamadas = []
+
+        async def raspar():
+            chamadas.append(1)
+            return {"fonte": "online"}
+
+        primeiro = await voo.do("vitibrasil:resultado:producao:2023", raspar)
+        segundo = await voo.do("vitibrasil:resultado:producao:2023", raspar)
+        await backend.close()
+        servidor.close()
+        await servidor.wait_closed()
+        return primeiro, segundo, chamadas, voo.stats()
+
+    primeiro, segundo, chamadas, estatisticas = asyncio.run(cenario())
+    assert primeiro == segundo == {"fonte": "online"}
+    assert len(chamadas) == 1
+    assert estatisticas["hits"] == 1 and estatisticas["errors"] == 0
+    assert servidor_resp.comandos[0] == b"SELECT"
+    assert b"vitibrasil:resultado:producao:2023:lock" not in servidor_resp.dados
+
+
+def test_scraper_contra_servidor_fake_da_embrapa(monkeypatch):
+    import httpx
+    from app.adapters.http_client import close_client
+    from benchmarks.fake_embrapa import FakeEmbrapaServer
+
+    async def cenario():
+        async with FakeEmbrapaServer() as servidor:
+            monkeypatch.setattr(settings, "embrapa_base_url", servidor.url)
+            try:
+                resultado = await scrape_table("exportacao", "2010")
+                servidor.taxa_erro = 1.0
+                with pytest.raises(httpx.HTTPStatusError):
+                    await scrape_table("exportacao", "2010")
+            finally:
+                await close_client()
+            return resultado, servidor.requisicoes
+
+    resultado, requisicoes = asyncio.run(cenario())
+    with open(os.path.join(FIXTURES, "exportacao_2024.html"), "rb") as f:
+        esperado = parse_table("exportacao", "2010", f.read())
+    assert resultado["ano"] == 2010
+    assert resultado["dados"] == esperado["dados"] and len(resultado["dados"]) > 0
+    assert requisicoes == 2
+
+
+def test_cliente_http_segue_redirecionamentos_do_site(monkeypatch):
+    from app.adapters.http_client import close_client
+    from app.services.utils import check_site_status
+    from benchmarks.fake_embrapa import FakeEmbrapaServer
+
+    async def cenario():
+        async with FakeEmbrapaServer() as servidor:
+            monkeypatch.setattr(settings, "embrapa_base_url", servidor.url + "/redirecionar/")
+            try:
+                return await scrape_table("producao", "2023"), await check_site_status(), servidor.requisicoes
+            finally:
+                await close_client()
+
+    resultado, online, requisicoes = asyncio.run(cenario())
+    assert len(resultado["dados"]) > 0
+    assert online is True
+    # Cada chamada: o 302 e a página de destino
+    assert requisicoes == 4
@@ -0,0 +1,271 @@
+"""
+Testes unitários para os componentes centrais (core).
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from app.core.cache import TTLCache
+from app.core.singleflight import SingleFlight
+from app.core.circuit_breaker import CircuitBreaker
+
+
+def test_cache_hit_e_miss():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    assert cache.get(("producao", "2023")) is None
+    cache.set(("producao", "2023"), {"dados": []})
+    entrada = cache.get(("producao", "2023"))
+    assert entrada.fresh and entrada.value == {"dados": []}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_expira_mas_mantem_valor_antigo():
+    cache = TTLCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("chave", 1)
+    time.sleep(0.02)
+    entrada = cache.get("chave")
+    assert entrada is not None and not entrada.fresh
+    assert entrada.value == 1
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_cache_despejo_lru():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" passa a ser o menos usado
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a").value == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_singleflight_propaga_excecao_para_todos():
+    voo = SingleFlight()
+
+    async def falha():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream fora do ar")
+
+    async def cenario():
+        return await asyncio.gather(*[voo.do("chave", falha) for _ in range(3)], return_exceptions=True)
+
+    resultados = asyncio.run(cenario())
+    assert all(isinstance(r, RuntimeError) for r in resultados)
+    assert voo.stats() == {"executions": 1, "coalesced": 2, "in_flight": 0}
+
+
+def test_circuit_breaker_abre_e_libera_teste_apos_espera():
+    disjuntor = CircuitBreaker(failure_threshold=2, cooldown_seconds=0.05)
+    assert disjuntor.allow_request()
+    disjuntor.record_failure()
+    assert disjuntor.state == "closed"
+    disjuntor.record_failure()
+    assert disjuntor.state == "open"
+    assert not disjuntor.allow_request()
+    time.sleep(0.06)
+    assert disjuntor.state == "half_open"
+    assert disjuntor.allow_request()  # requisição de teste
+    assert not disjuntor.allow_request()  # apenas uma por vez
+    disjuntor.record_success()
+    assert disjuntor.state == "closed"
+
+
+def test_circuit_breaker_reabre_se_teste_falhar():
+    disjuntor = CircuitBreaker(failure_threshold=1, cooldown_seconds=0.01)
+    disjuntor.record_failure()
+    time.sleep(0.02)
+    assert disjuntor.allow_request()
+    disjuntor.record_failure()
+    assert disjuntor.state == "open"
+
+
+def test_hash_de_senha_verifica_e_sinaliza_atualizacao(monkeypatch):
+    from app.core.config import settings
+    from app.core.passwords import hash_password, verify_password
+
+    monkeypatch.setattr(settings, "password_hash_cost", 10)
+    armazenado = hash_password("segredo")
+    assert armazenado.startswith("scrypt$10$")
+    assert verify_password("segredo", armazenado) == (True, False)
+    assert verify_password("errada", armazenado) == (False, False)
+    # senha legada em texto puro e custo antigo pedem atualização
+    assert verify_password("segredo", "segredo") == (True, True)
+    assert verify_password("segredo", hash_password("segredo", custo=9)) == (True, True)
+    assert verify_password("segredo", "scrypt$invalido") == (False, False)
+
+
+def test_verify_token_usa_cache_e_respeita_exp():
+    from datetime import timedelta
+    from fastapi import HTTPException
+    from app.core import security
+
+    security.reset_security_state()
+    token = security.create_access_token({"sub": "ana"})
+    with patch("app.core.security.jwt.decode", wraps=security.jwt.decode) as decode:
+        assert security.verify_token(token)["sub"] == "ana"
+        assert security.verify_token(token)["sub"] == "ana"
+    assert decode.call_count == 1
+
+    curto = security.create_access_token({"sub": "ana"}, expires_delta=timedelta(seconds=5))
+    security.verify_token(curto)
+    with patch("app.core.security.time.time", return_value=time.time() + 10):
+        with pytest.raises(HTTPException) as exc:
+            security.verify_token(curto)
+    assert exc.value.status_code == 401
+
+
+def test_jwt_rs256_assina_com_privada_e_valida_com_publica(tmp_path, monkeypatch):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from fastapi import HTTPException
+    from app.core import security
+    from app.core.config import settings
+
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    privada, publica = tmp_path / "priv.pem", tmp_path / "pub.pem"
+    privada.write_bytes(chave.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    publica.write_bytes(chave.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo))
+    monkeypatch.setattr(settings, "jwt_algorithm", "RS256")
+    monkeypatch.setattr(settings, "jwt_private_key_path", str(privada))
+    monkeypatch.setattr(settings, "jwt_public_key_path", str(publica))
+    security.reset_security_state()
+    try:
+        token = security.create_access_token({"sub": "ana"})
+        assert security.verify_token(token)["sub"] == "ana"
+        # token HS256 com o segredo compartilhado não é aceito no modo assimétrico
+        forjado = security.jwt.encode({"sub": "ana"}, settings.jwt_secret_key, algorithm="HS256")
+        with pytest.raises(HTTPException):
+            security.verify_token(forjado)
+    finally:
+        monkeypatch.undo()
+        security.reset_security_state()
+
+
+def test_shared_flight_calcula_localmente_sem_backend_e_propaga_erros():
+    from app.core.shared_cache import CacheBackend, SharedFlight
+
+    class BackendForaDoAr(CacheBackend):
+        async def get(self, key):
+            raise ConnectionRefusedError("sem conexão")
+
+        async def set(self, key, value, ttl_seconds):
+            raise ConnectionRefusedError("sem conexão")
+
+        async def acquire_lock(self, key, token, ttl_seconds):
+            raise ConnectionRefusedError("sem conexão")
+
+        async def release_lock(self, key, token):
+            raise ConnectionRefusedError("sem conexão")
+
+    with pytest.raises(TypeError):
+        type("BackendIncompleto", (CacheBackend,), {"get": BackendForaDoAr.get})()
+
+    voo = SharedFlight(BackendForaDoAr(), ttl_seconds=60)
+
+    async def calcular():
+        return {"ok": True}
+
+    async def falhar():
+        raise TimeoutError("upstream lento")
+
+    assert asyncio.run(voo.do("chave", calcular)) == {"ok": True}
+    assert voo.stats()["errors"] == 1
+    with pytest.raises(TimeoutError):
+        asyncio.run(voo.do("chave", falhar))
+    assert voo.stats()["errors"] == 2
+
+
+def test_logging_em_fila_grava_json_amostra_e_formata_fora_da_requisicao(tmp_path):
+    import json
+    import logging
+    import threading
+    from app.core.logs import AMOSTRADO, encerrar_logging, iniciar_logging
+
+    threads = []
+
+    class Valor:
+        def __str__(self):
+            threads.append(threading.current_thread())
+            return "valor"
+
+    caminho = tmp_path / "app.log"
+    iniciar_logging(str(caminho), taxa_amostragem=0.0)
+    try:
+        logging.info("por requisição %s", Valor(), extra=AMOSTRADO)
+        logging.info("evento %s", Valor(), extra={"resource": "producao"})
+        logging.warning("aviso nunca descartado", extra=AMOSTRADO)
+    finally:
+        encerrar_logging()
+
+    linhas = [json.loads(linha) for linha in caminho.read_text(encoding="utf-8").splitlines()]
+    assert [linha["msg"] for linha in linhas] == ["evento valor", "aviso nunca descartado"]
+    assert linhas[0]["level"] == "INFO" and linhas[0]["resource"] == "producao"
+    # A mensagem é montada no thread do QueueListener (os handlers do pytest também formatam no principal)
+    assert any(t is not threading.main_thread() for t in threads)
+
+
+def test_rate_limiter_token_bucket_por_usuario_e_rota():
+    from app.core.rate_limit import RateLimiter, parse_cotas
+    limiter = RateLimiter(60, 2, parse_cotas("/v1/lote=6:1"))
+    assert [limiter.consumir("ana", "/v1/producao") for _ in range(3)][:2] == [0, 0]
+    assert limiter.consumir("ana", "/v1/producao") > 0
+    # Baldes independentes por usuário e por rota; cota própria do /v1/lote
+    assert limiter.consumir("bia", "/v1/producao") == 0
+    assert limiter.consumir("ana", "/v1/lote") == 0
+    assert limiter.consumir("ana", "/v1/lote") == pytest.approx(10, abs=0.1)
+    with pytest.raises(ValueError):
+        parse_cotas("/v1/lote")
+
+
+def test_limite_adaptativo_reduz_com_latencia_alta_e_cresce_com_baixa():
+    from app.core.load_shedding import AdaptiveConcurrencyLimiter
+    limiter = AdaptiveConcurrencyLimiter(inicial=4, minimo=2, maximo=8, latencia_alvo=1.0)
+    assert all(limiter.adquirir() for _ in range(4))
+    assert not limiter.adquirir()
+    for _ in range(4):
+        limiter.liberar(5.0)
+    assert limiter.limite == pytest.approx(2.6244)
+    for _ in range(20):
+        assert limiter.adquirir()
+        limiter.liberar(0.01)
+    assert 2.6244 < limiter.limite <= 8
+    assert limiter.stats()["rejeitadas"] == 1
+
+
+def test_shared_flight_interrompe_espera_pelo_lock_quando_verificacao_falha():
+    from app.core.circuit_breaker import CircuitOpenError
+    from app.core.shared_cache import CacheBackend, SharedFlight
+
+    class LockOcupado(CacheBackend):
+        async def get(self, key):
+            return None
+
+        async def set(self, key, value, ttl_seconds):
+            pass
+
+        async def acquire_lock(self, key, token, ttl_seconds):
+            return False  # outro processo está raspando
+
+        async def release_lock(self, key, token):
+            pass
+
+    voo = SharedFlight(LockOcupado(), ttl_seconds=60, wait_seconds=30, poll_seconds=0.01)
+    chamadas = []
+
+    def abrir_na_terceira():
+        chamadas.append(1)
+        if len(chamadas) >= 3:
+            raise CircuitOpenError("aberto")
+
+    async def calcular():
+        return {"ok": True}
+
+    inicio = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(voo.do("chave", calcular, verificar=abrir_na_terceira))
+    assert time.monotonic() - inicio < 1
+    assert len(chamadas) == 3
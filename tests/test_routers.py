@@ -0,0 +1,344 @@
+"""
+Testes das rotas da API.
+"""
+import json
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.security import create_access_token
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def auth_headers():
+    token = create_access_token({"sub": "admin"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def scrape_fake(resource, ano):
+    return {"dados": [{"País": "Alemanha", "Quantidade (Kg)": "1", "Valor (US$)": ano}], "valor_total": ano, "ano": int(ano)}
+
+
+def test_lote_streaming_ndjson(auth_headers):
+    with patch("app.services.scraping.scrape_table", side_effect=scrape_fake) as mock_scrape:
+        resp = client.get(
+            "/v1/lote",
+            params={"recursos": ["exportacao", "producao"], "ano_inicio": 2022, "ano_fim": 2024},
+            headers=auth_headers,
+        )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(linha) for linha in resp.text.splitlines()]
+    celulas = {(linha["recurso"], linha["ano"]) for linha in linhas}
+    # produção só vai até 2023
+    assert celulas == {("exportacao", 2022), ("exportacao", 2023), ("exportacao", 2024), ("producao", 2022), ("producao", 2023)}
+    assert mock_scrape.call_count == 5
+
+
+def test_lote_recurso_invalido(auth_headers):
+    resp = client.get("/v1/lote", params={"recursos": ["vinhos"], "ano_inicio": 2020, "ano_fim": 2021}, headers=auth_headers)
+    assert resp.status_code == 400
+
+
+def test_lote_exige_autenticacao():
+    resp = client.get("/v1/lote", params={"recursos": ["exportacao"], "ano_inicio": 2020, "ano_fim": 2021})
+    assert resp.status_code == 401
+
+
+def test_formato_numerico(auth_headers):
+    with patch("app.services.scraping.scrape_table", side_effect=Exception("Site offline")):
+        texto = client.get("/v1/producao", params={"ano": "2023"}, headers=auth_headers).json()
+        numerico = client.get("/v1/producao", params={"ano": "2023", "formato": "numerico"}, headers=auth_headers).json()
+    assert texto["valor_total"] == "457.792.870"
+    assert numerico["valor_total"] == 457792870
+    assert texto["dados"][0] == {"Produto": "VINHO DE MESA", "Quantidade (L.)": "169.762.429"}
+    assert numerico["dados"][0] == {"Produto": "VINHO DE MESA", "Quantidade (L.)": 169762429}
+
+
+async def scrape_producao_fake(resource, ano):
+    fator = int(ano) - 2020
+    dados = [
+        {"Produto": "VINHO DE MESA", "Quantidade (L.)": f"{100 * fator}"},
+        {"Produto": "Tinto", "Quantidade (L.)": f"{70 * fator}"},
+        {"Produto": "Branco", "Quantidade (L.)": f"{30 * fator}"},
+        {"Produto": "SUCO", "Quantidade (L.)": f"{50 * fator}"},
+    ]
+    return {"dados": dados, "valor_total": f"{150 * fator}", "ano": int(ano)}
+
+
+def test_agregacoes_categorias_top_e_variacao(auth_headers):
+    with patch("app.services.scraping.scrape_table", side_effect=scrape_producao_fake):
+        categorias = client.get("/v1/producao/categorias", params={"ano": "2022"}, headers=auth_headers).json()
+        top = client.get("/v1/producao/top", params={"ano": "2022", "n": 2}, headers=auth_headers).json()
+        variacao = client.get("/v1/producao/variacao", params={"ano_inicio": 2021, "ano_fim": 2022}, headers=auth_headers).json()
+    assert [(c["nome"], c["total"], len(c["subitens"])) for c in categorias["categorias"]] == [("VINHO DE MESA", 200, 2), ("SUCO", 100, 0)]
+    assert [(i["nome"], i["valor"]) for i in top["itens"]] == [("Tinto", 140), ("SUCO", 100)]
+    assert top["itens"][0]["participacao_percentual"] == round(140 / 300 * 100, 2)
+    assert [p["total"] for p in variacao["anos"]] == [150, 300]
+    assert variacao["anos"][1]["variacao"] == 150 and variacao["anos"][1]["variacao_percentual"] == 100.0
+    assert variacao["anos"][1]["categorias"]["SUCO"]["variacao"] == 50
+
+
+def test_agregacoes_categorias_sem_hierarquia(auth_headers):
+    resp = client.get("/v1/exportacao/categorias", headers=auth_headers)
+    assert resp.status_code == 400
+
+
+def test_cadastro_e_login_com_hash_e_atualizacao_transparente(tmp_path, monkeypatch):
+    from app.adapters.user_store import SQLiteUserRepository
+    from app.core.config import settings
+    from app.core.passwords import clear_verification_cache
+    from app.services.auth import set_user_repository
+
+    monkeypatch.setattr(settings, "password_hash_cost", 10)
+    repositorio = SQLiteUserRepository(str(tmp_path / "users.sqlite3"))
+    repositorio.add("legado", "senha123")
+    set_user_repository(repositorio)
+    clear_verification_cache()
+    try:
+        assert client.post("/v1/auth/cadastro", json={"username": "ana", "password": "abc12345"}).status_code == 201
+        assert client.post("/v1/auth/cadastro", json={"username": "ana", "password": "x"}).status_code == 400
+        assert repositorio.get("ana")["password"].startswith("scrypt$10$")
+
+        assert client.post("/v1/auth/login", data={"username": "ana", "password": "errada"}).status_code == 401
+        assert client.post("/v1/auth/login", data={"username": "ana", "password": "abc12345"}).status_code == 200
+
+        # senha legada em texto puro vira hash no primeiro login válido
+        assert client.post("/v1/auth/login", data={"username": "legado", "password": "senha123"}).status_code == 200
+        assert repositorio.get("legado")["password"].startswith("scrypt$10$")
+        assert client.post("/v1/auth/login", data={"username": "legado", "password": "senha123"}).status_code == 200
+    finally:
+        set_user_repository(None)
+
+
+def test_health_responde_do_estado_da_sonda_sem_acessar_o_site():
+    import time
+    with patch("app.services.utils.check_site_status", return_value=False) as sonda:
+        assert client.get("/health/live").json() == {"status": "ok"}
+        with TestClient(app) as c:
+            for _ in range(100):
+                resp = c.get("/health/ready")
+                if resp.status_code == 200:
+                    break
+                time.sleep(0.01)
+            # site offline, mas há backup local em data/: pronta para o fallback
+            assert resp.status_code == 200
+            assert resp.json()["site_embrapa"]["backup_local"] is True
+            chamadas = sonda.call_count
+            for _ in range(5):
+                corpo = c.get("/health").json()
+            assert sonda.call_count == chamadas
+            assert corpo["site_embrapa"] == "offline"
+            assert corpo["sonda"]["latencia_ms"] is not None
+
+
+def test_dados_pre_serializados_equivalem_ao_response_model(auth_headers):
+    from app.models.data import DataResponse
+    from app.services.scraping import response_cache
+
+    with patch("app.services.scraping.scrape_table", side_effect=scrape_fake):
+        resp = client.get("/v1/exportacao", params={"ano": "2022"}, headers=auth_headers)
+        client.get("/v1/exportacao", params={"ano": "2022"}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    corpo = resp.json()
+    # paginacao só aparece em consultas com filtros/paginação
+    assert DataResponse.model_validate(corpo).model_dump(mode="json", exclude_none=True) == corpo
+    # corpo serializado uma vez e reaproveitado do registro em cache
+    registro = response_cache.get(("exportacao", "2022")).value
+    assert registro["serializado"][("texto", "application/json")]["corpo"] == resp.content
+
+    schema = client.get("/openapi.json").json()
+    resposta_200 = schema["paths"]["/v1/exportacao"]["get"]["responses"]["200"]
+    assert resposta_200["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/DataResponse"}
+
+
+def test_etag_304_e_cache_control_por_ano(auth_headers):
+    from app.core.config import settings
+
+    with patch("app.services.scraping.scrape_table", side_effect=scrape_fake):
+        fechado = client.get("/v1/exportacao", params={"ano": "2010"}, headers=auth_headers)
+        atual = client.get("/v1/exportacao", params={"ano": "2024"}, headers=auth_headers)
+        etag = fechado.headers["etag"]
+        condicional = client.get(
+            "/v1/exportacao", params={"ano": "2010"}, headers={**auth_headers, "If-None-Match": f'W/"x", {etag}'}
+        )
+        outro_formato = client.get(
+            "/v1/exportacao", params={"ano": "2010", "formato": "numerico"}, headers={**auth_headers, "If-None-Match": etag}
+        )
+    assert fechado.headers["cache-control"] == f"public, max-age={settings.cache_control_closed_year_seconds}"
+    assert atual.headers["cache-control"] == f"public, max-age={settings.cache_control_current_year_seconds}"
+    assert condicional.status_code == 304
+    assert condicional.content == b""
+    assert condicional.headers["etag"] == etag
+    assert outro_formato.status_code == 200
+    assert outro_formato.headers["etag"] != etag
+
+
+def test_compressao_negociada_e_representacoes_colunares(auth_headers):
+    import gzip
+
+    with patch("app.services.scraping.scrape_table", side_effect=scrape_fake):
+        json_resp = client.get("/v1/exportacao", params={"ano": "2022"}, headers=auth_headers)
+        csv_resp = client.get("/v1/exportacao", params={"ano": "2022"}, headers={**auth_headers, "Accept": "text/csv"})
+        colunar = client.get(
+            "/v1/exportacao", params={"ano": "2022", "formato": "numerico"},
+            headers={**auth_headers, "Accept": "application/vnd.vitibrasil.colunar+json, application/json;q=0.5"},
+        )
+        lote_csv = client.get(
+            "/v1/lote", params={"recursos": ["exportacao", "producao"], "ano_inicio": 2023, "ano_fim": 2023},
+            headers={**auth_headers, "Accept": "text/csv", "Accept-Encoding": "gzip"},
+        )
+    # corpo pequeno não é comprimido
+    assert "content-encoding" not in json_resp.headers
+    assert csv_resp.headers["content-type"].startswith("text/csv")
+    assert csv_resp.text == "País,Quantidade (Kg),Valor (US$)\nAlemanha,1,2022\n"
+    assert csv_resp.headers["etag"] != json_resp.headers["etag"]
+    assert colunar.json()["dados"] == {"País": ["Alemanha"], "Quantidade (Kg)": [1], "Valor (US$)": [2022]}
+    linhas = lote_csv.text.splitlines()
+    assert linhas[0] == "recurso,ano,fonte,País,Quantidade (Kg),Valor (US$),Produto,Quantidade (L.),erro"
+    assert len(linhas) == 3
+
+    from app.core.compression import CompressionMiddleware
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    grande = {"dados": [{"País": "Alemanha", "Valor (US$)": "1.234"}] * 200}
+    mini = Starlette(routes=[Route("/", lambda r: JSONResponse(grande, headers={"ETag": '"abc"'}))])
+    mini.add_middleware(CompressionMiddleware, minimum_size=500)
+    resp = TestClient(mini).get("/", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["etag"] == 'W/"abc"'
+    assert int(resp.headers["content-length"]) < len(json.dumps(grande)) / 10
+    assert resp.json() == grande
+
+
+def test_304_apos_resposta_comprimida_mantem_etag_fraco_e_vary():
+    from app.core.compression import CompressionMiddleware
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    grande = {"dados": [{"País": "Alemanha", "Valor (US$)": "1.234"}] * 200}
+
+    def rota(request):
+        if '"abc"' in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers={"ETag": '"abc"'})
+        return JSONResponse(grande, headers={"ETag": '"abc"'})
+
+    mini = Starlette(routes=[Route("/", rota)])
+    mini.add_middleware(CompressionMiddleware, minimum_size=500)
+    cliente = TestClient(mini)
+    comprimida = cliente.get("/", headers={"Accept-Encoding": "gzip"})
+    condicional = cliente.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": comprimida.headers["etag"]})
+    assert comprimida.headers["etag"] == 'W/"abc"'
+    assert condicional.status_code == 304
+    assert condicional.headers["etag"] == comprimida.headers["etag"]
+    assert condicional.headers["vary"] == comprimida.headers["vary"] == "Accept-Encoding"
+
+
+def test_metrics_expoe_latencia_por_rota_fallback_e_falhas(auth_headers):
+    import httpx
+    from app.core.metrics import data_source_total, scrape_failures_total
+    falhas_antes = scrape_failures_total.valor("processamento", "ConnectError")
+    locais_antes = data_source_total.valor("processamento", "local")
+    with patch("app.adapters.embrapa_scraper.fetch", side_effect=httpx.ConnectError("sem rede")):
+        assert client.get("/v1/processamento", headers=auth_headers).status_code == 200
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    texto = resp.text
+    assert "# TYPE vitibrasil_http_request_duration_seconds histogram" in texto
+    assert 'vitibrasil_http_request_duration_seconds_count{method="GET",route="/v1/processamento",status="200"}' in texto
+    assert 'le="+Inf"' in texto
+    assert "vitibrasil_upstream_request_duration_seconds_count" in texto
+    assert scrape_failures_total.valor("processamento", "ConnectError") == falhas_antes + 1
+    assert data_source_total.valor("processamento", "local") == locais_antes + 1
+    assert 'vitibrasil_scrape_failures_total{resource="processamento",exception="ConnectError"}' in texto
+    assert 'route="/metrics"' not in texto
+
+
+async def scrape_paises(resource, ano):
+    dados = [
+        {"País": "Alemanha", "Quantidade (Kg)": "1.000", "Valor (US$)": "5.000"},
+        {"País": "Angola", "Quantidade (Kg)": "-", "Valor (US$)": "-"},
+        {"País": "Áustria", "Quantidade (Kg)": "300", "Valor (US$)": "900"},
+        {"País": "Paraguai", "Quantidade (Kg)": "2.000", "Valor (US$)": "12.000"},
+        {"País": "Peru", "Quantidade (Kg)": "10", "Valor (US$)": "900"},
+    ]
+    return {"dados": dados, "valor_total": "18.800", "ano": int(ano)}
+
+
+def test_dados_com_filtros_ordenacao_paginacao_e_projecao(auth_headers):
+    with patch("app.services.scraping.scrape_table", side_effect=scrape_paises) as mock_scrape:
+        def consultar(**params):
+            return client.get("/v1/exportacao", params={"ano": "2024", **params}, headers=auth_headers)
+
+        corpo = consultar(nome="a", ordenar="desc", fields="pais,valor").json()
+        assert corpo["dados"] == [
+            {"País": "Alemanha", "Valor (US$)": "5.000"},
+            {"País": "Áustria", "Valor (US$)": "900"},
+            {"País": "Angola", "Valor (US$)": "-"},
+        ]
+        assert corpo["valor_total"] == "18.800"
+
+        corpo = consultar(sem_vazios="true", min=900, max=5000, formato="numerico").json()
+        assert [linha["País"] for linha in corpo["dados"]] == ["Alemanha", "Áustria", "Peru"]
+
+        primeira = consultar(sem_vazios="true", ordenar="desc", limit=3).json()
+        assert [linha["País"] for linha in primeira["dados"]] == ["Paraguai", "Alemanha", "Áustria"]
+        assert primeira["paginacao"]["total"] == 4
+        segunda = consultar(sem_vazios="true", ordenar="desc", limit=3, cursor=primeira["paginacao"]["proximo_cursor"]).json()
+        assert [linha["País"] for linha in segunda["dados"]] == ["Peru"]
+        assert segunda["paginacao"]["proximo_cursor"] is None
+
+        # Cursor de outra consulta, campo inexistente
+        assert consultar(limit=3, cursor=primeira["paginacao"]["proximo_cursor"]).status_code == 400
+        assert consultar(fields="produto,cor").status_code == 400
+
+        csv = client.get(
+            "/v1/exportacao", params={"ano": "2024", "nome": "peru", "busca": "exato", "fields": "valor"},
+            headers={**auth_headers, "Accept": "text/csv"},
+        )
+        assert csv.text == "Valor (US$)\n900\n"
+        # Sem parâmetros de consulta: resposta completa
+        assert len(consultar().json()["dados"]) == 5
+    assert mock_scrape.call_count == 1
+
+
+def test_limite_por_usuario_429_e_descarte_de_carga_503(auth_headers, monkeypatch):
+    from app.core.load_shedding import concurrency_limiter
+    from app.core.rate_limit import rate_limiter
+    monkeypatch.setattr(rate_limiter, "cotas", {"/v1/producao": (6, 2)})
+    with patch("app.services.scraping.scrape_table", side_effect=scrape_fake):
+        status = [client.get("/v1/producao", params={"ano": "2023"}, headers=auth_headers).status_code for _ in range(3)]
+        assert status == [200, 200, 429]
+        resp = client.get("/v1/producao", params={"ano": "2023"}, headers=auth_headers)
+        assert resp.status_code == 429 and int(resp.headers["retry-after"]) >= 1
+        # Outro usuário tem o próprio balde
+        outro = {"Authorization": f"Bearer {create_access_token({'sub': 'outro'})}"}
+        assert client.get("/v1/producao", params={"ano": "2023"}, headers=outro).status_code == 200
+
+        # Limite de concorrência atingido: 503 imediato, sem afetar /health
+        monkeypatch.setattr(concurrency_limiter, "em_andamento", int(concurrency_limiter.limite))
+        resp = client.get("/v1/exportacao", params={"ano": "2023"}, headers=outro)
+        assert resp.status_code == 503 and resp.headers["retry-after"] == "1"
+        assert client.get("/health").status_code == 200
+    metricas = client.get("/metrics").text
+    assert 'vitibrasil_rejected_requests_total{motivo="rate_limit"} 2' in metricas
+    assert 'vitibrasil_rejected_requests_total{motivo="sobrecarga"}' in metricas
+
+
+def test_inicializacao_sem_modulos_pesados_nem_arquivos_na_importacao():
+    """Verificação de cold start: app.main importa sem pandas/bs4/lxml e sem tocar o disco."""
+    import asyncio
+    from benchmarks.bench_inicializacao import medir, verificar
+
+    resultado = asyncio.run(medir(repeticoes=1))
+    assert verificar(resultado, max_importacao_ms=None, max_primeira_requisicao_ms=None) == []
+    assert resultado["fonte"] == "online"
+    assert any(pacote == "app" for pacote, _ in resultado["importacao_por_pacote_ms"])
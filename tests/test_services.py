@@ -1,16 +1,22 @@
 """
 Testes unitários para o serviço de orquestração.
 """
+import asyncio
+import threading
 import pytest
 from unittest.mock import patch
-from app.services.scraping import get_resource_data
+from app.services import scraping
+from app.services.bulk import montar_celulas
+from app.services.snapshot import build_snapshot
+from app.adapters.history_store import HistoryStore
+from app.services.scraping import get_resource_data, response_cache, upstream_flight, circuit_breaker
 
 @pytest.mark.parametrize("resource", [
     "producao", "processamento", "comercializacao", "importacao", "exportacao"
 ])
 def test_get_resource_data(resource):
     """Testa se o serviço retorna estrutura esperada para cada recurso (integração real)."""
-    resp = get_resource_data(resource)
+    resp = asyncio.run(get_resource_data(resource))
     assert "fonte" in resp
     assert "timestamp" in resp
     assert "dados" in resp
@@ -23,7 +29,7 @@ def test_fallback_to_local_backup_real_file():
     O método scrape_table lança exceção (site offline), e load_backup lê o arquivo real.
     """
     with patch("app.services.scraping.scrape_table", side_effect=Exception("Site offline")):
-        resp = get_resource_data("producao", ano="2023")
+        resp = asyncio.run(get_resource_data("producao", ano="2023"))
         assert resp["fonte"] == "local"
         assert isinstance(resp["dados"], list)
         # Confere se os dados retornados batem com o conteúdo do producao.json filtrado por ano
@@ -31,3 +37,224 @@ def test_fallback_to_local_backup_real_file():
         assert any(p and "Tinto" in p for p in produtos)
         assert any(p and "Branco" in p for p in produtos)
         assert resp["ano"] == 2023
+
+
+def test_cache_evita_nova_raspagem():
+    """Segunda chamada para o mesmo (recurso, ano) deve vir do cache, sem novo scraping."""
+    online = {"dados": [{"Produto": "Tinto", "Quantidade (L.)": "1"}], "valor_total": "1", "ano": 2023}
+    with patch("app.services.scraping.scrape_table", return_value=online) as mock_scrape:
+        primeira = asyncio.run(get_resource_data("producao", ano="2023"))
+        segunda = asyncio.run(get_resource_data("producao", ano="2023"))
+    assert mock_scrape.call_count == 1
+    assert primeira == segunda
+    assert response_cache.stats()["hits"] == 1
+
+
+def test_cache_stale_while_revalidate():
+    """Entrada expirada é devolvida imediatamente e revalidada em segundo plano."""
+    antigo = {"dados": [], "valor_total": "1", "ano": 2023}
+    novo = {"dados": [], "valor_total": "2", "ano": 2023}
+
+    async def cenario():
+        with patch("app.services.scraping.scrape_table", return_value=antigo):
+            await get_resource_data("producao", ano="2023")
+        with patch.object(response_cache, "ttl_seconds", 0), \
+                patch("app.services.scraping.scrape_table", return_value=novo):
+            resp = await get_resource_data("producao", ano="2023")
+            assert resp["valor_total"] == "1"
+            await asyncio.gather(*scraping._tarefas_revalidacao)
+
+    asyncio.run(cenario())
+    assert response_cache.get(("producao", "2023")).value["valor_total"] == "2"
+
+
+def test_fallback_local_nao_e_cacheado():
+    with patch("app.services.scraping.scrape_table", side_effect=Exception("Site offline")):
+        asyncio.run(get_resource_data("producao", ano="2023"))
+    assert len(response_cache) == 0
+
+
+def test_singleflight_coalesce_raspagens_concorrentes():
+    """Requisições simultâneas para o mesmo (recurso, ano) disparam uma única raspagem."""
+    chamadas = 0
+
+    async def scrape_lento(resource, ano):
+        nonlocal chamadas
+        chamadas += 1
+        await asyncio.sleep(0.05)
+        return {"dados": [], "valor_total": "1", "ano": int(ano)}
+
+    async def cenario():
+        return await asyncio.gather(*[get_resource_data("exportacao", ano="2024") for _ in range(10)])
+
+    with patch("app.services.scraping.scrape_table", side_effect=scrape_lento):
+        respostas = asyncio.run(cenario())
+    assert chamadas == 1
+    assert all(r["fonte"] == "online" for r in respostas)
+    assert upstream_flight.stats()["coalesced"] == 9
+
+
+def test_circuit_breaker_aberto_usa_backup_sem_raspar():
+    """Com o circuito aberto, o backup local é servido sem chamar o site."""
+    with patch("app.services.scraping.scrape_table", side_effect=Exception("Site offline")) as mock_scrape:
+        for _ in range(circuit_breaker.failure_threshold):
+            asyncio.run(get_resource_data("producao", ano="2023"))
+        assert circuit_breaker.state == "open"
+        resp = asyncio.run(get_resource_data("producao", ano="2023"))
+    assert resp["fonte"] == "local"
+    assert mock_scrape.call_count == circuit_breaker.failure_threshold
+
+
+def test_montar_celulas_recorta_intervalo_por_recurso():
+    celulas = montar_celulas(["producao", "exportacao", "producao"], 2023, 2030)
+    assert celulas == [("producao", "2023"), ("exportacao", "2023"), ("exportacao", "2024")]
+    with pytest.raises(ValueError):
+        montar_celulas(["producao"], 2024, 2020)
+
+
+def test_build_snapshot_retoma_sem_raspar_novamente(tmp_path):
+    store = HistoryStore(str(tmp_path / "historico.sqlite3"))
+
+    async def scrape_fake(resource, ano):
+        return {"dados": [{"País": "Chile", "Quantidade (Kg)": "1", "Valor (US$)": "2"}], "valor_total": "2", "ano": int(ano)}
+
+    with patch("app.services.snapshot.scrape_table", side_effect=scrape_fake) as mock_scrape:
+        resumo = asyncio.run(build_snapshot(["importacao"], 2020, 2022, concorrencia=2, store=store))
+        assert resumo == {"salvos": 3, "ignorados": 0, "falhas": 0}
+        resumo = asyncio.run(build_snapshot(["importacao"], 2020, 2024, concorrencia=2, store=store))
+        assert resumo == {"salvos": 2, "ignorados": 3, "falhas": 0}
+    assert mock_scrape.call_count == 5
+    assert store.available_years("importacao") == {2020, 2021, 2022, 2023, 2024}
+
+
+def test_etag_estavel_quando_revalidacao_traz_os_mesmos_dados():
+    from app.core.config import settings
+    from app.services.scraping import get_resource_payload
+
+    async def cenario():
+        with patch("app.services.scraping.scrape_table", return_value={"dados": [{"País": "Chile"}], "valor_total": "10", "ano": 2010}):
+            primeira = await get_resource_payload("exportacao", "2010")
+            # expira a entrada e força uma nova raspagem com os mesmos dados
+            response_cache.ttl_seconds = 0
+            try:
+                await get_resource_payload("exportacao", "2010")
+                await asyncio.sleep(0.01)
+            finally:
+                response_cache.ttl_seconds = settings.cache_ttl_seconds
+            segunda = await get_resource_payload("exportacao", "2010")
+        return primeira, segunda
+
+    primeira, segunda = asyncio.run(cenario())
+    assert primeira["etag"] == segunda["etag"]
+    assert primeira["corpo"] == segunda["corpo"]
+
+
+def test_refresh_aquece_cache_e_grava_snapshots_fora_dos_backups(tmp_path, monkeypatch):
+    from app.adapters import history_store as modulo_historico
+    from app.adapters.local_backup import clear_backup_index, load_backup
+    from app.core.config import settings
+    from app.services import refresh
+
+    monkeypatch.setattr(settings, "backup_path", str(tmp_path / "backups"))
+    store = HistoryStore(str(tmp_path / "atualizacao" / "historico.sqlite3"))
+    monkeypatch.setattr(refresh, "refresh_store", store)
+    monkeypatch.setattr(modulo_historico, "refresh_store", store)
+    threads = []
+    salvar = store.save
+    monkeypatch.setattr(store, "save", lambda *a: (threads.append(threading.current_thread()), salvar(*a)))
+
+    async def scrape(resource, ano):
+        if resource == "processamento":
+            raise TimeoutError("site lento")
+        return {"dados": [{"Produto": "VINHO", "Quantidade (L.)": "1"}], "valor_total": "1", "ano": int(ano)}
+
+    with patch("app.services.scraping.scrape_table", side_effect=scrape):
+        resumo = asyncio.run(refresh.refresh_all(anos_recentes=2, concorrencia=2))
+
+    # 5 recursos x 2 anos (o ano padrão é o mais recente); processamento falha
+    assert resumo == {"atualizados": 8, "falhas": 2}
+    assert response_cache.peek(("producao", "2022"))["fonte"] == "online"
+    assert store.available_years("exportacao") == {2023, 2024}
+    assert store.available_years("processamento") == set()
+    # Os backups versionados não são tocados; o fallback lê os dados atualizados
+    assert not (tmp_path / "backups").exists()
+    clear_backup_index()
+    assert load_backup("producao", "2022")["dados"] == [{"Produto": "VINHO", "Quantidade (L.)": "1"}]
+    estatisticas = refresh.get_refresh_stats()
+    assert estatisticas["falhas_por_tipo"]["TimeoutError"] >= 2
+    assert estatisticas["ultima_duracao_segundos"] is not None
+    assert estatisticas["ultima_execucao"].endswith("Z")
+    # Gravações fora do event loop
+    assert len(threads) == 8 and threading.main_thread() not in threads
+
+
+def test_fila_do_site_cheia_usa_backup_sem_raspar(monkeypatch):
+    """Com muitas requisições aguardando o site, a raspagem é descartada e o backup local é servido."""
+    monkeypatch.setattr(scraping, "upstream_sobrecarregado", lambda: True)
+    with patch("app.services.scraping.scrape_table") as mock_scrape:
+        resp = asyncio.run(get_resource_data("producao", ano="2023"))
+    assert resp["fonte"] == "local"
+    mock_scrape.assert_not_called()
+    # Descarte por sobrecarga não conta como falha do site
+    assert circuit_breaker.state == "closed"
+
+
+def test_variacao_marca_ano_indisponivel_so_para_503(monkeypatch):
+    from fastapi import HTTPException
+    from app.services import agregacoes
+
+    async def sem_dados(resource, ano):
+        raise HTTPException(status_code=503, detail="Dados indisponíveis")
+
+    monkeypatch.setattr(agregacoes, "obter_registro", sem_dados)
+    resp = asyncio.run(agregacoes.obter_variacao("producao", 2021, 2022))
+    assert resp["anos"] == [] and resp["anos_indisponiveis"] == [2021, 2022]
+
+    async def com_bug(resource, ano):
+        raise KeyError("agregados")
+
+    monkeypatch.setattr(agregacoes, "obter_registro", com_bug)
+    with pytest.raises(KeyError):
+        asyncio.run(agregacoes.obter_variacao("producao", 2021, 2022))
+
+
+def test_fallback_local_le_o_backup_fora_do_event_loop():
+    threads = []
+
+    def backup(resource, ano):
+        threads.append(threading.current_thread())
+        return {"dados": [], "valor_total": "0", "ano": int(ano), "dados_numericos": [], "total_numerico": 0}
+
+    with patch("app.services.scraping.scrape_table", side_effect=Exception("Site offline")), \
+            patch("app.services.scraping.load_backup", side_effect=backup):
+        resp = asyncio.run(get_resource_data("producao", ano="2023"))
+    assert resp["fonte"] == "local"
+    assert threads and threading.main_thread() not in threads
+
+
+def test_circuito_aberto_serve_backup_sem_aguardar_lock_de_outro_processo(monkeypatch):
+    import time
+    from app.core.shared_cache import CacheBackend, SharedFlight
+
+    class LockOcupado(CacheBackend):
+        async def get(self, key):
+            return None
+
+        async def set(self, key, value, ttl_seconds):
+            pass
+
+        async def acquire_lock(self, key, token, ttl_seconds):
+            return False
+
+        async def release_lock(self, key, token):
+            pass
+
+    monkeypatch.setattr(scraping, "shared_flight", SharedFlight(LockOcupado(), ttl_seconds=60, wait_seconds=30))
+    for _ in range(circuit_breaker.failure_threshold):
+        circuit_breaker.record_failure()
+    inicio = time.monotonic()
+    with patch("app.services.scraping.scrape_table") as mock_scrape:
+        resp = asyncio.run(get_resource_data("producao", ano="2023"))
+    assert resp["fonte"] == "local"
+    assert time.monotonic() - inicio < 5
+    mock_scrape.assert_not_called()